@@ -0,0 +1,94 @@
+"""
+Async Routes
+Versión asíncrona de los routers para DB_MODE=async
+
+Cada ruta síncrona se envuelve en un endpoint `async def` que recibe una
+AsyncSession (asyncpg / aiosqlite) y ejecuta la lógica original con
+AsyncSession.run_sync. Así la E/S de la BD no ocupa hilos del threadpool y la
+lógica de cada ruta sigue existiendo una sola vez.
+
+La respuesta se serializa dentro de run_sync, para que las relaciones cargadas
+de forma diferida (p. ej. CartItem.product) se resuelvan con la conexión asíncrona.
+
+Todo el cuerpo de la ruta corre en el event loop: solo la E/S de la BD es
+asíncrona. Las llamadas síncronas a Redis de la caché compartida del catálogo
+(CATALOG_CACHE_URL) y de CART_STORE=redis bloquearían el loop en cada petición,
+así que este modo no debe combinarse con esos backends (al arrancar se avisa en
+el log). La caché local y CART_STORE=sql o memory no hacen E/S fuera de la BD.
+"""
+
+import inspect
+import logging
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+from .cache import CACHE_URL
+from .cart_store import CART_STORE
+from .database import get_async_db
+
+logger = logging.getLogger(__name__)
+
+def warn_blocking_backends():
+    """Avisar si hay backends Redis configurados: en DB_MODE=async bloquean el event loop"""
+    backends = [name for name, enabled in (
+        ("CATALOG_CACHE_URL", bool(CACHE_URL)),
+        ("CART_STORE=redis", CART_STORE == "redis"),
+    ) if enabled]
+    if backends:
+        logger.warning(
+            "DB_MODE=async con %s: sus llamadas síncronas a Redis bloquean el event loop; "
+            "usa DB_MODE=sync con estos backends", ", ".join(backends)
+        )
+
+def _wrap(endpoint, response_model):
+    signature = inspect.signature(endpoint)
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+
+    async def async_endpoint(**kwargs):
+        async_db = kwargs.pop("db")
+
+        def call(db):
+            result = endpoint(**kwargs, db=db)
+            if adapter is None or isinstance(result, Response):
+                return result
+            validated = adapter.validate_python(result, from_attributes=True)
+            return adapter.dump_python(validated, mode="json")
+
+        return await async_db.run_sync(call)
+
+    async_endpoint.__signature__ = signature.replace(parameters=[
+        param.replace(default=Depends(get_async_db)) if name == "db" else param
+        for name, param in signature.parameters.items()
+    ])
+    async_endpoint.__name__ = endpoint.__name__
+    async_endpoint.__doc__ = endpoint.__doc__
+    return async_endpoint
+
+def async_router(router: APIRouter) -> APIRouter:
+    """Crear un router equivalente cuyas rutas con `db` son asíncronas"""
+    converted = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            converted.routes.append(route)
+            continue
+
+        endpoint = route.endpoint
+        if "db" in inspect.signature(endpoint).parameters and not inspect.iscoroutinefunction(endpoint):
+            endpoint = _wrap(endpoint, route.response_model)
+
+        converted.add_api_route(
+            route.path,
+            endpoint,
+            methods=route.methods,
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            summary=route.summary,
+            description=route.description,
+            responses=route.responses,
+            name=route.name,
+            include_in_schema=route.include_in_schema,
+        )
+    return converted
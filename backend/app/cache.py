@@ -0,0 +1,228 @@
+"""
+Catalog Cache
+Caché de dos niveles para las lecturas del catálogo de productos:
+- Nivel local: LRU con TTL en memoria del proceso
+- Nivel compartido (opcional): servidor compatible con Redis, común a todos los workers
+
+Las escrituras del catálogo invalidan las entradas afectadas en ambos niveles.
+Los demás workers convergen al expirar el TTL (corto) de su nivel local.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Configuración desde variables de entorno
+CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "1") == "1"
+CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "30"))
+CACHE_SHARED_TTL = int(os.getenv("CATALOG_CACHE_SHARED_TTL", "300"))
+CACHE_URL = os.getenv("CATALOG_CACHE_URL")  # p. ej. redis://localhost:6379/0
+
+class LRUTTLCache:
+    """Caché LRU en memoria con expiración por TTL (thread-safe)"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Devolver el valor guardado o None si no existe o expiró"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Guardar un valor, desalojando el menos usado si se llena"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Eliminar todas las claves que cumplan el predicado"""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+class RedisTier:
+    """
+    Nivel compartido sobre un servidor compatible con Redis
+    Acepta un cliente ya creado (p. ej. fakeredis) o una URL
+    Los errores de red se tratan como fallos de caché, nunca como errores de la API
+    """
+
+    def __init__(self, client=None, url: str = None, ttl: int = CACHE_SHARED_TTL, prefix: str = "krisly:catalog"):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CATALOG_CACHE_URL requiere el paquete 'redis' (pip install redis)")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key) -> str:
+        return f"{self.prefix}:{json.dumps(key, separators=(',', ':'))}"
+
+    def _generation(self) -> int:
+        return int(self.client.get(f"{self.prefix}:gen") or 0)
+
+    def _resolve(self, key) -> str:
+        # Las listas se versionan con una generación: invalidarlas es un solo INCR
+        if key[0] == "list":
+            return self._key([self._generation(), *key])
+        return self._key(list(key))
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self._resolve(key))
+        except Exception:
+            self.errors += 1
+            return None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value):
+        try:
+            self.client.set(self._resolve(key), json.dumps(value), ex=self.ttl)
+        except Exception:
+            self.errors += 1
+
+    def delete(self, key):
+        try:
+            self.client.delete(self._resolve(key))
+        except Exception:
+            self.errors += 1
+
+    def invalidate_lists(self):
+        try:
+            self.client.incr(f"{self.prefix}:gen")
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+class CatalogCache:
+    """
+    Caché del catálogo
+    Claves:
+    - ("product", id): detalle de un producto
+    - ("list", nombre, *parámetros): listados (productos, destacados, ...)
+    Los valores deben ser serializables a JSON
+    """
+
+    def __init__(self, local: LRUTTLCache, shared: RedisTier = None, enabled: bool = True):
+        self.local = local
+        self.shared = shared
+        self.enabled = enabled
+        # Se incrementa en cada invalidación; evita guardar lecturas que quedaron viejas
+        self.generation = 0
+        # Las rutas corren en hilos del threadpool: el lock hace atómicos el incremento
+        # de la generación y la verificación + escritura de set()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, key, value, generation: int = None):
+        """
+        Guardar un valor en ambos niveles
+        Si se indica la generación leída antes de consultar la BD y hubo una
+        invalidación entre medio, el valor se descarta
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.local.set(key, value)
+            if self.shared is not None:
+                self.shared.set(key, value)
+
+    def invalidate_product(self, product_id: int):
+        """Invalidar el detalle de un producto y todos los listados que pueden incluirlo"""
+        key = ("product", product_id)
+        with self._lock:
+            self.generation += 1
+            self.local.delete(key)
+            self.local.delete_where(lambda k: k[0] == "list")
+        # Después del lock: cualquier set() que pasó la verificación ya escribió y se borra aquí
+        if self.shared is not None:
+            self.shared.delete(key)
+            self.shared.invalidate_lists()
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.local.clear()
+        if self.shared is not None:
+            self.shared.invalidate_lists()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "local": self.local.stats(),
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+# Instancia global usada por las rutas
+catalog_cache = CatalogCache(
+    local=LRUTTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL),
+    shared=RedisTier(url=CACHE_URL) if CACHE_URL else None,
+    enabled=CACHE_ENABLED,
+)
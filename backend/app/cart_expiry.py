@@ -0,0 +1,87 @@
+"""
+Cart Expiry
+Purga de carritos abandonados (sin cambios durante más de CART_TTL_DAYS días)
+
+Se borra en lotes acotados, cada uno en su propia transacción corta, para no
+bloquear las tablas de carritos mientras la tienda recibe tráfico. Los carritos
+candidatos se buscan por el índice de carts.updated_at; en PostgreSQL se bloquean
+con FOR UPDATE SKIP LOCKED, así un carrito que se está modificando se salta.
+
+Se ejecuta con `python -m app.cli purge-carts` (p. ej. desde cron) o en segundo
+plano cada CART_PURGE_INTERVAL segundos.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import Cart, CartItem
+from .tasks import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Configuración desde variables de entorno
+CART_TTL_DAYS = float(os.getenv("CART_TTL_DAYS", "30"))
+CART_PURGE_BATCH = int(os.getenv("CART_PURGE_BATCH", "1000"))
+CART_PURGE_INTERVAL = float(os.getenv("CART_PURGE_INTERVAL", "0"))  # 0 = sin purga en segundo plano
+
+def purge_batch(db: Session, cutoff: datetime, batch_size: int):
+    """
+    Borrar hasta batch_size carritos sin cambios desde cutoff (con sus items) y hacer commit
+    Devuelve (carritos, items) borrados
+    """
+    stmt = select(Cart.id).where(Cart.updated_at < cutoff).order_by(Cart.updated_at).limit(batch_size)
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = stmt.with_for_update(skip_locked=True)
+    cart_ids = db.execute(stmt).scalars().all()
+    if not cart_ids:
+        db.rollback()
+        return 0, 0
+
+    # Se vuelve a verificar updated_at por si el carrito se modificó entre medio
+    expired = select(Cart.id).where(Cart.id.in_(cart_ids), Cart.updated_at < cutoff)
+    items = db.execute(
+        delete(CartItem).where(CartItem.cart_id.in_(expired)).execution_options(synchronize_session=False)
+    ).rowcount
+    carts = db.execute(
+        delete(Cart).where(Cart.id.in_(cart_ids), Cart.updated_at < cutoff).execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return carts, items
+
+def purge_abandoned_carts(ttl_days: float = CART_TTL_DAYS, batch_size: int = CART_PURGE_BATCH,
+                          session_factory=SessionLocal) -> dict:
+    """
+    Borrar todos los carritos abandonados, lote por lote
+    Devuelve la cantidad de carritos e items borrados, los lotes y la duración
+    """
+    cutoff = datetime.utcnow() - timedelta(days=ttl_days)
+    start = time.perf_counter()
+    report = {"carts": 0, "items": 0, "batches": 0}
+
+    db = session_factory()
+    try:
+        while True:
+            carts, items = purge_batch(db, cutoff, batch_size)
+            if not carts and not items:
+                break
+            report["carts"] += carts
+            report["items"] += items
+            report["batches"] += 1
+    finally:
+        db.close()
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+def _purge_in_background():
+    report = purge_abandoned_carts()
+    if report["carts"]:
+        logger.info("Carritos abandonados purgados: %s", report)
+
+cart_purger = PeriodicTask("cart-purge", _purge_in_background, CART_PURGE_INTERVAL)
@@ -0,0 +1,668 @@
+"""
+Cart Store
+Almacenamiento de carritos detrás de una interfaz común
+
+Implementaciones:
+- SqlCartStore: carritos en la BD (cart_items con upserts nativos)
+- KVCartStore: carritos en memoria o en un servidor compatible con Redis, con
+  persistencia diferida (write-behind) hacia la BD en segundo plano
+
+En ambas, un carrito vacío es virtual hasta que se agrega el primer producto:
+leerlo no escribe nada, así el tráfico que solo navega no genera escrituras.
+Cada cambio de cantidad reserva (o libera) stock en la misma transacción; ver
+app/reservations.py.
+
+Se elige con la variable de entorno CART_STORE (sql, memory o redis).
+"""
+
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy import update as sql_update
+from sqlalchemy.orm import Session
+
+from . import reservations
+from .database import SessionLocal, dialect_insert
+from .models import Cart, CartItem, Product
+
+logger = logging.getLogger(__name__)
+
+# Configuración desde variables de entorno
+CART_STORE = os.getenv("CART_STORE", "sql")  # sql | memory | redis
+CART_STORE_URL = os.getenv("CART_STORE_URL")  # p. ej. redis://localhost:6379/1
+CART_FLUSH_INTERVAL = float(os.getenv("CART_FLUSH_INTERVAL", "5"))
+CART_FLUSH_BATCH = int(os.getenv("CART_FLUSH_BATCH", "500"))
+CART_KV_TTL = int(os.getenv("CART_KV_TTL", str(7 * 24 * 3600)))
+
+class CartConflict(Exception):
+    """La versión indicada no coincide con la del carrito; lleva el carrito actual"""
+
+    def __init__(self, cart: dict):
+        super().__init__("El carrito cambió")
+        self.cart = cart
+
+def empty_cart(user_id: str) -> dict:
+    """Carrito virtual de un usuario que todavía no agregó productos"""
+    return {"id": None, "user_id": user_id, "items": [], "total_price": 0, "item_count": 0, "version": 0}
+
+def item_not_found() -> HTTPException:
+    return HTTPException(status_code=404, detail="Item no encontrado en el carrito")
+
+class CartStore(ABC):
+    """
+    Interfaz de almacenamiento de carritos
+    Una implementación a la que le falte un método abstracto falla al instanciarse
+    Todos los métodos devuelven el carrito con la forma de CartResponse
+    `operations` es una lista de CartOperation (add / update / remove por product_id)
+    """
+
+    @abstractmethod
+    def read(self, db: Session, user_id: str) -> dict:
+        """Leer el carrito (sin escribir; vacío si no existe)"""
+
+    @abstractmethod
+    def apply(self, db: Session, user_id: str, operations, expected_version: int = None, numbered: bool = True) -> dict:
+        """
+        Aplicar varias operaciones de forma atómica
+        Si expected_version no coincide, lanza CartConflict con el carrito actual
+        Si una operación falla no se aplica ninguna (numbered antepone "Operación i: " al error)
+        """
+
+    @abstractmethod
+    def update_item(self, db: Session, user_id: str, item_id: int, quantity: int) -> dict:
+        """Fijar la cantidad de un item (0 o menos lo quita)"""
+
+    @abstractmethod
+    def remove_item(self, db: Session, user_id: str, item_id: int) -> dict:
+        """Quitar un item del carrito"""
+
+    @abstractmethod
+    def clear(self, db: Session, user_id: str):
+        """Vaciar el carrito (y liberar sus reservas)"""
+
+    @abstractmethod
+    def empty_for_order(self, db: Session, user_id: str, version: int):
+        """
+        Vaciar el carrito al convertirlo en orden, si sigue en `version`
+        Se llama antes del commit de la orden. Devuelve None si el carrito cambió; si
+        no, una función que deshace el vaciado, que el checkout llama si el commit falla
+        """
+
+    def start(self):
+        """Iniciar tareas en segundo plano (si las hay)"""
+
+    def close(self):
+        """Detener tareas en segundo plano y persistir lo pendiente"""
+
+# ============ SQL ============
+
+def get_or_create_cart(user_id: str, db: Session, bump_version: bool = False):
+    """
+    Obtener o crear el carrito de un usuario en una sola sentencia
+    Marca el carrito como actualizado (y opcionalmente incrementa su versión)
+    Devuelve una fila con id y version (sin hacer commit)
+    """
+    now = datetime.utcnow()
+    insert = dialect_insert(db)
+    stmt = insert(Cart).values(
+        user_id=user_id, created_at=now, updated_at=now, version=1 if bump_version else 0
+    )
+    values = {"updated_at": now}
+    if bump_version:
+        values["version"] = Cart.version + 1
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Cart.user_id],
+        set_=values
+    ).returning(Cart.id, Cart.version)
+    return db.execute(stmt).one()
+
+def touch_cart(user_id: str, db: Session, expected_version: int = None):
+    """
+    Marcar como actualizado el carrito de un usuario e incrementar su versión
+    Si se indica expected_version, solo se actualiza si la versión coincide
+    Devuelve una fila con id y version, o None si no existe (o la versión no coincide)
+    """
+    stmt = sql_update(Cart).where(Cart.user_id == user_id)
+    if expected_version is not None:
+        stmt = stmt.where(Cart.version == expected_version)
+    stmt = stmt.values(
+        updated_at=datetime.utcnow(),
+        version=Cart.version + 1
+    ).returning(Cart.id, Cart.version)
+    return db.execute(stmt).first()
+
+def upsert_item(db: Session, cart_id: int, product_id: int, quantity: int, replace: bool = False):
+    """
+    Insertar un item en el carrito, o sumar (replace=False) / fijar (replace=True) su cantidad
+    El SELECT verifica en la misma sentencia que el producto existe
+    Devuelve la cantidad resultante, o None si el producto no existe
+    """
+    insert = dialect_insert(db)
+    stmt = insert(CartItem).from_select(
+        ["cart_id", "product_id", "quantity"],
+        select(literal(cart_id), Product.id, literal(quantity)).where(Product.id == product_id)
+    )
+    new_quantity = stmt.excluded.quantity if replace else CartItem.quantity + stmt.excluded.quantity
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CartItem.cart_id, CartItem.product_id],
+        set_={"quantity": new_quantity}
+    ).returning(CartItem.quantity)
+    return db.execute(stmt).scalar()
+
+def item_error(db: Session, product_id: int, prefix: str = "") -> HTTPException:
+    """Distinguir entre producto inexistente y stock insuficiente"""
+    exists = db.query(Product.id).filter(Product.id == product_id).first()
+    if not exists:
+        return HTTPException(status_code=404, detail=f"{prefix}Producto no encontrado")
+    return HTTPException(status_code=400, detail=f"{prefix}Stock insuficiente")
+
+def read_cart(user_id: str, db: Session):
+    """
+    Leer el carrito completo en una sola consulta
+    Carrito, items y productos se unen con LEFT JOIN; el total y la cantidad de
+    unidades se calculan en la misma sentencia con funciones de ventana
+    Devuelve None si el usuario no tiene carrito
+
+    Los LEFT JOIN van encadenados (no carrito LEFT JOIN (items JOIN productos)):
+    SQLite materializa la unión entre paréntesis sobre todos los items de todos
+    los carritos antes de filtrar por usuario
+    """
+    stmt = select(
+        Cart.id.label("cart_id"),
+        Cart.version,
+        CartItem.id.label("item_id"),
+        CartItem.product_id,
+        CartItem.quantity,
+        Product.name,
+        Product.price,
+        Product.image,
+        Product.stock,
+        func.coalesce(func.sum(Product.price * CartItem.quantity).over(), 0).label("total_price"),
+        func.coalesce(func.sum(CartItem.quantity).over(), 0).label("item_count"),
+    ).select_from(Cart).outerjoin(
+        # Los items sin producto (producto eliminado) no forman parte del carrito
+        CartItem, (CartItem.cart_id == Cart.id) & CartItem.product_id.isnot(None)
+    ).outerjoin(
+        Product, Product.id == CartItem.product_id
+    ).where(Cart.user_id == user_id).order_by(CartItem.id)
+
+    rows = db.execute(stmt).all()
+    if not rows:
+        return None
+
+    first = rows[0]
+    return {
+        "id": first.cart_id,
+        "user_id": user_id,
+        "items": [
+            {
+                "id": row.item_id,
+                "product_id": row.product_id,
+                "quantity": row.quantity,
+                "product": {
+                    "id": row.product_id,
+                    "name": row.name,
+                    "price": row.price,
+                    "image": row.image,
+                    "stock": row.stock,
+                },
+            }
+            for row in rows
+            if row.item_id is not None
+        ],
+        "total_price": first.total_price,
+        "item_count": first.item_count,
+        "version": first.version,
+    }
+
+class SqlCartStore(CartStore):
+    """
+    Carritos en la BD
+    Las mutaciones usan upserts nativos y un único commit; la fila del carrito
+    se crea recién con la primera operación que agrega un producto
+    """
+
+    def read(self, db, user_id):
+        return read_cart(user_id, db) or empty_cart(user_id)
+
+    def apply(self, db, user_id, operations, expected_version=None, numbered=True):
+        cart = touch_cart(user_id, db, expected_version=expected_version)
+        if cart is None:
+            # Sin fila que coincida: el carrito tiene otra versión, o todavía es virtual (versión 0)
+            exists = db.query(Cart.id).filter(Cart.user_id == user_id).first()
+            if exists or expected_version not in (None, 0):
+                db.rollback()
+                raise CartConflict(self.read(db, user_id))
+            if not any(operation.op == "add" or (operation.op == "update" and operation.quantity > 0)
+                       for operation in operations):
+                # Quitar de un carrito virtual no cambia nada: no se crea la fila
+                return empty_cart(user_id)
+            cart = get_or_create_cart(user_id, db, bump_version=True)
+            if expected_version is not None and cart.version != 1:
+                # Otra petición creó el carrito entre medio
+                db.rollback()
+                raise CartConflict(self.read(db, user_id))
+
+        for index, operation in enumerate(operations):
+            prefix = f"Operación {index}: " if numbered else ""
+            if operation.op == "remove" or (operation.op == "update" and operation.quantity <= 0):
+                db.query(CartItem).filter(
+                    CartItem.cart_id == cart.id,
+                    CartItem.product_id == operation.product_id
+                ).delete(synchronize_session=False)
+                reservations.release(db, user_id, operation.product_id)
+                continue
+
+            quantity = upsert_item(db, cart.id, operation.product_id, operation.quantity, replace=operation.op == "update")
+            if quantity is None:
+                db.rollback()
+                raise HTTPException(status_code=404, detail=f"{prefix}Producto no encontrado")
+            if not reservations.hold(db, user_id, operation.product_id, quantity):
+                db.rollback()
+                raise HTTPException(status_code=400, detail=f"{prefix}Stock insuficiente")
+
+        db.commit()
+        return read_cart(user_id, db)
+
+    def update_item(self, db, user_id, item_id, quantity):
+        cart = touch_cart(user_id, db)
+        if cart is None:
+            # Sin carrito no hay items: no se escribe nada
+            raise item_not_found()
+
+        if quantity <= 0:
+            # Si la cantidad es 0 o negativa, eliminar el item
+            stmt = delete(CartItem)
+        else:
+            stmt = sql_update(CartItem).values(quantity=quantity)
+        product_id = db.execute(
+            stmt.where(CartItem.id == item_id, CartItem.cart_id == cart.id).returning(CartItem.product_id)
+        ).scalar()
+
+        if product_id is None:
+            db.rollback()
+            raise item_not_found()
+        if not reservations.hold(db, user_id, product_id, quantity):
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Stock insuficiente")
+
+        db.commit()
+        return read_cart(user_id, db)
+
+    def remove_item(self, db, user_id, item_id):
+        return self.update_item(db, user_id, item_id, 0)
+
+    def clear(self, db, user_id):
+        cart = touch_cart(user_id, db)
+        if cart is not None:
+            db.query(CartItem).filter(CartItem.cart_id == cart.id).delete(synchronize_session=False)
+            reservations.release(db, user_id)
+        db.commit()
+
+    def empty_for_order(self, db, user_id, version):
+        # Las reservas las consume el checkout al descontar el stock
+        # Misma transacción que la orden: el CAS sobre la versión serializa checkouts repetidos
+        cart = touch_cart(user_id, db, expected_version=version)
+        if cart is None:
+            return None
+        db.query(CartItem).filter(CartItem.cart_id == cart.id).delete(synchronize_session=False)
+        # El rollback de la orden ya devuelve los items
+        return lambda: None
+
+    def replace(self, db: Session, user_id: str, version: int, items: dict):
+        """
+        Reemplazar el contenido guardado de un carrito (sin commit)
+        Lo usa la persistencia diferida; items es {product_id: quantity}
+        """
+        now = datetime.utcnow()
+        insert = dialect_insert(db)
+        stmt = insert(Cart).values(user_id=user_id, created_at=now, updated_at=now, version=version)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Cart.user_id],
+            set_={"updated_at": now, "version": version}
+        ).returning(Cart.id)
+        cart_id = db.execute(stmt).scalar_one()
+
+        db.query(CartItem).filter(
+            CartItem.cart_id == cart_id,
+            CartItem.product_id.notin_([int(product_id) for product_id in items])
+        ).delete(synchronize_session=False)
+        for product_id, quantity in items.items():
+            upsert_item(db, cart_id, int(product_id), quantity, replace=True)
+
+# ============ KV ============
+
+class MemoryKV:
+    """
+    Almacén clave-valor en memoria del proceso (thread-safe)
+    Sirve para un solo worker, desarrollo o pruebas
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            return self._data.get(key)
+
+    def compare_and_set(self, key: str, expected, value: str) -> bool:
+        """Guardar value solo si el valor actual sigue siendo expected (None = no existe)"""
+        with self._lock:
+            if self._data.get(key) != expected:
+                return False
+            self._data[key] = value
+            return True
+
+    def mark_dirty(self, *members: str):
+        with self._lock:
+            self._dirty.update(members)
+
+    def pop_dirty(self, count: int) -> list:
+        with self._lock:
+            members = [self._dirty.pop() for _ in range(min(count, len(self._dirty)))]
+        return members
+
+class RedisKV:
+    """
+    Almacén clave-valor sobre un servidor compatible con Redis, común a todos los workers
+    Acepta un cliente ya creado (p. ej. fakeredis) o una URL
+    """
+
+    def __init__(self, client=None, url: str = None, ttl: int = CART_KV_TTL, prefix: str = "krisly:cart"):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("CART_STORE=redis requiere el paquete 'redis' (pip install redis)")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.ttl = ttl
+        self.dirty_key = f"{prefix}:dirty"
+
+    @staticmethod
+    def _decode(raw):
+        return raw.decode() if isinstance(raw, bytes) else raw
+
+    def get(self, key: str):
+        return self._decode(self.client.get(key))
+
+    def compare_and_set(self, key: str, expected, value: str) -> bool:
+        """Guardar value solo si el valor actual sigue siendo expected (WATCH / MULTI)"""
+        from redis.exceptions import WatchError
+
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if self._decode(pipe.get(key)) != expected:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.set(key, value, ex=self.ttl)
+                pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    def mark_dirty(self, *members: str):
+        if members:
+            self.client.sadd(self.dirty_key, *members)
+
+    def pop_dirty(self, count: int) -> list:
+        return [self._decode(member) for member in self.client.spop(self.dirty_key, count) or []]
+
+class KVCartStore(CartStore):
+    """
+    Carritos en un almacén clave-valor con persistencia diferida a la BD
+    - Cada carrito es un JSON {"version": n, "items": {product_id: quantity}}
+    - Las mutaciones son compare-and-set sobre ese JSON y marcan al usuario como pendiente
+    - Las reservas de stock se escriben en la BD y se confirman solo si el compare-and-set tuvo éxito
+    - Un hilo persiste los carritos pendientes cada CART_FLUSH_INTERVAL segundos
+    - Si la clave no existe se lee de la BD (read-through); los carritos vacíos no se guardan
+    Los ids de los items son los ids de producto (los items aún no tienen fila en la BD)
+    """
+
+    def __init__(self, kv, sql: SqlCartStore = None, session_factory=SessionLocal,
+                 flush_interval: float = CART_FLUSH_INTERVAL, flush_batch: int = CART_FLUSH_BATCH,
+                 max_retries: int = 10, prefix: str = "krisly:cart"):
+        self.kv = kv
+        self.sql = sql or SqlCartStore()
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.max_retries = max_retries
+        self.prefix = prefix
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    def _load(self, db, user_id):
+        """Devolver (valor crudo, estado) del carrito, leyendo de la BD si no está en el almacén"""
+        key = self._key(user_id)
+        raw = self.kv.get(key)
+        if raw is not None:
+            return raw, json.loads(raw)
+
+        cart = read_cart(user_id, db)
+        if cart is None:
+            return None, {"version": 0, "items": {}}
+        state = {
+            "version": cart["version"],
+            "items": {str(item["product_id"]): item["quantity"] for item in cart["items"]},
+        }
+        value = json.dumps(state)
+        if self.kv.compare_and_set(key, None, value):
+            return value, state
+        # Otro worker lo cargó primero
+        return self._load(db, user_id)
+
+    def _response(self, db, user_id, state) -> dict:
+        items = state["items"]
+        products = {}
+        if items:
+            products = {
+                row.id: row
+                for row in db.execute(
+                    select(Product.id, Product.name, Product.price, Product.image, Product.stock)
+                    .where(Product.id.in_([int(product_id) for product_id in items]))
+                )
+            }
+
+        lines = []
+        for product_id, quantity in items.items():
+            product = products.get(int(product_id))
+            if product is None:
+                continue
+            lines.append({
+                "id": product.id,
+                "product_id": product.id,
+                "quantity": quantity,
+                "product": {
+                    "id": product.id,
+                    "name": product.name,
+                    "price": product.price,
+                    "image": product.image,
+                    "stock": product.stock,
+                },
+            })
+        return {
+            "id": None,
+            "user_id": user_id,
+            "items": lines,
+            "total_price": sum(line["product"]["price"] * line["quantity"] for line in lines),
+            "item_count": sum(line["quantity"] for line in lines),
+            "version": state["version"],
+        }
+
+    def _mutate(self, db, user_id, change, expected_version=None, prefixes=None) -> dict:
+        """
+        Aplicar change(items) sobre una copia de los items y guardarla con compare-and-set
+        Las reservas de los productos que cambiaron se ajustan en la BD antes del
+        compare-and-set y se confirman solo si este tuvo éxito
+        Si otro proceso modificó el carrito entre medio, se reintenta con el valor nuevo
+        """
+        prefixes = prefixes or {}
+        for _ in range(self.max_retries):
+            raw, state = self._load(db, user_id)
+            if expected_version is not None and state["version"] != expected_version:
+                raise CartConflict(self._response(db, user_id, state))
+
+            items = dict(state["items"])
+            change(items)
+            for key in sorted(set(items) | set(state["items"]), key=int):
+                quantity = items.get(key, 0)
+                if quantity != state["items"].get(key, 0) and not reservations.hold(db, user_id, int(key), quantity):
+                    db.rollback()
+                    raise HTTPException(status_code=400, detail=f"{prefixes.get(key, '')}Stock insuficiente")
+
+            new_state = {"version": state["version"] + 1, "items": items}
+            if self.kv.compare_and_set(self._key(user_id), raw, json.dumps(new_state)):
+                db.commit()
+                self.kv.mark_dirty(user_id)
+                return self._response(db, user_id, new_state)
+            db.rollback()
+
+        raise CartConflict(self._response(db, user_id, self._load(db, user_id)[1]))
+
+    def read(self, db, user_id):
+        return self._response(db, user_id, self._load(db, user_id)[1])
+
+    def apply(self, db, user_id, operations, expected_version=None, numbered=True):
+        added = [operation.product_id for operation in operations if operation.op != "remove"]
+        existing = set()
+        if added:
+            existing = set(db.execute(select(Product.id).where(Product.id.in_(added))).scalars())
+
+        prefixes = {}
+        for index, operation in enumerate(operations):
+            prefixes[str(operation.product_id)] = f"Operación {index}: " if numbered else ""
+
+        def change(items):
+            for index, operation in enumerate(operations):
+                key = str(operation.product_id)
+                if operation.op == "remove" or (operation.op == "update" and operation.quantity <= 0):
+                    items.pop(key, None)
+                    continue
+                if operation.product_id not in existing:
+                    prefix = f"Operación {index}: " if numbered else ""
+                    raise HTTPException(status_code=404, detail=f"{prefix}Producto no encontrado")
+                if operation.op == "update":
+                    items[key] = operation.quantity
+                else:
+                    items[key] = items.get(key, 0) + operation.quantity
+
+        return self._mutate(db, user_id, change, expected_version, prefixes)
+
+    def update_item(self, db, user_id, item_id, quantity):
+        def change(items):
+            key = str(item_id)
+            if key not in items:
+                raise item_not_found()
+            if quantity <= 0:
+                del items[key]
+            else:
+                items[key] = quantity
+
+        return self._mutate(db, user_id, change)
+
+    def remove_item(self, db, user_id, item_id):
+        return self.update_item(db, user_id, item_id, 0)
+
+    def clear(self, db, user_id):
+        raw, state = self._load(db, user_id)
+        if raw is not None:
+            self._mutate(db, user_id, lambda items: items.clear())
+
+    def empty_for_order(self, db, user_id, version):
+        # El almacén no participa de la transacción de la BD: se vacía justo antes del
+        # commit (el compare-and-set serializa checkouts repetidos del mismo carrito) y,
+        # si el commit falla, undo le devuelve los items
+        raw, state = self._load(db, user_id)
+        if state["version"] != version:
+            return None
+        key = self._key(user_id)
+        emptied = json.dumps({"version": version + 1, "items": {}})
+        if not self.kv.compare_and_set(key, raw, emptied):
+            return None
+        self.kv.mark_dirty(user_id)
+
+        def undo():
+            # Versión nueva: quien vio el carrito vacío recibe un conflicto en lugar de pisarlo
+            restored = json.dumps({"version": version + 2, "items": state["items"]})
+            if self.kv.compare_and_set(key, emptied, restored):
+                self.kv.mark_dirty(user_id)
+            else:
+                logger.warning("No se pudo restaurar el carrito de %s: cambió después del checkout fallido", user_id)
+
+        return undo
+
+    def flush(self) -> int:
+        """
+        Persistir en la BD los carritos pendientes (hasta flush_batch por transacción)
+        Si falla, los usuarios vuelven a quedar pendientes
+        Devuelve la cantidad de carritos persistidos
+        """
+        persisted = 0
+        while True:
+            users = self.kv.pop_dirty(self.flush_batch)
+            if not users:
+                return persisted
+
+            db = self.session_factory()
+            try:
+                for user_id in users:
+                    raw = self.kv.get(self._key(user_id))
+                    if raw is None:
+                        continue
+                    state = json.loads(raw)
+                    self.sql.replace(db, user_id, state["version"], state["items"])
+                db.commit()
+            except Exception:
+                db.rollback()
+                self.kv.mark_dirty(*users)
+                raise
+            finally:
+                db.close()
+            persisted += len(users)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error al persistir carritos")
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="cart-write-behind", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+def create_cart_store(kind: str = CART_STORE) -> CartStore:
+    """Crear el almacenamiento configurado en CART_STORE"""
+    if kind == "sql":
+        return SqlCartStore()
+    if kind == "memory":
+        return KVCartStore(MemoryKV())
+    if kind == "redis":
+        return KVCartStore(RedisKV(url=CART_STORE_URL))
+    raise ValueError(f"CART_STORE desconocido: {kind}")
+
+# Instancia global usada por las rutas
+cart_store = create_cart_store()
@@ -0,0 +1,148 @@
+"""
+Command Line Tasks
+Tareas de mantenimiento que se ejecutan fuera del servidor
+
+Uso (desde la carpeta backend):
+    python -m app.cli migrate [--status]
+    python -m app.cli backfill-ratings
+    python -m app.cli purge-carts [--ttl-days 30] [--batch-size 1000]
+    python -m app.cli sweep-holds [--batch-size 1000]
+    python -m app.cli backfill-sales
+    python -m app.cli import-products catalogo.csv [--format csv] [--chunk-size 1000]
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from .database import SessionLocal, engine
+from . import migrations
+
+def migrate(status: bool = False):
+    """Aplicar las migraciones pendientes (tablas, columnas, índices y datos iniciales)"""
+    if status:
+        missing = migrations.pending(engine)
+        for name in missing:
+            print(f"⏳ Pendiente: {name}")
+        print(f"{'⚠️' if missing else '✅'} {len(missing)} migraciones pendientes (última: {migrations.latest_version():04d})")
+        return 1 if missing else 0
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    start = time.perf_counter()
+    applied = migrations.migrate(engine)
+    print(f"✅ Base al día (versión {migrations.latest_version():04d}, {len(applied)} migraciones aplicadas) "
+          f"en {time.perf_counter() - start:.2f}s")
+    return 0
+
+def backfill_ratings():
+    """Calcular los agregados de reseñas de todos los productos"""
+    from .ratings import backfill
+    from .leaderboards import rebuild_all
+
+    migrate()
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        updated = backfill(db)
+        rebuild_all(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"✅ Agregados de reseñas recalculados para {updated} productos en {time.perf_counter() - start:.2f}s")
+
+def purge_carts(ttl_days: float, batch_size: int):
+    """Borrar los carritos sin cambios durante más de ttl_days días"""
+    from .cart_expiry import purge_abandoned_carts
+
+    report = purge_abandoned_carts(ttl_days=ttl_days, batch_size=batch_size)
+    print(
+        f"🧹 Carritos borrados: {report['carts']} ({report['items']} items) "
+        f"en {report['batches']} lotes, {report['seconds']:.2f}s"
+    )
+
+def sweep_holds(batch_size: int):
+    """Liberar las reservas de stock vencidas"""
+    from .reservations import sweep_expired
+
+    report = sweep_expired(batch_size=batch_size)
+    print(f"🔓 Reservas liberadas: {report['holds']} en {report['batches']} lotes, {report['seconds']:.2f}s")
+
+def backfill_sales():
+    """Recalcular los agregados de ventas y sales_count a partir de las órdenes"""
+    from .sales import backfill
+    from .leaderboards import rebuild_all
+    from .models import Product
+    from . import versions
+
+    migrate()
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        report = backfill(db)
+        rebuild_all(db)
+        # sales_count cambió: invalidar los ETags del catálogo y de cada producto
+        versions.bump(db, versions.CATALOG, *[versions.product_key(product_id) for (product_id,) in db.query(Product.id)])
+        db.commit()
+    finally:
+        db.close()
+    print(
+        f"✅ Agregados de ventas recalculados ({report['rows']} filas, "
+        f"{report['products']} productos con ventas) en {time.perf_counter() - start:.2f}s"
+    )
+
+def import_products(path: str, format: str, chunk_size: int):
+    """Cargar o actualizar productos desde un archivo CSV o JSONL"""
+    from .product_import import import_file
+
+    format = format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, "rb") as file:
+        report = import_file(file, format, chunk_size)
+    for error in report["errors"]:
+        print(f"⚠️ Fila {error['row']}: {error['error']}")
+    print(
+        f"📦 Filas: {report['rows']} ({report['inserted']} nuevos, {report['updated']} actualizados, "
+        f"{report['failed']} con error) en {report['seconds']:.2f}s, {report['rows_per_second']} filas/s"
+    )
+    return 1 if report["failed"] else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Tareas de Krisly Beauty API")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    upgrade = subparsers.add_parser("migrate", help=migrate.__doc__)
+    upgrade.add_argument("--status", action="store_true", help="Solo listar las pendientes (código 1 si hay alguna)")
+    upgrade.set_defaults(func=lambda args: migrate(args.status))
+    # Nombre anterior del comando
+    subparsers.add_parser("sync-schema", help="Igual que migrate").set_defaults(func=lambda args: migrate())
+    subparsers.add_parser("backfill-ratings", help=backfill_ratings.__doc__).set_defaults(
+        func=lambda args: backfill_ratings()
+    )
+
+    from .cart_expiry import CART_PURGE_BATCH, CART_TTL_DAYS
+    purge = subparsers.add_parser("purge-carts", help=purge_carts.__doc__)
+    purge.add_argument("--ttl-days", type=float, default=CART_TTL_DAYS, help="Días sin cambios para considerar abandonado un carrito")
+    purge.add_argument("--batch-size", type=int, default=CART_PURGE_BATCH, help="Carritos por transacción")
+    purge.set_defaults(func=lambda args: purge_carts(args.ttl_days, args.batch_size))
+
+    subparsers.add_parser("backfill-sales", help=backfill_sales.__doc__).set_defaults(
+        func=lambda args: backfill_sales()
+    )
+
+    from .reservations import RESERVATION_SWEEP_BATCH
+    sweep = subparsers.add_parser("sweep-holds", help=sweep_holds.__doc__)
+    sweep.add_argument("--batch-size", type=int, default=RESERVATION_SWEEP_BATCH, help="Reservas por transacción")
+    sweep.set_defaults(func=lambda args: sweep_holds(args.batch_size))
+
+    from .product_import import FORMATS, IMPORT_CHUNK_SIZE
+    load = subparsers.add_parser("import-products", help=import_products.__doc__)
+    load.add_argument("path", help="Archivo CSV (con encabezado) o JSONL")
+    load.add_argument("--format", choices=FORMATS, help="Formato del archivo (por defecto, según la extensión)")
+    load.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Filas por transacción")
+    load.set_defaults(func=lambda args: import_products(args.path, args.format, args.chunk_size))
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
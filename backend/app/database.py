@@ -7,6 +7,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 import os
 
+from . import sqlite_profile
+
 # Obtener la URL de la base de datos del entorno o usar SQLite por defecto
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
@@ -24,18 +26,66 @@ if DATABASE_URL.startswith("postgresql"):
         pool_recycle=3600  # Reciclar conexiones cada hora
     )
 else:
-    # SQLite
+    # SQLite: WAL, pragmas y pool para varios hilos (ver app/sqlite_profile.py)
     engine = create_engine(
         DATABASE_URL,
-        connect_args={"check_same_thread": False}  # Solo para SQLite
+        connect_args={"check_same_thread": False},  # Solo para SQLite
+        **sqlite_profile.pool_options(DATABASE_URL)
+    )
+
+# Modo de acceso a la BD para las rutas: sync (threadpool) o async (asyncpg / aiosqlite)
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+# Cola de un escritor a la vez (SQLITE_WRITE_QUEUE=1, solo en modo sync)
+write_queue = None
+if engine.dialect.name == "sqlite":
+    write_queue = sqlite_profile.configure(
+        engine, write_queue=sqlite_profile.SQLITE_WRITE_QUEUE and DB_MODE == "sync"
     )
 
 # Crear sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def async_database_url(url: str) -> str:
+    """Convertir la URL síncrona a su driver asíncrono"""
+    if url.startswith("postgresql"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://")
+    return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    
+    if DATABASE_URL.startswith("postgresql"):
+        async_engine = create_async_engine(
+            async_database_url(DATABASE_URL),
+            pool_pre_ping=True,
+            pool_recycle=3600
+        )
+    else:
+        async_engine = create_async_engine(
+            async_database_url(DATABASE_URL),
+            **sqlite_profile.pool_options(DATABASE_URL)
+        )
+        sqlite_profile.configure(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
 # Base para los modelos
 Base = declarative_base()
 
+def dialect_insert(db):
+    """
+    Devolver la función insert del dialecto activo (SQLite o PostgreSQL)
+    Ambas soportan INSERT ... ON CONFLICT DO UPDATE (upsert)
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
 def get_db():
     """
     Dependencia para obtener la sesión de la base de datos
@@ -46,3 +96,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """
+    Dependencia asíncrona (DB_MODE=async)
+    Entrega una AsyncSession; las rutas ejecutan su lógica con run_sync
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
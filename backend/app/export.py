@@ -0,0 +1,94 @@
+"""
+Streaming Export
+Exportación de tablas completas (productos, reseñas, mensajes) en NDJSON o CSV
+
+Las filas se leen con un cursor del lado del servidor (yield_per: en PostgreSQL
+un cursor con nombre, en SQLite el cursor de sqlite3 fila por fila) en lotes de
+EXPORT_BATCH_SIZE, y cada lote se codifica y se envía antes de leer el
+siguiente. Se seleccionan columnas, no objetos ORM, así la memoria usada no
+depende del tamaño de la tabla.
+
+En DB_MODE=async el recorrido usa AsyncSession.stream; en modo sync, una sesión
+propia que StreamingResponse recorre en el threadpool.
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from .database import DB_MODE, SessionLocal
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def encode_batch(columns: list, rows, format: str) -> bytes:
+    """Codificar un lote de filas (tuplas en el orden de columns) como NDJSON o CSV"""
+    if format == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [value.isoformat() if isinstance(value, (datetime, date)) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode("utf-8")
+
+def _header(columns: list, format: str) -> bytes:
+    if format != "csv":
+        return b""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue().encode("utf-8")
+
+def _stream_sync(stmt: Select, columns: list, format: str, batch_size: int):
+    yield _header(columns, format)
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            yield encode_batch(columns, rows, format)
+    finally:
+        db.close()
+
+async def _stream_async(stmt: Select, columns: list, format: str, batch_size: int):
+    from .database import AsyncSessionLocal
+
+    yield _header(columns, format)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield encode_batch(columns, rows, format)
+
+def export_response(stmt: Select, format: str, filename: str, batch_size: int = EXPORT_BATCH_SIZE) -> StreamingResponse:
+    """
+    Respuesta que transmite el resultado de un SELECT de columnas en NDJSON o CSV
+    Los nombres de las columnas del SELECT son las claves (NDJSON) o el encabezado (CSV)
+    """
+    if format not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail="Formato inválido. Use: ndjson o csv")
+
+    columns = [column.name for column in stmt.selected_columns]
+    stream = _stream_async if DB_MODE == "async" else _stream_sync
+    return StreamingResponse(
+        stream(stmt, columns, format, batch_size),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
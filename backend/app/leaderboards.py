@@ -0,0 +1,187 @@
+"""
+Product Leaderboards
+Rankings materializados (top-N) para /api/products/featured/by-criteria
+
+Cada criterio (featured, rating, sales) guarda sus N primeros productos, en global
+y por categoría, en la tabla product_leaderboards. Leer un ranking es una lectura
+por clave primaria; las escrituras solo recalculan los rankings que el producto
+modificado puede alterar, y cada recálculo es un recorrido de N filas por índice.
+"""
+
+import os
+from collections import defaultdict
+
+from sqlalchemy.orm import Session
+
+from .database import dialect_insert
+from .models import Product, ProductLeaderboard
+
+# Cantidad de productos guardados por ranking
+LEADERBOARD_SIZE = int(os.getenv("LEADERBOARD_SIZE", "50"))
+
+CRITERIA = ("featured", "rating", "sales")
+
+# Clave de categoría para el ranking global
+ALL_CATEGORIES = ""
+
+def _score(criteria: str, product) -> float:
+    if criteria == "rating":
+        return product.rating or 0.0
+    if criteria == "sales":
+        return float(product.sales_count or 0)
+    return 0.0
+
+def _sort_key(criteria: str, score: float, product_id: int) -> tuple:
+    """Clave con el mismo orden que _top_query (menor = mejor posición)"""
+    if criteria == "featured":
+        return (product_id,)
+    return (-score, -product_id)
+
+def _top_query(db: Session, criteria: str, category: str, columns: tuple = (Product,)):
+    query = db.query(*columns)
+    if category != ALL_CATEGORIES:
+        query = query.filter(Product.category == category)
+
+    if criteria == "featured":
+        query = query.filter(Product.is_featured == True).order_by(Product.id)
+    elif criteria == "rating":
+        query = query.order_by(Product.rating.desc(), Product.id.desc())
+    else:
+        query = query.order_by(Product.sales_count.desc(), Product.id.desc())
+    return query
+
+def refresh(db: Session, criteria: str, category: str = ALL_CATEGORIES):
+    """
+    Recalcular un ranking a partir de los índices de products
+    Las posiciones se escriben con un upsert y solo se borran las que sobran: dos
+    transacciones que recalculan el mismo ranking a la vez (p. ej. dos checkouts en
+    PostgreSQL con READ COMMITTED) se esperan en la fila en lugar de chocar con la
+    clave primaria, como pasaría con DELETE + INSERT
+    """
+    top = _top_query(db, criteria, category).limit(LEADERBOARD_SIZE).all()
+
+    if top:
+        insert = dialect_insert(db)
+        stmt = insert(ProductLeaderboard)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProductLeaderboard.criteria, ProductLeaderboard.category, ProductLeaderboard.position],
+            set_={"product_id": stmt.excluded.product_id, "score": stmt.excluded.score},
+        )
+        db.execute(stmt, [
+            {
+                "criteria": criteria,
+                "category": category,
+                "position": position,
+                "product_id": product.id,
+                "score": _score(criteria, product),
+            }
+            for position, product in enumerate(top)
+        ])
+    db.query(ProductLeaderboard).filter(
+        ProductLeaderboard.criteria == criteria,
+        ProductLeaderboard.category == category,
+        ProductLeaderboard.position >= len(top)
+    ).delete(synchronize_session=False)
+
+def _load_boards(db: Session, criteria, categories) -> dict:
+    """Rankings (criterio, categoría) -> filas en orden de posición, en una sola consulta"""
+    rows = db.query(
+        ProductLeaderboard.criteria,
+        ProductLeaderboard.category,
+        ProductLeaderboard.product_id,
+        ProductLeaderboard.score
+    ).filter(
+        ProductLeaderboard.criteria.in_(criteria),
+        ProductLeaderboard.category.in_(categories)
+    ).order_by(ProductLeaderboard.position)
+
+    boards = defaultdict(list)
+    for row in rows:
+        boards[(row.criteria, row.category)].append(row)
+    return boards
+
+def _affects(board: list, criteria: str, product, deleted: bool) -> bool:
+    """Indicar si el cambio de un producto puede alterar el ranking"""
+    if any(row.product_id == product.id for row in board):
+        return True
+    if deleted or (criteria == "featured" and not product.is_featured):
+        return False
+    if len(board) < LEADERBOARD_SIZE:
+        return True
+    last = board[-1]
+    return (
+        _sort_key(criteria, _score(criteria, product), product.id)
+        < _sort_key(criteria, last.score, last.product_id)
+    )
+
+def on_products_change(
+    db: Session,
+    products: list,
+    criteria=CRITERIA,
+    previous_category: str = None,
+    deleted: bool = False
+):
+    """
+    Actualizar los rankings tras modificar productos (dentro de la transacción actual)
+    Los rankings se leen en una consulta y cada uno se recalcula a lo sumo una vez,
+    sin importar cuántos productos cambiaron (p. ej. todas las líneas de una orden)
+    - criteria: criterios que el cambio puede afectar (p. ej. solo "rating" tras una reseña)
+    - previous_category: categoría anterior si el producto cambió de categoría
+    - deleted: los productos fueron eliminados
+    """
+    if not products:
+        return
+    categories = {ALL_CATEGORIES} | {product.category for product in products}
+    if previous_category is not None:
+        categories.add(previous_category)
+    categories.discard(None)
+
+    db.flush()
+    boards = _load_boards(db, criteria, categories)
+    for name in criteria:
+        for category in categories:
+            board = boards.get((name, category), [])
+            if any(
+                _affects(board, name, product, deleted)
+                for product in products
+                if category in (ALL_CATEGORIES, product.category, previous_category)
+            ):
+                refresh(db, name, category)
+
+def on_product_change(db: Session, product, criteria=CRITERIA, previous_category: str = None, deleted: bool = False):
+    """Actualizar los rankings tras modificar un producto (ver on_products_change)"""
+    on_products_change(db, [product], criteria, previous_category, deleted)
+
+def rebuild_all(db: Session):
+    """Recalcular todos los rankings (global y por cada categoría)"""
+    categories = [ALL_CATEGORIES] + [
+        row.category for row in db.query(Product.category).distinct() if row.category
+    ]
+    db.query(ProductLeaderboard).delete(synchronize_session=False)
+    for name in CRITERIA:
+        for category in categories:
+            refresh(db, name, category)
+
+def ensure_built(db: Session):
+    """Construir los rankings si la tabla está vacía (primer arranque)"""
+    if db.query(ProductLeaderboard).first() is None:
+        rebuild_all(db)
+        db.commit()
+
+def top_products(db: Session, criteria: str, category: str = None, limit: int = 6,
+                 columns: tuple = (Product,)) -> list:
+    """
+    Leer los primeros productos de un ranking
+    Con columns (columnas de Product) devuelve filas con esas columnas en lugar de objetos
+    """
+    category = category or ALL_CATEGORIES
+    if limit > LEADERBOARD_SIZE:
+        # Fuera de lo materializado: consultar directamente (sigue usando los índices)
+        return _top_query(db, criteria, category, columns).limit(limit).all()
+
+    return db.query(*columns).join(
+        ProductLeaderboard, ProductLeaderboard.product_id == Product.id
+    ).filter(
+        ProductLeaderboard.criteria == criteria,
+        ProductLeaderboard.category == category
+    ).order_by(ProductLeaderboard.position).limit(limit).all()
@@ -3,70 +3,38 @@ FastAPI Main Application
 Punto de entrada de la aplicación backend
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import Base, engine
-from .routes import products, cart, reviews, contact
-
-# Crear las tablas en la base de datos
-Base.metadata.create_all(bind=engine)
+from fastapi.responses import PlainTextResponse
+from .cache import catalog_cache
+from .cart_expiry import cart_purger
+from .cart_store import cart_store
+from .reservations import reservation_sweeper
+from .async_routes import async_router, warn_blocking_backends
+from .database import DB_MODE, async_engine, engine
+from . import metrics, query_profiler, startup
+from .routes import products, cart, orders, reviews, contact, analytics
 
-# Agregar productos de prueba si la BD está vacía
-def seed_initial_products():
-    from .database import SessionLocal
-    from .models import Product
-    
-    db = SessionLocal()
-    try:
-        # Verificar si hay productos
-        product_count = db.query(Product).count()
-        if product_count == 0:
-            # Agregar productos de prueba
-            products = [
-                Product(
-                    name="Sombra Negra Colorida",
-                    category="Maquillaje",
-                    price=29.99,
-                    image="https://images.unsplash.com/photo-1599643478518-a784e5dc4c8f?w=500&h=500&fit=crop",
-                    description="Sombra de ojos de alta pigmentación con acabado mate y shimmer",
-                    stock=50,
-                    rating=4.9,
-                    sales_count=125,
-                    is_featured=True
-                ),
-                Product(
-                    name="Labial Rojo Intenso",
-                    category="Maquillaje",
-                    price=24.99,
-                    image="https://images.unsplash.com/photo-1599643478518-a784e5dc4c8f?w=500&h=500&fit=crop",
-                    description="Labial de larga duración con acabado mate y cremoso",
-                    stock=75,
-                    rating=4.7,
-                    sales_count=89,
-                    is_featured=True
-                ),
-                Product(
-                    name="Crema Hidratante Premium",
-                    category="Cuidado Personal",
-                    price=45.99,
-                    image="https://images.unsplash.com/photo-1556228578-8c89e6adf883?w=500&h=500&fit=crop",
-                    description="Crema facial hidratante con ingredientes naturales y antienvejecimiento",
-                    stock=30,
-                    rating=4.8,
-                    sales_count=156,
-                    is_featured=True
-                )
-            ]
-            for product in products:
-                db.add(product)
-            db.commit()
-    finally:
-        db.close()
-
-seed_initial_products()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Preparar el worker (esquema, índice de búsqueda y caché, ver app/startup.py)
+    e iniciar y detener las tareas en segundo plano (persistencia de carritos, purga y reservas)
+    """
+    await startup.prepare(app)
+    cart_store.start()
+    cart_purger.start()
+    reservation_sweeper.start()
+    yield
+    reservation_sweeper.close()
+    cart_purger.close()
+    cart_store.close()
 
 # Crear la aplicación FastAPI
 app = FastAPI(
+    lifespan=lifespan,
     title="Krisly Beauty API",
     description="API Backend para la tienda de belleza de Krisly Ramirez",
     version="1.0.0",
@@ -84,11 +52,25 @@ app.add_middleware(
     max_age=3600,
 )
 
-# Incluir rutas
-app.include_router(products.router)
-app.include_router(cart.router)
-app.include_router(reviews.router)
-app.include_router(contact.router)
+# Consultas SQL por petición y detección de N+1 (QUERY_PROFILER=1, ver app/query_profiler.py)
+if query_profiler.QUERY_PROFILER_ENABLED:
+    app.add_middleware(query_profiler.QueryProfilerMiddleware)
+    query_profiler.instrument(engine)
+    if async_engine is not None:
+        query_profiler.instrument(async_engine.sync_engine)
+
+# Métricas por ruta para GET /metrics (el middleware más externo mide toda la petición)
+if metrics.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.instrument_engine("sync", engine)
+    if async_engine is not None:
+        metrics.instrument_engine("async", async_engine.sync_engine)
+
+# Incluir rutas (en DB_MODE=async se usan sus versiones asíncronas)
+for router in (products.router, cart.router, orders.router, reviews.router, contact.router, analytics.router):
+    app.include_router(async_router(router) if DB_MODE == "async" else router)
+if DB_MODE == "async":
+    warn_blocking_backends()
 
 @app.get("/")
 def read_root():
@@ -104,6 +86,19 @@ def health_check():
     """Verificar que el servidor está funcionando"""
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """Métricas en formato de texto de Prometheus (latencia por ruta, threadpool, pool de la BD, caché)"""
+    return PlainTextResponse(
+        metrics.render(catalog_cache.stats(), startup.report),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Contadores de la caché del catálogo (aciertos, fallos, desalojos)"""
+    return catalog_cache.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,214 @@
+"""
+Metrics
+Métricas del servidor en formato de texto de Prometheus (GET /metrics)
+
+- http_requests_total / http_request_duration_seconds: peticiones y latencia por
+  ruta (la plantilla, p. ej. /api/products/{product_id}), método y estado
+- http_requests_in_progress: peticiones en curso
+- threadpool_*: hilos ocupados y tareas esperando un hilo (rutas síncronas)
+- db_pool_*: conexiones del pool de SQLAlchemy y espera para obtener una
+- catalog_cache_*: aciertos y fallos de la caché del catálogo
+- app_startup_seconds: duración de cada paso del arranque de este worker (app/startup.py)
+
+El middleware es ASGI puro y se ejecuta en el hilo del event loop, así que
+actualiza sus contadores sin locks; solo la espera del pool, que se mide en los
+hilos del threadpool, usa un lock propio. `scripts/metrics_overhead.py` mide el
+costo por petición.
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections import defaultdict
+
+import anyio.to_thread
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Límites (segundos) de los histogramas de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Ruta de las peticiones que no corresponden a ninguna ruta (404), para no crear una serie por URL
+UNMATCHED = "<unmatched>"
+
+class Histogram:
+    """Histograma acumulativo de Prometheus (sin lock: un solo hilo escribe)"""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # El último es +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        separator = "," if labels else ""
+        lines, total = [], 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {total}")
+        return lines
+
+class RequestMetrics:
+    """Contadores de peticiones HTTP (se actualizan solo desde el event loop)"""
+
+    def __init__(self):
+        self.requests = defaultdict(int)  # (método, ruta, estado) -> peticiones
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # (método, ruta) -> histograma
+        self.in_progress = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        self.requests[(method, route, status)] += 1
+        self.latency[(method, route)].observe(seconds)
+
+class PoolWaits:
+    """Tiempo de espera para obtener una conexión del pool (se mide en los hilos de las rutas)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histogram = Histogram(POOL_WAIT_BUCKETS)
+        self.waiting = 0
+        self.timeouts = 0
+
+    def instrument(self, pool):
+        """Envolver pool.connect para medir la espera de cada checkout"""
+        connect = pool.connect
+
+        def timed_connect():
+            with self.lock:
+                self.waiting += 1
+            start = time.perf_counter()
+            try:
+                return connect()
+            except Exception as error:
+                if type(error).__name__ == "TimeoutError":
+                    with self.lock:
+                        self.timeouts += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    self.waiting -= 1
+                    self.histogram.observe(elapsed)
+
+        pool.connect = timed_connect
+
+request_metrics = RequestMetrics()
+pool_waits = {}  # Nombre del motor -> (motor, PoolWaits)
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide cada petición HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+        start = time.perf_counter()
+        request_metrics.in_progress += 1
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_metrics.in_progress -= 1
+            route = scope.get("route")
+            request_metrics.observe(
+                scope["method"],
+                getattr(route, "path", None) or UNMATCHED,
+                status,
+                time.perf_counter() - start,
+            )
+
+def instrument_engine(name: str, engine):
+    """Medir la espera del pool de un motor (sync o el sync_engine de un motor async)"""
+    waits = PoolWaits()
+    waits.instrument(engine.pool)
+    pool_waits[name] = (engine, waits)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _header(lines: list, name: str, kind: str, help: str):
+    lines.append(f"# HELP {name} {help}")
+    lines.append(f"# TYPE {name} {kind}")
+
+def render(cache_stats: dict = None, startup: dict = None) -> str:
+    """Todas las métricas en formato de texto de Prometheus (llamar desde el event loop)"""
+    lines = []
+
+    _header(lines, "http_requests_total", "counter", "Peticiones HTTP por método, ruta y estado")
+    for (method, route, status), count in sorted(request_metrics.requests.items()):
+        lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+    _header(lines, "http_request_duration_seconds", "histogram", "Latencia de las peticiones HTTP")
+    for (method, route), histogram in sorted(request_metrics.latency.items()):
+        lines += histogram.lines("http_request_duration_seconds", f'method="{method}",route="{_escape(route)}"')
+
+    _header(lines, "http_requests_in_progress", "gauge", "Peticiones HTTP en curso")
+    lines.append(f"http_requests_in_progress {request_metrics.in_progress}")
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    _header(lines, "threadpool_threads_total", "gauge", "Hilos disponibles para las rutas síncronas")
+    lines.append(f"threadpool_threads_total {limiter.total_tokens}")
+    _header(lines, "threadpool_threads_busy", "gauge", "Hilos ocupados")
+    lines.append(f"threadpool_threads_busy {limiter.borrowed_tokens}")
+    _header(lines, "threadpool_queue_depth", "gauge", "Tareas esperando un hilo libre")
+    lines.append(f"threadpool_queue_depth {limiter.statistics().tasks_waiting}")
+
+    gauges = (
+        ("db_pool_size", "Conexiones permanentes del pool", lambda pool: pool.size()),
+        ("db_pool_checked_out", "Conexiones en uso", lambda pool: pool.checkedout()),
+        ("db_pool_checked_in", "Conexiones libres en el pool", lambda pool: pool.checkedin()),
+        # overflow() es negativo mientras el pool no está lleno
+        ("db_pool_overflow", "Conexiones por encima del tamaño del pool", lambda pool: max(pool.overflow(), 0)),
+    )
+    for name, help, read in gauges:
+        _header(lines, name, "gauge", help)
+        for engine_name, (engine, _) in pool_waits.items():
+            try:
+                lines.append(f'{name}{{engine="{engine_name}"}} {read(engine.pool)}')
+            except AttributeError:
+                pass  # Pools sin tamaño (p. ej. StaticPool)
+
+    _header(lines, "db_pool_waiting", "gauge", "Hilos esperando una conexión")
+    for engine_name, (_, waits) in pool_waits.items():
+        lines.append(f'db_pool_waiting{{engine="{engine_name}"}} {waits.waiting}')
+    _header(lines, "db_pool_timeouts_total", "counter", "Esperas de conexión que superaron pool_timeout")
+    for engine_name, (_, waits) in pool_waits.items():
+        lines.append(f'db_pool_timeouts_total{{engine="{engine_name}"}} {waits.timeouts}')
+    _header(lines, "db_pool_wait_seconds", "histogram", "Espera para obtener una conexión del pool")
+    for engine_name, (_, waits) in pool_waits.items():
+        with waits.lock:
+            lines += waits.histogram.lines("db_pool_wait_seconds", f'engine="{engine_name}"')
+
+    if cache_stats:
+        for key, name, help in (
+            ("hits", "catalog_cache_hits_total", "Aciertos de la caché del catálogo"),
+            ("misses", "catalog_cache_misses_total", "Fallos de la caché del catálogo"),
+        ):
+            _header(lines, name, "counter", help)
+            for tier in ("local", "shared"):
+                if cache_stats.get(tier):
+                    lines.append(f'{name}{{tier="{tier}"}} {cache_stats[tier][key]}')
+
+    if startup:
+        _header(lines, "app_startup_seconds", "gauge", "Duración de cada paso del arranque del worker")
+        for step, seconds in startup["steps"].items():
+            lines.append(f'app_startup_seconds{{pid="{startup["pid"]}",step="{step}"}} {seconds}')
+
+    return "\n".join(lines) + "\n"
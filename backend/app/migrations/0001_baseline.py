@@ -0,0 +1,48 @@
+"""
+Baseline
+Tablas de los modelos, columnas e índices nuevos en bases creadas antes de las migraciones
+(lo que hacía `python -m app.cli sync-schema`)
+"""
+
+import logging
+
+from sqlalchemy import text
+
+from . import add_missing_columns, create_missing_indexes
+from ..database import Base
+
+logger = logging.getLogger(__name__)
+
+def merge_duplicate_cart_items(conn) -> int:
+    """
+    Unir items repetidos (mismo carrito y producto) sumando sus cantidades
+    Necesario antes de crear el índice único uq_cart_items_cart_id_product_id
+    """
+    duplicates = conn.execute(text("""
+        SELECT cart_id, product_id, MIN(id) AS keep_id, SUM(quantity) AS quantity
+        FROM cart_items
+        GROUP BY cart_id, product_id
+        HAVING COUNT(*) > 1
+    """)).all()
+    for row in duplicates:
+        conn.execute(
+            text("UPDATE cart_items SET quantity = :quantity WHERE id = :keep_id"),
+            {"quantity": row.quantity, "keep_id": row.keep_id}
+        )
+        conn.execute(
+            text("DELETE FROM cart_items WHERE cart_id = :cart_id AND product_id = :product_id AND id <> :keep_id"),
+            {"cart_id": row.cart_id, "product_id": row.product_id, "keep_id": row.keep_id}
+        )
+    return len(duplicates)
+
+def upgrade(conn):
+    Base.metadata.create_all(bind=conn)
+    added = add_missing_columns(conn)
+
+    merged = merge_duplicate_cart_items(conn)
+    if merged:
+        logger.info("Items de carrito duplicados unidos: %s", merged)
+
+    added += create_missing_indexes(conn)
+    for name in added:
+        logger.info("Agregado: %s", name)
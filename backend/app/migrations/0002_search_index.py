@@ -0,0 +1,9 @@
+"""
+Search Index
+Índice de búsqueda de texto completo (FTS5 en SQLite, tsvector en PostgreSQL)
+"""
+
+from ..search import create_search_index
+
+def upgrade(conn):
+    create_search_index(conn)
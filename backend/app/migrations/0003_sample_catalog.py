@@ -0,0 +1,21 @@
+"""
+Sample Catalog
+Catálogo de prueba (app/seed_products.jsonl) en una base sin productos
+SEED_SAMPLE_PRODUCTS=0 lo omite (p. ej. en producción con catálogo propio)
+"""
+
+import os
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Product
+from ..product_import import SEED_FILE, import_file
+
+def upgrade(conn):
+    if os.getenv("SEED_SAMPLE_PRODUCTS", "1") != "1":
+        return
+    if conn.execute(select(Product.id).limit(1)).first() is not None:
+        return
+    with open(SEED_FILE, "rb") as file:
+        import_file(file, "jsonl", session_factory=lambda: Session(bind=conn))
@@ -0,0 +1,12 @@
+"""
+Leaderboards
+Rankings de destacados precalculados (product_leaderboards) si aún no existen
+"""
+
+from sqlalchemy.orm import Session
+
+from ..leaderboards import ensure_built
+
+def upgrade(conn):
+    with Session(bind=conn) as db:
+        ensure_built(db)
@@ -0,0 +1,163 @@
+"""
+Schema Migrations
+Migraciones versionadas del esquema y de los datos iniciales
+
+Cada migración es un módulo NNNN_nombre.py de este paquete con una función
+upgrade(conn); la tabla schema_migrations guarda las versiones aplicadas. Se
+aplican una vez por despliegue con `python -m app.cli migrate` (en desarrollo
+también al arrancar el worker con MIGRATE_ON_STARTUP=1, ver app/startup.py).
+
+Las pendientes se aplican en una sola transacción con un lock de la base
+(BEGIN IMMEDIATE en SQLite, pg_advisory_xact_lock en PostgreSQL): si varios
+procesos migran a la vez, el primero aplica todo y los demás esperan el lock,
+vuelven a leer las versiones y no encuentran nada pendiente.
+
+Reglas para migraciones nuevas:
+- No editar una migración publicada: agregar otra con el número siguiente
+- 0001 crea las tablas con los modelos actuales, así que en una base nueva los
+  cambios de esquema posteriores ya existen: las migraciones deben ser idempotentes
+  (add_missing_columns y create_missing_indexes lo son)
+- Las sesiones de datos usan Session(bind=conn): sus commit no cierran la
+  transacción de la migración
+"""
+
+import importlib
+import logging
+import os
+import pkgutil
+import time
+from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event, inspect, insert, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateColumn
+
+from .. import sqlite_profile
+from ..database import Base
+from ..models import SchemaMigration
+
+logger = logging.getLogger(__name__)
+
+# Segundos máximos esperando a que otro proceso termine de migrar (SQLite)
+MIGRATION_LOCK_TIMEOUT = float(os.getenv("MIGRATION_LOCK_TIMEOUT", "300"))
+# Clave del advisory lock de PostgreSQL (cualquier entero fijo de la aplicación)
+MIGRATION_LOCK_KEY = 7_201_964
+
+@lru_cache(maxsize=None)
+def discover() -> tuple:
+    """Migraciones del paquete ordenadas por versión: ((versión, nombre, módulo), ...)"""
+    migrations = []
+    for module_info in pkgutil.iter_modules(__path__):
+        version, _, _ = module_info.name.partition("_")
+        if not version.isdigit():
+            continue
+        module = importlib.import_module(f"{__name__}.{module_info.name}")
+        migrations.append((int(version), module_info.name, module))
+    migrations.sort(key=lambda migration: migration[0])
+    return tuple(migrations)
+
+def latest_version() -> int:
+    migrations = discover()
+    return migrations[-1][0] if migrations else 0
+
+def applied_versions(conn) -> set:
+    """Versiones ya aplicadas (vacío si la base aún no tiene schema_migrations)"""
+    table = SchemaMigration.__table__
+    if not inspect(conn).has_table(table.name):
+        return set()
+    return set(conn.execute(select(table.c.version)).scalars())
+
+def pending(engine) -> list[str]:
+    """Nombres de las migraciones sin aplicar (solo lectura, sin lock)"""
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    return [name for version, name, _ in discover() if version not in done]
+
+def _begin_immediate(conn):
+    """Tomar el lock de escritura de SQLite, esperando a otro proceso que esté migrando"""
+    deadline = time.monotonic() + MIGRATION_LOCK_TIMEOUT
+    while True:
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            return
+        except OperationalError as error:
+            if "locked" not in str(error.orig) or time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+def _migration_engine(engine):
+    """
+    Motor para la transacción de migración
+    En SQLite es un motor aparte (sin pool) cuyas transacciones empiezan con
+    BEGIN IMMEDIATE: el lock de escritura se toma antes de leer las versiones
+    """
+    if engine.dialect.name != "sqlite":
+        return engine
+
+    migration_engine = create_engine(engine.url, poolclass=NullPool, connect_args={"check_same_thread": False})
+    sqlite_profile.configure(migration_engine)
+
+    @event.listens_for(migration_engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        # El BEGIN lo emite el evento "begin", no el driver
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(migration_engine, "begin")
+    def begin(conn):
+        _begin_immediate(conn)
+
+    return migration_engine
+
+def migrate(engine) -> list[str]:
+    """Aplicar las migraciones pendientes con el lock de migración; devuelve sus nombres"""
+    # Camino rápido: una lectura cuando la base ya está al día
+    if not pending(engine):
+        return []
+
+    migration_engine = _migration_engine(engine)
+    applied = []
+    try:
+        with migration_engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            # Con el lock tomado: otro proceso pudo haber migrado mientras esperábamos
+            done = applied_versions(conn)
+            for version, name, module in discover():
+                if version in done:
+                    continue
+                start = time.perf_counter()
+                module.upgrade(conn)
+                conn.execute(insert(SchemaMigration.__table__).values(version=version, name=name, applied_at=datetime.utcnow()))
+                logger.info("Migración %s aplicada en %.2fs", name, time.perf_counter() - start)
+                applied.append(name)
+    finally:
+        if migration_engine is not engine:
+            migration_engine.dispose()
+    return applied
+
+def add_missing_columns(conn) -> list[str]:
+    """Agregar a las tablas existentes las columnas de los modelos que les falten"""
+    inspector = inspect(conn)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+def create_missing_indexes(conn) -> list[str]:
+    """Crear los índices de los modelos que aún no existan"""
+    inspector = inspect(conn)
+    added = []
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=conn)
+                added.append(index.name)
+    return added
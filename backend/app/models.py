@@ -3,7 +3,7 @@ Database Models
 Define la estructura de las tablas en la base de datos
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -14,6 +14,7 @@ class Product(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
+    sku = Column(String, nullable=True)  # Código del producto (opcional), clave de la carga masiva
     description = Column(String)
     price = Column(Float)
     category = Column(String)
@@ -24,9 +25,39 @@ class Product(Base):
     is_featured = Column(Boolean, default=False)  # Marcado como destacado
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    # Agregados de reseñas, mantenidos en la misma transacción que cada reseña
+    review_count = Column(Integer, default=0, nullable=False, server_default="0")
+    rating_sum = Column(Integer, default=0, nullable=False, server_default="0")
+    rating_count_1 = Column(Integer, default=0, nullable=False, server_default="0")
+    rating_count_2 = Column(Integer, default=0, nullable=False, server_default="0")
+    rating_count_3 = Column(Integer, default=0, nullable=False, server_default="0")
+    rating_count_4 = Column(Integer, default=0, nullable=False, server_default="0")
+    rating_count_5 = Column(Integer, default=0, nullable=False, server_default="0")
+    
+    # Unidades apartadas por reservas vigentes (stock disponible = stock - reserved_stock)
+    reserved_stock = Column(Integer, default=0, nullable=False, server_default="0")
+    
     # Relaciones
-    cart_items = relationship("CartItem", back_populates="product")
-    order_items = relationship("OrderItem", back_populates="product")
+    # passive_deletes="all": al eliminar un producto el ORM no pone product_id en NULL
+    # en los items; la clave foránea rechaza el borrado (409 en DELETE /api/products)
+    cart_items = relationship("CartItem", back_populates="product", passive_deletes="all")
+    order_items = relationship("OrderItem", back_populates="product", passive_deletes="all")
+    
+    # Índices compuestos para la paginación por cursor
+    __table_args__ = (
+        Index("ix_products_category_id", "category", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_category_created_at_id", "category", "created_at", "id"),
+        # Índices para los rankings de destacados
+        Index("ix_products_rating_id", "rating", "id"),
+        Index("ix_products_sales_count_id", "sales_count", "id"),
+        Index("ix_products_is_featured_id", "is_featured", "id"),
+        Index("ix_products_category_rating_id", "category", "rating", "id"),
+        Index("ix_products_category_sales_count_id", "category", "sales_count", "id"),
+        Index("ix_products_category_is_featured_id", "category", "is_featured", "id"),
+        # Un SKU identifica a un solo producto (los productos sin SKU no cuentan)
+        Index("uq_products_sku", "sku", unique=True),
+    )
 
 class Cart(Base):
     """Modelo para carritos de compra"""
@@ -35,7 +66,8 @@ class Cart(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, unique=True, index=True)  # ID del usuario/sesión
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Índice para purgar carritos abandonados
+    version = Column(Integer, default=0, nullable=False, server_default="0")  # Control de concurrencia optimista
     
     # Relaciones
     items = relationship("CartItem", back_populates="cart", cascade="all, delete-orphan")
@@ -52,6 +84,29 @@ class CartItem(Base):
     # Relaciones
     cart = relationship("Cart", back_populates="items")
     product = relationship("Product", back_populates="cart_items")
+    
+    # Un producto aparece una sola vez por carrito (permite INSERT ... ON CONFLICT)
+    __table_args__ = (
+        Index("uq_cart_items_cart_id_product_id", "cart_id", "product_id", unique=True),
+    )
+
+class StockHold(Base):
+    """Reserva temporal de stock de un producto para el carrito de un usuario"""
+    __tablename__ = "stock_holds"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        # Una reserva por usuario y producto (permite upserts)
+        Index("uq_stock_holds_user_id_product_id", "user_id", "product_id", unique=True),
+        # Reservas vencidas de un producto y reservas vencidas en general (barrido)
+        Index("ix_stock_holds_product_id_expires_at", "product_id", "expires_at"),
+        Index("ix_stock_holds_expires_at", "expires_at"),
+    )
 
 class Order(Base):
     """Modelo para órdenes de compra"""
@@ -66,13 +121,19 @@ class Order(Base):
     
     # Relaciones
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
+    
+    # Índices para el historial por usuario y el listado por estado (paginación por cursor)
+    __table_args__ = (
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_status_created_at_id", "status", "created_at", "id"),
+    )
 
 class OrderItem(Base):
     """Modelo para items en una orden"""
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer)
     price = Column(Float)  # Precio al momento de la compra
@@ -94,6 +155,12 @@ class Review(Base):
     
     # Relaciones
     product = relationship("Product")
+    
+    # Índices para listar las reseñas de un producto por fecha o por calificación
+    __table_args__ = (
+        Index("ix_reviews_product_id_created_at_id", "product_id", "created_at", "id"),
+        Index("ix_reviews_product_id_rating_created_at_id", "product_id", "rating", "created_at", "id"),
+    )
 
 class ContactMessage(Base):
     """Modelo para mensajes de contacto"""
@@ -105,3 +172,45 @@ class ContactMessage(Base):
     subject = Column(String)
     message = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class CatalogVersion(Base):
+    """Versión de una parte del catálogo (para ETag / Last-Modified)"""
+    __tablename__ = "catalog_versions"
+    
+    key = Column(String, primary_key=True)  # catalog, product:{id}, reviews:{id}
+    version = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class ProductLeaderboard(Base):
+    """Top-N precalculado de productos por criterio y categoría"""
+    __tablename__ = "product_leaderboards"
+    
+    criteria = Column(String, primary_key=True)  # featured, rating, sales
+    category = Column(String, primary_key=True)  # "" = todas las categorías
+    position = Column(Integer, primary_key=True)
+    product_id = Column(Integer)  # Sin FK: es una vista materializada
+    score = Column(Float)
+
+class SalesRollup(Base):
+    """Agregados de ventas por producto, categoría o día, mantenidos con cada orden"""
+    __tablename__ = "sales_rollups"
+    
+    dimension = Column(String, primary_key=True)  # product, category, day
+    key = Column(String, primary_key=True)  # id de producto, categoría o fecha ISO (YYYY-MM-DD)
+    units = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0, nullable=False)
+    order_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Rankings por ingresos dentro de una dimensión
+    __table_args__ = (
+        Index("ix_sales_rollups_dimension_revenue", "dimension", "revenue"),
+    )
+
+class SchemaMigration(Base):
+    """Migraciones aplicadas a la base (ver app/migrations)"""
+    __tablename__ = "schema_migrations"
+    
+    version = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
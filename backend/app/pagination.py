@@ -0,0 +1,63 @@
+"""
+Pagination Helpers
+Cursores opacos para paginación por keyset (sin OFFSET)
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+# Header en el que se devuelve el cursor de la siguiente página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort: str, values: list) -> str:
+    """
+    Codificar la última clave de ordenamiento de una página en un cursor opaco
+    Las fechas se serializan en formato ISO
+    """
+    payload = {
+        "s": sort,
+        "k": [v.isoformat() if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, types: tuple = None) -> list:
+    """
+    Decodificar un cursor generado por encode_cursor
+    Con types (p. ej. (datetime, int)) verifica la cantidad y el tipo de cada
+    clave y convierte las fechas ISO
+    Lanza 400 si el cursor está corrupto, pertenece a otro ordenamiento o no
+    tiene las claves esperadas
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["k"]
+        valid = payload["s"] == sort and isinstance(values, list)
+    except (ValueError, KeyError, TypeError):
+        valid = False
+
+    if not valid or (types is not None and len(values) != len(types)):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if types is None:
+        return values
+
+    keys = []
+    for value, kind in zip(values, types):
+        if kind is datetime:
+            keys.append(parse_cursor_datetime(value))
+        elif isinstance(value, kind) and not isinstance(value, bool):
+            keys.append(value)
+        else:
+            raise HTTPException(status_code=400, detail="Cursor inválido")
+    return keys
+
+def parse_cursor_datetime(value: str) -> datetime:
+    """Convertir una fecha ISO de un cursor; 400 si no es válida"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
@@ -0,0 +1,208 @@
+"""
+Product Import
+Carga masiva de productos desde CSV o JSONL
+
+El archivo se lee como flujo, en bloques de IMPORT_CHUNK_SIZE filas; cada fila se
+valida con ProductCreate y cada bloque se guarda con dos sentencias executemany
+(INSERT de los nuevos, UPDATE de los existentes) y un commit. Los productos se
+identifican por SKU si la fila lo trae, o si no por nombre. Si el bloque falla
+en la base, se reintenta fila por fila y solo se informan las filas que fallan.
+
+Una fila inválida se informa con su número y no detiene la carga. Al final se
+recalculan los rankings y se invalidan las versiones y la caché del catálogo.
+
+Uso:
+    python -m app.cli import-products catalogo.csv
+    curl --data-binary @catalogo.jsonl "http://localhost:8000/api/products/bulk?format=jsonl"
+"""
+
+import csv
+import io
+import json
+import os
+import time
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import leaderboards, versions
+from .cache import catalog_cache
+from .database import SessionLocal
+from .models import Product
+from .schemas import ProductCreate
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))  # Errores detallados en el reporte
+
+FORMATS = ("csv", "jsonl")
+
+# Catálogo de prueba que se carga cuando la BD está vacía
+SEED_FILE = os.path.join(os.path.dirname(__file__), "seed_products.jsonl")
+
+# Campos que en un producto existente mantienen las reseñas y las órdenes
+DERIVED_FIELDS = {"rating", "sales_count"}
+
+def read_rows(lines, format: str):
+    """
+    Recorrer las filas de un archivo CSV (con encabezado) o JSONL
+    Devuelve pares (número de fila, dict) o (número de fila, mensaje de error)
+    """
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            # Las celdas vacías usan el valor por defecto del esquema
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ("", None)}
+        return
+
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, f"JSON inválido: {error}"
+            continue
+        yield number, row if isinstance(row, dict) else "Se esperaba un objeto JSON"
+
+def _format_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+class ImportReport:
+    """Contadores de una carga masiva"""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.updated_ids = []
+        self.start = time.perf_counter()
+
+    def error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        seconds = time.perf_counter() - self.start
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.rows / seconds, 1) if seconds else None,
+        }
+
+def _save_chunk(db: Session, chunk: list, report: ImportReport):
+    """Insertar o actualizar un bloque de filas válidas [(fila, ProductCreate)] y hacer commit"""
+    # Si una clave se repite en el bloque, gana la última fila
+    latest = {}
+    for row, product in chunk:
+        key = ("sku", product.sku) if product.sku else ("name", product.name)
+        latest[key] = (row, product)
+
+    # El nombre solo identifica filas sin sku: una fila con un sku nuevo es un producto
+    # nuevo aunque otro producto tenga el mismo nombre
+    skus = [value for kind, value in latest if kind == "sku"]
+    names = [value for kind, value in latest if kind == "name"]
+    by_sku, by_name = {}, {}
+    for product_id, sku, name in db.execute(
+        select(Product.id, Product.sku, Product.name).where(
+            or_(Product.sku.in_(skus), Product.name.in_(names))
+        ).order_by(Product.id)
+    ):
+        if sku:
+            by_sku[sku] = product_id
+        by_name.setdefault(name, product_id)
+
+    # Pares (fila, valores) de cada sentencia
+    inserts, updates = [], []
+    for (kind, value), (row, product) in latest.items():
+        product_id = by_sku.get(value) if kind == "sku" else by_name.get(value)
+        if product_id is None:
+            inserts.append((row, product.model_dump()))
+        else:
+            values = product.model_dump(exclude_unset=True, exclude=DERIVED_FIELDS)
+            updates.append((row, {"id": product_id, **values}))
+
+    try:
+        if inserts:
+            db.execute(insert(Product), [values for _, values in inserts])
+        if updates:
+            db.execute(update(Product), [values for _, values in updates])
+        db.commit()
+    except Exception:
+        db.rollback()
+        _save_rows(db, inserts, updates, report)
+        return
+
+    report.inserted += len(inserts)
+    report.updated += len(updates)
+    report.updated_ids += [values["id"] for _, values in updates]
+
+def _save_rows(db: Session, inserts: list, updates: list, report: ImportReport):
+    """
+    Guardar fila por fila un bloque cuyo executemany falló
+    Cada fila va en un SAVEPOINT: solo se informan las filas que fallan de verdad
+    """
+    for statement, rows in ((insert(Product), inserts), (update(Product), updates)):
+        for row, values in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(statement, [values])
+            except Exception as error:
+                report.error(row, f"Error de base de datos: {error.__class__.__name__}")
+                continue
+            if rows is inserts:
+                report.inserted += 1
+            else:
+                report.updated += 1
+                report.updated_ids.append(values["id"])
+    db.commit()
+
+def import_products(db: Session, lines, format: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """
+    Importar productos desde un iterable de líneas (archivo abierto en modo texto)
+    Devuelve el reporte: filas, insertados, actualizados, fallidos, errores y filas por segundo
+    """
+    report = ImportReport()
+    chunk = []
+    for row, data in read_rows(lines, format):
+        report.rows += 1
+        if isinstance(data, str):
+            report.error(row, data)
+            continue
+        try:
+            chunk.append((row, ProductCreate.model_validate(data)))
+        except ValidationError as error:
+            report.error(row, _format_error(error))
+            continue
+        if len(chunk) >= chunk_size:
+            _save_chunk(db, chunk, report)
+            chunk = []
+    if chunk:
+        _save_chunk(db, chunk, report)
+
+    if report.inserted or report.updated:
+        leaderboards.rebuild_all(db)
+        versions.bump(db, versions.CATALOG, *[versions.product_key(product_id) for product_id in report.updated_ids])
+        db.commit()
+        catalog_cache.clear()
+
+    return report.as_dict()
+
+def import_file(binary_file, format: str, chunk_size: int = IMPORT_CHUNK_SIZE, session_factory=SessionLocal) -> dict:
+    """Importar productos desde un archivo abierto en modo binario (UTF-8), con su propia sesión"""
+    lines = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    db = session_factory()
+    try:
+        return import_products(db, lines, format, chunk_size)
+    finally:
+        lines.detach()
+        db.close()
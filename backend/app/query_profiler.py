@@ -0,0 +1,164 @@
+"""
+Query Profiler
+Cuenta las consultas SQL de cada petición y detecta patrones N+1 (opcional)
+
+Con QUERY_PROFILER=1 cada respuesta incluye:
+- X-DB-Query-Count: sentencias ejecutadas (un executemany cuenta como una)
+- X-DB-Query-Time-Ms: tiempo total en la BD
+- X-DB-Repeated-Queries: sentencias que se repitieron QUERY_PROFILER_REPEAT_THRESHOLD
+  veces o más (el síntoma de un N+1: la misma consulta por cada elemento)
+- Server-Timing: el mismo tiempo, visible en las herramientas del navegador
+
+Las sentencias repetidas también se registran como warning con la ruta. Dos
+consultas se consideran la misma si coinciden sin contar los valores (parámetros,
+literales y el largo de las listas IN).
+
+Para las pruebas, `assert_max_queries` cuenta las consultas de un bloque sin
+necesidad de la variable de entorno:
+
+    with assert_max_queries(2):
+        client.get("/api/cart/usuario-1")
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+QUERY_PROFILER_ENABLED = os.getenv("QUERY_PROFILER", "0") == "1"
+QUERY_PROFILER_REPEAT_THRESHOLD = int(os.getenv("QUERY_PROFILER_REPEAT_THRESHOLD", "3"))
+
+# Listas de parámetros ("?, ?, ?" o "%(id_1)s, %(id_2)s") y literales de texto o números
+_PARAMETER = r"(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)"
+_PARAMETER_LIST = re.compile(rf"{_PARAMETER}(?:\s*,\s*{_PARAMETER})*")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+def fingerprint(statement: str) -> str:
+    """Sentencia sin valores: las consultas que solo cambian de parámetros son iguales"""
+    # Parámetros antes que literales ($1 de asyncpg) y de nuevo después (listas IN de literales)
+    statement = _PARAMETER_LIST.sub("?", statement)
+    statement = _PARAMETER_LIST.sub("?", _LITERAL.sub("?", statement))
+    return _SPACES.sub(" ", statement).strip()
+
+class QueryLog:
+    """Consultas registradas durante una petición o un bloque de assert_max_queries"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement: str, seconds: float):
+        key = fingerprint(statement)
+        with self.lock:
+            self.count += 1
+            self.seconds += seconds
+            self.fingerprints[key] += 1
+
+    def repeated(self, threshold: int = QUERY_PROFILER_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+        """Sentencias ejecutadas `threshold` veces o más, las más repetidas primero"""
+        return [(key, count) for key, count in self.fingerprints.most_common() if count >= threshold]
+
+    def report(self) -> str:
+        lines = [f"{self.count} consultas en {self.seconds * 1000:.1f} ms"]
+        for key, count in self.fingerprints.most_common():
+            lines.append(f"  {count}x {key}")
+        return "\n".join(lines)
+
+# Registro de la petición en curso (las rutas síncronas lo heredan en su hilo del threadpool)
+_current: ContextVar = ContextVar("query_log", default=None)
+# Registros de assert_max_queries activos: reciben las consultas de todos los hilos
+_collectors: list[QueryLog] = []
+_instrumented = set()
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_profiler_start", []).append(time.perf_counter())
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_profiler_start"].pop()
+    log = _current.get()
+    if log is not None:
+        log.record(statement, elapsed)
+    for collector in _collectors:
+        collector.record(statement, elapsed)
+
+def instrument(engine):
+    """Registrar los eventos del perfilador en un motor (sync o el sync_engine de uno async)"""
+    if engine in _instrumented:
+        return
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    _instrumented.add(engine)
+
+class QueryProfilerMiddleware:
+    """Middleware ASGI que agrega el resumen de consultas a cada respuesta HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        log = QueryLog()
+        token = _current.set(log)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                milliseconds = log.seconds * 1000
+                repeated = log.repeated()
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-query-count", str(log.count).encode()),
+                    (b"x-db-query-time-ms", f"{milliseconds:.2f}".encode()),
+                    (b"x-db-repeated-queries", str(len(repeated)).encode()),
+                    (b"server-timing", f'db;dur={milliseconds:.2f};desc="{log.count} queries"'.encode()),
+                ]
+                route = getattr(scope.get("route"), "path", scope["path"])
+                for key, count in repeated:
+                    logger.warning("Posible N+1 en %s %s: %sx %s", scope["method"], route, count, key)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+
+@contextmanager
+def count_queries(*engines):
+    """
+    Registrar las consultas ejecutadas dentro del bloque (en cualquier hilo)
+    Sin motores se usan los de la app (app.database)
+    """
+    if not engines:
+        from .database import async_engine, engine
+        engines = (engine,) if async_engine is None else (engine, async_engine.sync_engine)
+    for engine in engines:
+        instrument(engine)
+
+    log = QueryLog()
+    _collectors.append(log)
+    try:
+        yield log
+    finally:
+        _collectors.remove(log)
+
+@contextmanager
+def assert_max_queries(max_queries: int, *engines):
+    """
+    Fallar (AssertionError) si el bloque ejecuta más de `max_queries` consultas
+    El mensaje lista cada sentencia con sus repeticiones, así un N+1 se ve de inmediato
+    """
+    with count_queries(*engines) as log:
+        yield log
+    if log.count > max_queries:
+        raise AssertionError(f"Se esperaban como máximo {max_queries} consultas y hubo {log.report()}")
@@ -0,0 +1,95 @@
+"""
+Product Ratings
+Agregados de calificaciones por producto (cantidad, suma e histograma)
+
+Cada reseña creada o eliminada ajusta los contadores del producto con un único
+UPDATE atómico, en la misma transacción que la reseña. El promedio se calcula
+en esa misma sentencia, sin recorrer las reseñas del producto.
+"""
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from .models import Product, Review
+
+# Calificación que se muestra mientras un producto no tiene reseñas
+DEFAULT_RATING = 4.5
+
+STARS = (1, 2, 3, 4, 5)
+
+def _histogram_column(rating: int):
+    return getattr(Product, f"rating_count_{rating}")
+
+def _apply(db: Session, product_id: int, rating: int, delta: int):
+    count = Product.review_count + delta
+    total = Product.rating_sum + delta * rating
+    bucket = _histogram_column(rating)
+
+    db.query(Product).filter(Product.id == product_id).update({
+        Product.review_count: count,
+        Product.rating_sum: total,
+        bucket: bucket + delta,
+        Product.rating: case(
+            (count > 0, total * 1.0 / count),
+            else_=DEFAULT_RATING
+        ),
+    }, synchronize_session=False)
+
+def add_rating(db: Session, product: Product, rating: int):
+    """Registrar una nueva calificación en los agregados del producto"""
+    _apply(db, product.id, rating, 1)
+    db.expire(product)
+
+def remove_rating(db: Session, product: Product, rating: int):
+    """Descontar una calificación eliminada de los agregados del producto"""
+    _apply(db, product.id, rating, -1)
+    db.expire(product)
+
+def distribution(product: Product) -> dict:
+    """Cantidad de reseñas por calificación (1 a 5)"""
+    return {str(stars): getattr(product, f"rating_count_{stars}") for stars in STARS}
+
+def summary(product: Product) -> dict:
+    """Resumen de calificaciones de un producto"""
+    return {
+        "product_id": product.id,
+        "review_count": product.review_count,
+        "average": product.rating_sum / product.review_count if product.review_count else None,
+        "distribution": distribution(product),
+    }
+
+def backfill(db: Session) -> int:
+    """
+    Recalcular los agregados de todos los productos a partir de las reseñas
+    Se usa una sola vez, al incorporar los contadores a una base existente
+    Devuelve la cantidad de productos actualizados
+    """
+    aggregates = {
+        row.product_id: row
+        for row in db.query(
+            Review.product_id,
+            func.count(Review.id).label("review_count"),
+            func.sum(Review.rating).label("rating_sum"),
+            *[
+                func.sum(case((Review.rating == stars, 1), else_=0)).label(f"rating_count_{stars}")
+                for stars in STARS
+            ]
+        ).group_by(Review.product_id)
+    }
+
+    updates = []
+    for product_id, rating in db.query(Product.id, Product.rating):
+        row = aggregates.get(product_id)
+        values = {"id": product_id, "review_count": 0, "rating_sum": 0, "rating": rating}
+        values.update({f"rating_count_{stars}": 0 for stars in STARS})
+        if row is not None:
+            values["review_count"] = row.review_count
+            values["rating_sum"] = row.rating_sum
+            values["rating"] = row.rating_sum / row.review_count
+            values.update({f"rating_count_{stars}": getattr(row, f"rating_count_{stars}") for stars in STARS})
+        updates.append(values)
+
+    if updates:
+        db.bulk_update_mappings(Product, updates)
+    db.commit()
+    return len(updates)
@@ -0,0 +1,166 @@
+"""
+Stock Reservations
+Reservas temporales de stock para los productos de cada carrito
+
+Agregar un producto al carrito aparta esas unidades durante RESERVATION_TTL_MINUTES
+minutos; cada cambio del carrito renueva el plazo. El stock disponible es
+stock - reserved_stock, un contador del producto que se ajusta con un UPDATE
+condicional en la misma transacción que la reserva (igual que los agregados de
+reseñas), así consultar la disponibilidad es leer una fila, sin sumar reservas.
+
+Las reservas vencidas se liberan en lotes cada RESERVATION_SWEEP_INTERVAL
+segundos, o con `python -m app.cli sweep-holds`.
+"""
+
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, dialect_insert
+from .models import Product, StockHold
+from .tasks import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Configuración desde variables de entorno
+RESERVATION_TTL_MINUTES = float(os.getenv("RESERVATION_TTL_MINUTES", "15"))
+RESERVATION_SWEEP_INTERVAL = float(os.getenv("RESERVATION_SWEEP_INTERVAL", "30"))
+RESERVATION_SWEEP_BATCH = int(os.getenv("RESERVATION_SWEEP_BATCH", "1000"))
+
+def _adjust_reserved(db: Session, product_id: int, delta: int, check: bool = False) -> bool:
+    """Sumar delta a reserved_stock; con check, solo si quedan delta unidades disponibles"""
+    stmt = update(Product).where(Product.id == product_id)
+    if check:
+        stmt = stmt.where(Product.stock - Product.reserved_stock >= delta)
+    stmt = stmt.values(reserved_stock=Product.reserved_stock + delta).returning(Product.id)
+    return db.execute(stmt).first() is not None
+
+def _release_rows(db: Session, rows):
+    """Descontar de reserved_stock las reservas borradas (filas product_id, quantity)"""
+    released = defaultdict(int)
+    for row in rows:
+        released[row.product_id] += row.quantity
+    # Orden fijo por producto para que transacciones concurrentes bloqueen en el mismo orden
+    for product_id in sorted(released):
+        _adjust_reserved(db, product_id, -released[product_id])
+    return sum(released.values())
+
+def sweep_product(db: Session, product_id: int) -> int:
+    """Liberar las reservas vencidas de un producto (sin commit)"""
+    rows = db.execute(
+        delete(StockHold).where(
+            StockHold.product_id == product_id,
+            StockHold.expires_at < datetime.utcnow()
+        ).returning(StockHold.product_id, StockHold.quantity)
+    ).all()
+    return _release_rows(db, rows)
+
+def hold(db: Session, user_id: str, product_id: int, quantity: int) -> bool:
+    """
+    Fijar en `quantity` las unidades que el usuario tiene reservadas de un producto (sin commit)
+    Devuelve False si no hay stock disponible para el aumento; el llamador hace rollback
+    """
+    if quantity <= 0:
+        release(db, user_id, product_id)
+        return True
+
+    # Crear o renovar la reserva primero: bloquea la fila y devuelve la cantidad actual
+    expires_at = datetime.utcnow() + timedelta(minutes=RESERVATION_TTL_MINUTES)
+    insert = dialect_insert(db)
+    stmt = insert(StockHold).values(user_id=user_id, product_id=product_id, quantity=0, expires_at=expires_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StockHold.user_id, StockHold.product_id],
+        set_={"expires_at": expires_at}
+    ).returning(StockHold.quantity)
+    current = db.execute(stmt).scalar_one()
+
+    delta = quantity - current
+    if delta > 0 and not _adjust_reserved(db, product_id, delta, check=True):
+        # Puede haber reservas vencidas aún sin barrer: liberarlas y reintentar una vez
+        if not sweep_product(db, product_id) or not _adjust_reserved(db, product_id, delta, check=True):
+            return False
+    elif delta < 0:
+        _adjust_reserved(db, product_id, delta)
+
+    db.execute(
+        update(StockHold).where(
+            StockHold.user_id == user_id,
+            StockHold.product_id == product_id
+        ).values(quantity=quantity)
+    )
+    return True
+
+def release(db: Session, user_id: str, product_id: int = None) -> int:
+    """
+    Liberar las reservas de un usuario (de un producto o de todos) sin commit
+    Devuelve la cantidad de unidades liberadas
+    """
+    stmt = delete(StockHold).where(StockHold.user_id == user_id)
+    if product_id is not None:
+        stmt = stmt.where(StockHold.product_id == product_id)
+    rows = db.execute(stmt.returning(StockHold.product_id, StockHold.quantity)).all()
+    return _release_rows(db, rows)
+
+def available(db: Session, product_id: int):
+    """Stock, reservas y disponibilidad de un producto (una lectura por clave primaria)"""
+    return db.execute(
+        select(
+            Product.id.label("product_id"),
+            Product.stock,
+            Product.reserved_stock.label("reserved"),
+            (Product.stock - Product.reserved_stock).label("available"),
+        ).where(Product.id == product_id)
+    ).first()
+
+def sweep_batch(db: Session, batch_size: int = RESERVATION_SWEEP_BATCH) -> int:
+    """Liberar hasta batch_size reservas vencidas y hacer commit; devuelve cuántas se liberaron"""
+    stmt = select(StockHold.id).where(
+        StockHold.expires_at < datetime.utcnow()
+    ).order_by(StockHold.expires_at).limit(batch_size)
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = stmt.with_for_update(skip_locked=True)
+    hold_ids = db.execute(stmt).scalars().all()
+    if not hold_ids:
+        db.rollback()
+        return 0
+
+    rows = db.execute(
+        delete(StockHold).where(
+            StockHold.id.in_(hold_ids),
+            StockHold.expires_at < datetime.utcnow()
+        ).returning(StockHold.product_id, StockHold.quantity)
+    ).all()
+    _release_rows(db, rows)
+    db.commit()
+    return len(rows)
+
+def sweep_expired(batch_size: int = RESERVATION_SWEEP_BATCH, session_factory=SessionLocal) -> dict:
+    """Liberar todas las reservas vencidas, lote por lote"""
+    start = time.perf_counter()
+    report = {"holds": 0, "batches": 0}
+
+    db = session_factory()
+    try:
+        while True:
+            released = sweep_batch(db, batch_size)
+            if not released:
+                break
+            report["holds"] += released
+            report["batches"] += 1
+    finally:
+        db.close()
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+def _sweep_in_background():
+    report = sweep_expired()
+    if report["holds"]:
+        logger.info("Reservas vencidas liberadas: %s", report)
+
+reservation_sweeper = PeriodicTask("reservation-sweep", _sweep_in_background, RESERVATION_SWEEP_INTERVAL)
@@ -0,0 +1,47 @@
+"""
+Analytics Routes
+Reportes de ventas para el panel de administración
+
+Se leen de los agregados precalculados (tabla sales_rollups), sin recorrer
+las órdenes.
+"""
+
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from .. import sales
+from ..database import get_db
+from ..schemas import SalesRollupResponse, SalesTotals
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+@router.get("/sales", response_model=list[SalesRollupResponse])
+def get_top_sales(
+    dimension: str = "product",  # product, category
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Productos o categorías con más ingresos (solo admin)"""
+    if dimension not in ("product", "category"):
+        raise HTTPException(status_code=400, detail="Dimensión inválida. Use: product o category")
+    
+    return sales.top(db, dimension, limit)
+
+@router.get("/sales/daily", response_model=list[SalesRollupResponse])
+def get_daily_sales(
+    date_from: date = None,
+    date_to: date = None,
+    db: Session = Depends(get_db)
+):
+    """Ventas por día en un rango de fechas, inclusive (solo admin)"""
+    return sales.daily(db, date_from, date_to)
+
+@router.get("/sales/totals", response_model=SalesTotals)
+def get_sales_totals(
+    date_from: date = None,
+    date_to: date = None,
+    db: Session = Depends(get_db)
+):
+    """Unidades, ingresos y órdenes de un rango de fechas (solo admin)"""
+    return sales.totals(db, date_from, date_to)
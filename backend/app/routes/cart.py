@@ -1,42 +1,47 @@
 """
 Cart Routes
 Rutas para gestionar el carrito de compras
+
+El almacenamiento (BD o clave-valor con persistencia diferida) se elige con
+CART_STORE; ver app/cart_store.py.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from ..cart_store import CartConflict, cart_store
 from ..database import get_db
-from ..models import Cart, CartItem, Product
-from ..schemas import CartItemCreate, CartItemUpdate, CartResponse
+from ..schemas import CartItemCreate, CartItemUpdate, CartOperation, CartPatch, CartResponse
 
 router = APIRouter(prefix="/api/cart", tags=["cart"])
 
-def get_or_create_cart(user_id: str, db: Session):
-    """Obtener o crear un carrito para un usuario"""
-    cart = db.query(Cart).filter(Cart.user_id == user_id).first()
-    
-    if not cart:
-        cart = Cart(user_id=user_id)
-        db.add(cart)
-        db.commit()
-        db.refresh(cart)
-    
-    return cart
-
 @router.get("/{user_id}", response_model=CartResponse)
 def get_cart(user_id: str, db: Session = Depends(get_db)):
-    """Obtener el carrito de un usuario"""
-    cart = get_or_create_cart(user_id, db)
-    
-    # Calcular total
-    total_price = sum(item.product.price * item.quantity for item in cart.items)
-    
-    return {
-        "id": cart.id,
-        "user_id": cart.user_id,
-        "items": cart.items,
-        "total_price": total_price
-    }
+    """
+    Obtener el carrito de un usuario
+    No escribe nada: si el usuario no tiene carrito se devuelve uno vacío (virtual)
+    """
+    return cart_store.read(db, user_id)
+
+@router.patch("/{user_id}", response_model=CartResponse, responses={409: {"description": "Versión desactualizada"}})
+def patch_cart(user_id: str, patch: CartPatch, db: Session = Depends(get_db)):
+    """
+    Aplicar varias operaciones al carrito en una sola transacción
+    - add: sumar quantity al producto (lo agrega si no está)
+    - update: fijar la cantidad del producto (0 o menos lo quita)
+    - remove: quitar el producto
+    
+    Si version no coincide con la del carrito, responde 409 con el carrito actual
+    Si una operación falla, no se aplica ninguna
+    """
+    try:
+        return cart_store.apply(db, user_id, patch.operations, expected_version=patch.version)
+    except CartConflict as conflict:
+        current = CartResponse.model_validate(conflict.cart)
+        return JSONResponse(status_code=409, content={
+            "detail": "El carrito cambió, vuelve a intentarlo con la versión actual",
+            "cart": current.model_dump(mode="json")
+        })
 
 @router.post("/{user_id}/items", response_model=CartResponse)
 def add_to_cart(
@@ -44,50 +49,9 @@ def add_to_cart(
     item: CartItemCreate,
     db: Session = Depends(get_db)
 ):
-    """Agregar un producto al carrito"""
-    
-    # Verificar que el producto existe
-    product = db.query(Product).filter(Product.id == item.product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    
-    # Verificar stock
-    if product.stock < item.quantity:
-        raise HTTPException(status_code=400, detail="Stock insuficiente")
-    
-    # Obtener o crear carrito
-    cart = get_or_create_cart(user_id, db)
-    
-    # Verificar si el producto ya está en el carrito
-    cart_item = db.query(CartItem).filter(
-        CartItem.cart_id == cart.id,
-        CartItem.product_id == item.product_id
-    ).first()
-    
-    if cart_item:
-        # Si ya existe, sumar cantidad
-        cart_item.quantity += item.quantity
-    else:
-        # Si no existe, crear nuevo
-        cart_item = CartItem(
-            cart_id=cart.id,
-            product_id=item.product_id,
-            quantity=item.quantity
-        )
-        db.add(cart_item)
-    
-    db.commit()
-    db.refresh(cart)
-    
-    # Calcular total
-    total_price = sum(i.product.price * i.quantity for i in cart.items)
-    
-    return {
-        "id": cart.id,
-        "user_id": cart.user_id,
-        "items": cart.items,
-        "total_price": total_price
-    }
+    """Agregar un producto al carrito (crea el carrito si aún no existe)"""
+    operation = CartOperation(op="add", product_id=item.product_id, quantity=item.quantity)
+    return cart_store.apply(db, user_id, [operation], numbered=False)
 
 @router.put("/{user_id}/items/{item_id}", response_model=CartResponse)
 def update_cart_item(
@@ -97,35 +61,7 @@ def update_cart_item(
     db: Session = Depends(get_db)
 ):
     """Actualizar la cantidad de un producto en el carrito"""
-    
-    cart = get_or_create_cart(user_id, db)
-    
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == item_id,
-        CartItem.cart_id == cart.id
-    ).first()
-    
-    if not cart_item:
-        raise HTTPException(status_code=404, detail="Item no encontrado en el carrito")
-    
-    if update.quantity <= 0:
-        # Si la cantidad es 0 o negativa, eliminar el item
-        db.delete(cart_item)
-    else:
-        cart_item.quantity = update.quantity
-    
-    db.commit()
-    db.refresh(cart)
-    
-    # Calcular total
-    total_price = sum(i.product.price * i.quantity for i in cart.items)
-    
-    return {
-        "id": cart.id,
-        "user_id": cart.user_id,
-        "items": cart.items,
-        "total_price": total_price
-    }
+    return cart_store.update_item(db, user_id, item_id, update.quantity)
 
 @router.delete("/{user_id}/items/{item_id}", response_model=CartResponse)
 def remove_from_cart(
@@ -134,39 +70,11 @@ def remove_from_cart(
     db: Session = Depends(get_db)
 ):
     """Eliminar un producto del carrito"""
-    
-    cart = get_or_create_cart(user_id, db)
-    
-    cart_item = db.query(CartItem).filter(
-        CartItem.id == item_id,
-        CartItem.cart_id == cart.id
-    ).first()
-    
-    if not cart_item:
-        raise HTTPException(status_code=404, detail="Item no encontrado en el carrito")
-    
-    db.delete(cart_item)
-    db.commit()
-    db.refresh(cart)
-    
-    # Calcular total
-    total_price = sum(i.product.price * i.quantity for i in cart.items)
-    
-    return {
-        "id": cart.id,
-        "user_id": cart.user_id,
-        "items": cart.items,
-        "total_price": total_price
-    }
+    return cart_store.remove_item(db, user_id, item_id)
 
 @router.delete("/{user_id}/clear")
 def clear_cart(user_id: str, db: Session = Depends(get_db)):
     """Vaciar el carrito"""
-    
-    cart = get_or_create_cart(user_id, db)
-    
-    # Eliminar todos los items
-    db.query(CartItem).filter(CartItem.cart_id == cart.id).delete()
-    db.commit()
+    cart_store.clear(db, user_id)
     
     return {"message": "Carrito vaciado"}
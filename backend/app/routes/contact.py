@@ -4,8 +4,10 @@ Rutas para gestionar mensajes de contacto
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from ..database import get_db
+from ..export import export_response
 from ..models import ContactMessage
 from ..schemas import ContactMessageCreate, ContactMessageResponse
 
@@ -39,6 +41,15 @@ def get_contact_messages(db: Session = Depends(get_db)):
     messages = db.query(ContactMessage).all()
     return messages
 
+@router.get("/export")
+def export_contact_messages(format: str = "ndjson"):
+    """Exportar todos los mensajes de contacto como flujo (ndjson o csv, solo admin)"""
+    stmt = select(
+        ContactMessage.id, ContactMessage.name, ContactMessage.email,
+        ContactMessage.subject, ContactMessage.message, ContactMessage.created_at
+    ).order_by(ContactMessage.id)
+    return export_response(stmt, format, "contact_messages")
+
 @router.get("/{message_id}", response_model=ContactMessageResponse)
 def get_contact_message(message_id: int, db: Session = Depends(get_db)):
     """Obtener un mensaje de contacto por ID"""
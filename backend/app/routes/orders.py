@@ -0,0 +1,237 @@
+"""
+Order Routes
+Rutas para crear y consultar órdenes de compra
+
+El checkout convierte el carrito en una orden en una sola transacción. Primero
+se liberan las reservas del comprador y luego el stock se descuenta con UPDATE
+condicionales (stock - reservado >= cantidad) que la BD evalúa fila por fila,
+así dos checkouts simultáneos nunca venden más de lo que hay ni lo que otros
+carritos tienen reservado. En la misma transacción se actualizan los agregados
+de ventas (ver app/sales.py); cancelar una orden devuelve el stock y los resta.
+"""
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.orm import Session, selectinload
+from .. import leaderboards, reservations, sales, versions
+from ..cache import catalog_cache
+from ..cart_store import cart_store, item_error
+from ..database import get_db
+from ..models import Order, OrderItem, Product
+from ..pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from ..schemas import OrderResponse, OrderStatusUpdate
+
+router = APIRouter(prefix="/api/orders", tags=["orders"])
+
+ORDER_STATUSES = ("pending", "completed", "cancelled")
+
+# Cambios de estado permitidos
+TRANSITIONS = {
+    "pending": ("completed", "cancelled"),
+    "completed": ("cancelled",),
+}
+
+def with_items(query):
+    """Cargar items y productos con un SELECT ... IN por relación (3 consultas en total)"""
+    return query.options(selectinload(Order.items).selectinload(OrderItem.product))
+
+def paginate(query, response: Response, cursor: str, limit: int) -> list:
+    """Página de órdenes, más recientes primero, por keyset (created_at, id)"""
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+    if cursor:
+        last_created_at, last_id = decode_cursor(cursor, "newest", (datetime, int))
+        query = query.filter(
+            tuple_(Order.created_at, Order.id) < tuple_(last_created_at, last_id)
+        )
+    
+    # Pedir una orden extra para saber si existe una página siguiente
+    orders = with_items(query).limit(limit + 1).all()
+    
+    if len(orders) > limit:
+        orders = orders[:limit]
+        last = orders[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor("newest", [last.created_at, last.id])
+    
+    return orders
+
+def validate_status(status: str):
+    if status is not None and status not in ORDER_STATUSES:
+        raise HTTPException(status_code=400, detail="Estado inválido. Use: pending, completed o cancelled")
+
+def decrement_stock(db: Session, product_id: int, quantity: int):
+    """
+    Descontar stock y sumar ventas en una sola sentencia, solo si alcanza el stock no reservado
+    Devuelve el precio actual del producto, o None si no hay stock suficiente
+    """
+    stmt = update(Product).where(
+        Product.id == product_id,
+        Product.stock - Product.reserved_stock >= quantity
+    ).values(
+        stock=Product.stock - quantity,
+        sales_count=Product.sales_count + quantity
+    ).returning(Product.price)
+    return db.execute(stmt).scalar()
+
+def restock(db: Session, product_id: int, quantity: int):
+    """Devolver stock y descontar ventas de una línea cancelada"""
+    db.execute(
+        update(Product).where(Product.id == product_id).values(
+            stock=Product.stock + quantity,
+            sales_count=Product.sales_count - quantity
+        )
+    )
+
+def sales_changed(db: Session, product_ids: list):
+    """Rankings de ventas y versiones del catálogo tras cambiar las ventas (sin commit)"""
+    products = db.query(Product).filter(Product.id.in_(product_ids)).all()
+    leaderboards.on_products_change(db, products, criteria=("sales",))
+    versions.bump(db, versions.CATALOG, *[versions.product_key(product_id) for product_id in product_ids])
+
+@router.post("/checkout/{user_id}", response_model=OrderResponse, status_code=201)
+def checkout(user_id: str, db: Session = Depends(get_db)):
+    """
+    Convertir el carrito en una orden (estado pending)
+    Si algún producto no tiene stock suficiente no se crea la orden ni se toca el stock
+    Si el carrito cambia durante el checkout responde 409
+    """
+    cart = cart_store.read(db, user_id)
+    if not cart["items"]:
+        raise HTTPException(status_code=400, detail="El carrito está vacío")
+    
+    # Orden fijo por producto para que checkouts concurrentes bloqueen filas en el mismo orden
+    lines = sorted(cart["items"], key=lambda item: item["product_id"])
+    order = Order(user_id=user_id, status="pending", total_price=0)
+    items = []
+    for line in lines:
+        # La reserva del comprador pasa a ser la venta
+        reservations.release(db, user_id, line["product_id"])
+        price = decrement_stock(db, line["product_id"], line["quantity"])
+        if price is None:
+            db.rollback()
+            raise item_error(db, line["product_id"], prefix=f"{line['product']['name']}: ")
+        items.append({"product_id": line["product_id"], "quantity": line["quantity"], "price": price})
+        order.total_price += price * line["quantity"]
+    db.add(order)
+    db.flush()
+    # Las líneas se insertan en una sola sentencia (executemany), sin objetos ORM
+    db.execute(insert(OrderItem), [{"order_id": order.id, **item} for item in items])
+    sales.record_order(db, order, items=items)
+    
+    product_ids = [line["product_id"] for line in lines]
+    sales_changed(db, product_ids)
+    
+    undo_empty = cart_store.empty_for_order(db, user_id, cart["version"])
+    if undo_empty is None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="El carrito cambió durante el checkout, vuelve a intentarlo")
+    
+    try:
+        db.commit()
+    except Exception:
+        # Sin orden el comprador conserva su carrito (en CART_STORE=memory/redis no es parte de la transacción)
+        db.rollback()
+        undo_empty()
+        raise
+    for product_id in product_ids:
+        catalog_cache.invalidate_product(product_id)
+    
+    return with_items(db.query(Order)).filter(Order.id == order.id).one()
+
+@router.get("/", response_model=list[OrderResponse])
+def list_orders(
+    response: Response,
+    status: str = None,
+    cursor: str = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Listar las órdenes de todos los usuarios (solo admin)
+    Parámetros opcionales:
+    - status: Filtrar por estado (pending, completed, cancelled); usa el índice (status, created_at, id)
+    - cursor: Cursor opaco devuelto en el header X-Next-Cursor de la página anterior
+    - limit: Órdenes por página (máximo 100)
+    """
+    validate_status(status)
+    query = db.query(Order)
+    if status:
+        query = query.filter(Order.status == status)
+    return paginate(query, response, cursor, limit)
+
+@router.get("/{user_id}", response_model=list[OrderResponse])
+def get_user_orders(
+    user_id: str,
+    response: Response,
+    status: str = None,
+    cursor: str = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Historial de órdenes de un usuario, más recientes primero
+    Parámetros opcionales:
+    - status: Filtrar por estado
+    - cursor: Cursor opaco devuelto en el header X-Next-Cursor de la página anterior
+    - limit: Órdenes por página (máximo 100)
+    
+    Órdenes, items y productos se cargan en 3 consultas sin importar el tamaño de la página
+    """
+    validate_status(status)
+    query = db.query(Order).filter(Order.user_id == user_id)
+    if status:
+        query = query.filter(Order.status == status)
+    return paginate(query, response, cursor, limit)
+
+@router.get("/{user_id}/{order_id}", response_model=OrderResponse)
+def get_user_order(user_id: str, order_id: int, db: Session = Depends(get_db)):
+    """Obtener una orden de un usuario con sus items"""
+    order = with_items(db.query(Order)).filter(
+        Order.id == order_id,
+        Order.user_id == user_id
+    ).first()
+    
+    if not order:
+        raise HTTPException(status_code=404, detail="Orden no encontrada")
+    
+    return order
+
+@router.patch("/{order_id}/status", response_model=OrderResponse)
+def update_order_status(order_id: int, status_update: OrderStatusUpdate, db: Session = Depends(get_db)):
+    """
+    Cambiar el estado de una orden (solo admin)
+    - pending -> completed | cancelled
+    - completed -> cancelled
+    Cancelar devuelve el stock y resta la orden de las ventas y sus agregados
+    """
+    order = with_items(db.query(Order)).filter(Order.id == order_id).first()
+    if not order:
+        raise HTTPException(status_code=404, detail="Orden no encontrada")
+    
+    new_status = status_update.status
+    if new_status not in TRANSITIONS.get(order.status, ()):
+        raise HTTPException(status_code=400, detail=f"No se puede pasar de {order.status} a {new_status}")
+    
+    # Solo cambia si nadie cambió el estado entre medio (evita cancelar dos veces)
+    changed = db.query(Order).filter(
+        Order.id == order_id,
+        Order.status == order.status
+    ).update({Order.status: new_status}, synchronize_session=False)
+    if not changed:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="La orden cambió, vuelve a intentarlo")
+    
+    product_ids = sorted(item.product_id for item in order.items)
+    if new_status == "cancelled":
+        for item in sorted(order.items, key=lambda item: item.product_id):
+            restock(db, item.product_id, item.quantity)
+        sales.record_order(db, order, sign=-1)
+        sales_changed(db, product_ids)
+    
+    db.commit()
+    if new_status == "cancelled":
+        for product_id in product_ids:
+            catalog_cache.invalidate_product(product_id)
+    
+    return with_items(db.query(Order)).filter(Order.id == order_id).one()
@@ -3,41 +3,132 @@ Product Routes
 Rutas para obtener y gestionar productos
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+import tempfile
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from .. import leaderboards, product_import, reservations, versions
+from ..cache import catalog_cache
 from ..database import get_db
+from ..export import export_response
 from ..models import Product
-from ..schemas import Product as ProductSchema, ProductCreate
+from ..pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from ..schemas import Product as ProductSchema, ProductAvailability, ProductCreate, ProductImportReport
+from ..search import search_products
+from ..serialization import dumps, json_response, rows_to_dicts
 
 router = APIRouter(prefix="/api/products", tags=["products"])
 
+# Columnas de la exportación (las mismas que acepta la carga masiva, más id y fechas)
+EXPORT_COLUMNS = (
+    Product.id, Product.sku, Product.name, Product.description, Product.price, Product.category,
+    Product.image, Product.stock, Product.rating, Product.sales_count, Product.is_featured, Product.created_at,
+)
+
+# Columnas de los listados: exactamente los campos de ProductSchema
+LIST_COLUMNS = tuple(getattr(Product, field) for field in ProductSchema.model_fields)
+
+# Forma de las entradas de listados en la caché (cuerpo JSON ya codificado). Va en la
+# clave: el nivel compartido sobrevive a los despliegues y, durante un despliegue
+# gradual, workers de versiones distintas no deben leer entradas con otra forma
+LIST_CACHE_FORMAT = 2
+
+def serialize_product(product: Product) -> dict:
+    """Convertir un producto a un dict JSON apto para guardarse en la caché"""
+    return ProductSchema.model_validate(product).model_dump(mode="json")
+
 @router.get("/", response_model=list[ProductSchema])
 @router.get("", response_model=list[ProductSchema])  # Aceptar ambas versiones (con y sin slash)
 def get_products(
+    request: Request,
+    response: Response,
     category: str = None,
+    cursor: str = None,
+    sort: str = "id",  # id, newest
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1),
     db: Session = Depends(get_db)
 ):
     """
     Obtener todos los productos
     Parámetros opcionales:
     - category: Filtrar por categoría
-    - skip: Saltar N productos (para paginación)
+    - cursor: Cursor opaco devuelto en el header X-Next-Cursor de la página anterior
+    - sort: Orden de la paginación (id: orden de alta, newest: más recientes primero)
+    - skip: Saltar N productos (obsoleto, usar cursor; se ignora si hay cursor)
     - limit: Limitar a N productos
+    
+    Si hay más resultados, la respuesta incluye el header X-Next-Cursor
+    Soporta If-None-Match / If-Modified-Since (responde 304 si el catálogo no cambió)
+    La página se lee por columnas y se codifica con orjson (ver app/serialization.py)
     """
-    query = db.query(Product)
+    if sort not in ("id", "newest"):
+        raise HTTPException(status_code=400, detail="Orden inválido. Use: id o newest")
+    
+    version = versions.get_version(db, versions.CATALOG)
+    not_modified = versions.conditional(request, response, version)
+    if not_modified:
+        return not_modified
+    
+    cache_key = ("list", "products", LIST_CACHE_FORMAT, category, cursor, sort, 0 if cursor else skip, limit)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None and cached["version"] == version.number:
+        page = cached["data"]
+        if page["next_cursor"]:
+            response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+        return json_response(page["body"].encode(), response)
+    generation = catalog_cache.generation
+    
+    # Solo las columnas de la respuesta, sin objetos ORM
+    query = db.query(*LIST_COLUMNS)
     
     if category:
         query = query.filter(Product.category == category)
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    if sort == "id":
+        query = query.order_by(Product.id)
+        if cursor:
+            (last_id,) = decode_cursor(cursor, sort, (int,))
+            query = query.filter(Product.id > last_id)
+    elif sort == "newest":
+        query = query.order_by(Product.created_at.desc(), Product.id.desc())
+        if cursor:
+            last_created_at, last_id = decode_cursor(cursor, sort, (datetime, int))
+            query = query.filter(
+                tuple_(Product.created_at, Product.id) < tuple_(last_created_at, last_id)
+            )
+    
+    if not cursor and skip:
+        query = query.offset(skip)
+    
+    # Pedir un producto extra para saber si existe una página siguiente
+    products = query.limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        last = products[-1]
+        keys = [last.id] if sort == "id" else [last.created_at, last.id]
+        next_cursor = encode_cursor(sort, keys)
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
+    # El cuerpo se codifica una vez y se guarda así en la caché
+    body = dumps(rows_to_dicts(products))
+    page = {"body": body.decode(), "next_cursor": next_cursor}
+    catalog_cache.set(cache_key, {"version": version.number, "data": page}, generation)
+    return json_response(body, response)
 
 @router.get("/featured/by-criteria", response_model=list[ProductSchema])
 def get_featured_products(
+    request: Request,
+    response: Response,
     criteria: str = "featured",  # featured, rating, sales
-    limit: int = 6,
+    category: str = None,
+    limit: int = Query(6, ge=1),
     db: Session = Depends(get_db)
 ):
     """
@@ -46,40 +137,143 @@ def get_featured_products(
     - featured: Productos marcados como destacados (is_featured=True)
     - rating: Productos con mejor calificación
     - sales: Productos más vendidos
+    Parámetros opcionales:
+    - category: Ranking dentro de una categoría
+    - limit: Limitar a N productos
+    
+    Los rankings están precalculados (tabla product_leaderboards)
     """
-    query = db.query(Product)
-    
-    if criteria == "featured":
-        # Productos marcados como destacados
-        products = query.filter(Product.is_featured == True).limit(limit).all()
-    elif criteria == "rating":
-        # Productos ordenados por calificación (mayor a menor)
-        products = query.order_by(Product.rating.desc()).limit(limit).all()
-    elif criteria == "sales":
-        # Productos ordenados por número de ventas (mayor a menor)
-        products = query.order_by(Product.sales_count.desc()).limit(limit).all()
-    else:
+    if criteria not in ("featured", "rating", "sales"):
         raise HTTPException(status_code=400, detail="Criterio inválido. Use: featured, rating, o sales")
     
-    return products
+    version = versions.get_version(db, versions.CATALOG)
+    not_modified = versions.conditional(request, response, version)
+    if not_modified:
+        return not_modified
+    
+    cache_key = ("list", "featured", LIST_CACHE_FORMAT, criteria, category, limit)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None and cached["version"] == version.number:
+        return json_response(cached["data"].encode(), response)
+    generation = catalog_cache.generation
+    
+    products = leaderboards.top_products(db, criteria, category=category, limit=limit, columns=LIST_COLUMNS)
+    
+    body = dumps(rows_to_dicts(products))
+    catalog_cache.set(cache_key, {"version": version.number, "data": body.decode()}, generation)
+    return json_response(body, response)
+
+@router.get("/search", response_model=list[ProductSchema])
+def search(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1),
+    category: str = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Buscar productos por nombre y descripción
+    - q: Texto a buscar (sin distinguir acentos; cada palabra se busca como prefijo)
+    - category: Filtrar por categoría
+    - limit: Limitar a N resultados (ordenados por relevancia)
+    """
+    version = versions.get_version(db, versions.CATALOG)
+    not_modified = versions.conditional(request, response, version)
+    if not_modified:
+        return not_modified
+    
+    return search_products(db, q, category=category, limit=limit)
+
+@router.get("/export")
+def export_products(format: str = "ndjson", category: str = None):
+    """
+    Exportar el catálogo completo como flujo (solo admin)
+    - format: ndjson (un producto JSON por línea) o csv (con encabezado)
+    - category: Filtrar por categoría
+    
+    Las filas se leen y envían por lotes; la memoria no depende del tamaño del catálogo.
+    El archivo se puede volver a cargar con POST /api/products/bulk
+    """
+    stmt = select(*EXPORT_COLUMNS).order_by(Product.id)
+    if category:
+        stmt = stmt.where(Product.category == category)
+    return export_response(stmt, format, "products")
+
+@router.post("/bulk", response_model=ProductImportReport)
+async def bulk_import(
+    request: Request,
+    format: str = "jsonl",  # jsonl, csv
+    chunk_size: int = Query(product_import.IMPORT_CHUNK_SIZE, ge=1, le=10000)
+):
+    """
+    Carga masiva de productos (solo admin)
+    El cuerpo es el archivo completo (CSV con encabezado o JSONL, UTF-8), p. ej.:
+    curl --data-binary @catalogo.jsonl "/api/products/bulk?format=jsonl"
+    
+    Los productos existentes (mismo sku, o mismo nombre si la fila no trae sku) se actualizan.
+    Las filas inválidas se informan en `errors` sin detener la carga
+    """
+    if format not in product_import.FORMATS:
+        raise HTTPException(status_code=400, detail="Formato inválido. Use: jsonl o csv")
+    
+    # El cuerpo se vuelca a disco a medida que llega; la carga corre fuera del event loop
+    with tempfile.TemporaryFile() as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        return await run_in_threadpool(product_import.import_file, body, format, chunk_size)
 
 @router.get("/{product_id}", response_model=ProductSchema)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    """Obtener un producto por ID"""
+def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Obtener un producto por ID (soporta If-None-Match / If-Modified-Since)"""
+    version = versions.get_version(db, versions.product_key(product_id))
+    not_modified = versions.conditional(request, response, version)
+    if not_modified:
+        return not_modified
+    
+    cache_key = ("product", product_id)
+    cached = catalog_cache.get(cache_key)
+    if cached is not None and cached["version"] == version.number:
+        return cached["data"]
+    generation = catalog_cache.generation
+    
     product = db.query(Product).filter(Product.id == product_id).first()
     
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     
-    return product
+    item = serialize_product(product)
+    catalog_cache.set(cache_key, {"version": version.number, "data": item}, generation)
+    return item
+
+@router.get("/{product_id}/availability", response_model=ProductAvailability)
+def get_availability(product_id: int, db: Session = Depends(get_db)):
+    """
+    Stock disponible de un producto (stock menos las reservas de los carritos)
+    No se cachea: cambia con cada carrito, pero es una sola lectura por clave primaria
+    """
+    availability = reservations.available(db, product_id)
+    if availability is None:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    return availability
 
 @router.post("/", response_model=ProductSchema)
 def create_product(product: ProductCreate, db: Session = Depends(get_db)):
     """Crear un nuevo producto (solo admin)"""
     db_product = Product(**product.dict())
     db.add(db_product)
+    db.flush()
+    leaderboards.on_product_change(db, db_product)
+    versions.bump_product(db, db_product.id)
     db.commit()
     db.refresh(db_product)
+    catalog_cache.invalidate_product(db_product.id)
     return db_product
 
 @router.put("/{product_id}", response_model=ProductSchema)
@@ -94,22 +288,38 @@ def update_product(
     if not db_product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     
+    previous_category = db_product.category
     for key, value in product.dict().items():
         setattr(db_product, key, value)
     
+    leaderboards.on_product_change(db, db_product, previous_category=previous_category)
+    versions.bump_product(db, product_id)
     db.commit()
     db.refresh(db_product)
+    catalog_cache.invalidate_product(product_id)
     return db_product
 
 @router.delete("/{product_id}")
 def delete_product(product_id: int, db: Session = Depends(get_db)):
-    """Eliminar un producto (solo admin)"""
+    """
+    Eliminar un producto (solo admin)
+    Responde 409 si el producto tiene órdenes, reseñas o está en algún carrito
+    """
     db_product = db.query(Product).filter(Product.id == product_id).first()
     
     if not db_product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     
     db.delete(db_product)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Las claves foráneas (PostgreSQL, o SQLite con foreign_keys=ON) protegen el historial
+        db.rollback()
+        raise HTTPException(status_code=409, detail="El producto tiene órdenes, reseñas o carritos asociados")
+    leaderboards.on_product_change(db, db_product, deleted=True)
+    versions.bump_product(db, product_id)
     db.commit()
+    catalog_cache.invalidate_product(product_id)
     
     return {"message": "Producto eliminado"}
@@ -3,21 +3,117 @@ Review Routes
 Rutas para gestionar reseñas de productos
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, load_only
+from .. import leaderboards, ratings, versions
+from ..cache import catalog_cache
 from ..database import get_db
+from ..export import export_response
 from ..models import Review, Product
-from ..schemas import ReviewCreate, ReviewResponse
+from ..pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from ..schemas import ReviewCreate, ReviewResponse, ReviewSummary
 
 router = APIRouter(prefix="/api/reviews", tags=["reviews"])
 
 @router.get("/product/{product_id}", response_model=list[ReviewResponse])
-def get_product_reviews(product_id: int, db: Session = Depends(get_db)):
-    """Obtener todas las reseñas de un producto"""
-    reviews = db.query(Review).filter(Review.product_id == product_id).all()
+def get_product_reviews(
+    product_id: int,
+    request: Request,
+    response: Response,
+    cursor: str = None,
+    sort: str = "newest",  # newest, rating
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtener las reseñas de un producto, paginadas
+    Parámetros opcionales:
+    - cursor: Cursor opaco devuelto en el header X-Next-Cursor de la página anterior
+    - sort: newest (más recientes primero) o rating (mejor calificación primero)
+    - limit: Reseñas por página (máximo 100)
+    
+    Soporta If-None-Match / If-Modified-Since
+    """
+    if sort not in ("newest", "rating"):
+        raise HTTPException(status_code=400, detail="Orden inválido. Use: newest o rating")
+    
+    version = versions.get_version(db, versions.reviews_key(product_id))
+    not_modified = versions.conditional(request, response, version)
+    if not_modified:
+        return not_modified
+    
+    query = db.query(Review).filter(Review.product_id == product_id)
+    
+    if sort == "newest":
+        query = query.order_by(Review.created_at.desc(), Review.id.desc())
+        if cursor:
+            last_created_at, last_id = decode_cursor(cursor, sort, (datetime, int))
+            query = query.filter(
+                tuple_(Review.created_at, Review.id) < tuple_(last_created_at, last_id)
+            )
+    else:
+        query = query.order_by(Review.rating.desc(), Review.created_at.desc(), Review.id.desc())
+        if cursor:
+            last_rating, last_created_at, last_id = decode_cursor(cursor, sort, (int, datetime, int))
+            query = query.filter(
+                tuple_(Review.rating, Review.created_at, Review.id)
+                < tuple_(last_rating, last_created_at, last_id)
+            )
+    
+    # Pedir una reseña extra para saber si existe una página siguiente
+    reviews = query.limit(limit + 1).all()
+    
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        last = reviews[-1]
+        keys = [last.created_at, last.id]
+        if sort == "rating":
+            keys.insert(0, last.rating)
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sort, keys)
+    
     return reviews
 
+@router.get("/summary", response_model=list[ReviewSummary])
+def get_review_summaries(
+    product_ids: list[int] = Query(..., max_length=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Obtener el resumen de calificaciones de varios productos en una sola consulta
+    Ejemplo: /api/reviews/summary?product_ids=1&product_ids=2
+    Los productos inexistentes se omiten
+    """
+    columns = [Product.id, Product.review_count, Product.rating_sum] + [
+        getattr(Product, f"rating_count_{stars}") for stars in ratings.STARS
+    ]
+    products = db.query(Product).options(load_only(*columns)).filter(
+        Product.id.in_(set(product_ids))
+    ).order_by(Product.id).all()
+    
+    return [ratings.summary(product) for product in products]
+
+@router.get("/product/{product_id}/summary", response_model=ReviewSummary)
+def get_product_review_summary(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """Obtener cantidad, promedio y distribución de calificaciones de un producto"""
+    version = versions.get_version(db, versions.product_key(product_id))
+    not_modified = versions.conditional(request, response, version)
+    if not_modified:
+        return not_modified
+    
+    product = db.query(Product).filter(Product.id == product_id).first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+    
+    return ratings.summary(product)
+
 @router.post("/", response_model=ReviewResponse)
 def create_review(review: ReviewCreate, user_id: str = None, db: Session = Depends(get_db)):
     """Crear una nueva reseña"""
@@ -40,20 +136,31 @@ def create_review(review: ReviewCreate, user_id: str = None, db: Session = Depen
     )
     
     db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
     
-    # Actualizar el rating promedio del producto
-    avg_rating = db.query(func.avg(Review.rating)).filter(
-        Review.product_id == review.product_id
-    ).scalar()
+    # Actualizar los agregados y el rating promedio del producto (misma transacción)
+    ratings.add_rating(db, product, review.rating)
+    leaderboards.on_product_change(db, product, criteria=("rating",))
     
-    if avg_rating:
-        product.rating = float(avg_rating)
-        db.commit()
+    versions.bump_review(db, review.product_id)
+    db.commit()
+    db.refresh(db_review)
+    catalog_cache.invalidate_product(review.product_id)
     
     return db_review
 
+@router.get("/export")
+def export_reviews(format: str = "ndjson", product_id: int = None):
+    """
+    Exportar todas las reseñas como flujo (ndjson o csv), opcionalmente de un producto
+    Las filas se leen y envían por lotes
+    """
+    stmt = select(
+        Review.id, Review.product_id, Review.user_id, Review.rating, Review.comment, Review.created_at
+    ).order_by(Review.id)
+    if product_id is not None:
+        stmt = stmt.where(Review.product_id == product_id)
+    return export_response(stmt, format, "reviews")
+
 @router.get("/{review_id}", response_model=ReviewResponse)
 def get_review(review_id: int, db: Session = Depends(get_db)):
     """Obtener una reseña por ID"""
@@ -74,16 +181,15 @@ def delete_review(review_id: int, db: Session = Depends(get_db)):
     
     product_id = review.product_id
     db.delete(review)
-    db.commit()
-    
-    # Actualizar el rating promedio del producto
-    avg_rating = db.query(func.avg(Review.rating)).filter(
-        Review.product_id == product_id
-    ).scalar()
     
+    # Descontar la calificación de los agregados del producto (misma transacción)
     product = db.query(Product).filter(Product.id == product_id).first()
     if product:
-        product.rating = float(avg_rating) if avg_rating else 4.5
-        db.commit()
+        ratings.remove_rating(db, product, review.rating)
+        leaderboards.on_product_change(db, product, criteria=("rating",))
+    
+    versions.bump_review(db, product_id)
+    db.commit()
+    catalog_cache.invalidate_product(product_id)
     
     return {"message": "Reseña eliminada"}
@@ -0,0 +1,154 @@
+"""
+Sales Rollups
+Agregados de ventas (unidades, ingresos, órdenes) por producto, categoría y día
+
+Cada orden suma sus líneas a la tabla sales_rollups con un upsert incremental
+(un solo executemany), en la misma transacción que la orden; cancelarla las
+resta. Los reportes leen esas filas en lugar de recorrer order_items.
+Product.sales_count se mantiene en la misma transacción (al descontar o
+devolver stock), así el ranking "sales" refleja las órdenes reales.
+
+Las órdenes canceladas no cuentan. `python -m app.cli backfill-sales` recalcula
+todo a partir de las órdenes existentes.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .database import dialect_insert
+from .models import Order, OrderItem, Product, SalesRollup
+
+DIMENSIONS = ("product", "category", "day")
+
+# Estados de orden que cuentan como venta
+COUNTED_STATUSES = ("pending", "completed")
+
+def day_key(value: datetime) -> str:
+    return value.date().isoformat()
+
+def record_order(db: Session, order: Order, sign: int = 1, items: list = None):
+    """
+    Sumar (sign=1) o restar (sign=-1) una orden a los agregados, sin commit
+    La orden debe tener created_at; las líneas se leen de order.items, o de
+    `items` (dicts con product_id, quantity y price) si se insertaron sin ORM
+    Todos los agregados se escriben con un solo upsert executemany
+    """
+    if items is None:
+        items = [
+            {"product_id": item.product_id, "quantity": item.quantity, "price": item.price}
+            for item in order.items
+        ]
+    categories = dict(
+        db.query(Product.id, Product.category).filter(
+            Product.id.in_([item["product_id"] for item in items])
+        )
+    )
+
+    totals = defaultdict(lambda: [0, 0.0])
+    for item in items:
+        revenue = item["price"] * item["quantity"]
+        for dimension, key in (
+            ("product", str(item["product_id"])),
+            ("category", categories.get(item["product_id"]) or ""),
+            ("day", day_key(order.created_at)),
+        ):
+            totals[(dimension, key)][0] += item["quantity"]
+            totals[(dimension, key)][1] += revenue
+
+    now = datetime.utcnow()
+    insert = dialect_insert(db)
+    stmt = insert(SalesRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SalesRollup.dimension, SalesRollup.key],
+        set_={
+            "units": SalesRollup.units + stmt.excluded.units,
+            "revenue": SalesRollup.revenue + stmt.excluded.revenue,
+            "order_count": SalesRollup.order_count + stmt.excluded.order_count,
+            "updated_at": now,
+        }
+    )
+    # Orden fijo de claves para que órdenes concurrentes bloqueen filas en el mismo orden
+    db.execute(stmt, [
+        {
+            "dimension": dimension, "key": key, "units": sign * units, "revenue": sign * revenue,
+            "order_count": sign, "updated_at": now,
+        }
+        for (dimension, key), (units, revenue) in sorted(totals.items())
+    ])
+
+def top(db: Session, dimension: str, limit: int) -> list:
+    """Claves de una dimensión ordenadas por ingresos (mayor primero)"""
+    return db.query(SalesRollup).filter(
+        SalesRollup.dimension == dimension
+    ).order_by(SalesRollup.revenue.desc(), SalesRollup.key).limit(limit).all()
+
+def daily(db: Session, date_from: date = None, date_to: date = None) -> list:
+    """Agregados por día en un rango de fechas (inclusive), en orden cronológico"""
+    query = db.query(SalesRollup).filter(SalesRollup.dimension == "day")
+    if date_from:
+        query = query.filter(SalesRollup.key >= date_from.isoformat())
+    if date_to:
+        query = query.filter(SalesRollup.key <= date_to.isoformat())
+    return query.order_by(SalesRollup.key).all()
+
+def totals(db: Session, date_from: date = None, date_to: date = None) -> dict:
+    """Unidades, ingresos y órdenes de un rango de fechas, sumando solo las filas por día"""
+    query = db.query(
+        func.coalesce(func.sum(SalesRollup.units), 0),
+        func.coalesce(func.sum(SalesRollup.revenue), 0),
+        func.coalesce(func.sum(SalesRollup.order_count), 0),
+    ).filter(SalesRollup.dimension == "day")
+    if date_from:
+        query = query.filter(SalesRollup.key >= date_from.isoformat())
+    if date_to:
+        query = query.filter(SalesRollup.key <= date_to.isoformat())
+    units, revenue, orders = query.one()
+    return {"units": units, "revenue": revenue, "order_count": orders}
+
+def backfill(db: Session) -> dict:
+    """
+    Recalcular los agregados y Product.sales_count a partir de las órdenes existentes
+    Reemplaza los valores de sales_count cargados a mano (p. ej. los del seed)
+    Se usa una sola vez, al incorporar los agregados a una base existente
+    """
+    counted = OrderItem.order_id.in_(
+        db.query(Order.id).filter(Order.status.in_(COUNTED_STATUSES))
+    )
+    revenue = func.sum(OrderItem.price * OrderItem.quantity)
+    units = func.sum(OrderItem.quantity)
+    orders = func.count(func.distinct(OrderItem.order_id))
+
+    rows = []
+    by_product = db.query(OrderItem.product_id, units, revenue, orders).filter(counted).group_by(OrderItem.product_id).all()
+    rows += [("product", str(product_id), *values) for product_id, *values in by_product]
+    rows += [
+        ("category", category or "", *values)
+        for category, *values in db.query(Product.category, units, revenue, orders).join(
+            OrderItem, OrderItem.product_id == Product.id
+        ).filter(counted).group_by(Product.category)
+    ]
+    day = func.date(Order.created_at)
+    rows += [
+        ("day", str(key), *values)
+        for key, *values in db.query(day, units, revenue, orders).join(
+            OrderItem, OrderItem.order_id == Order.id
+        ).filter(Order.status.in_(COUNTED_STATUSES)).group_by(day)
+    ]
+
+    db.query(SalesRollup).delete(synchronize_session=False)
+    now = datetime.utcnow()
+    db.bulk_insert_mappings(SalesRollup, [
+        {"dimension": dimension, "key": key, "units": u, "revenue": r, "order_count": o, "updated_at": now}
+        for dimension, key, u, r, o in rows
+    ])
+
+    sold = {product_id: u for product_id, u, _, _ in by_product}
+    db.bulk_update_mappings(Product, [
+        {"id": product_id, "sales_count": sold.get(product_id, 0)}
+        for (product_id,) in db.query(Product.id)
+    ])
+    db.commit()
+    return {"rows": len(rows), "products": len(by_product)}
@@ -4,13 +4,14 @@ Define la estructura y validación de datos que recibe/envía la API
 """
 
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 
 # ============ PRODUCTOS ============
 
 class ProductBase(BaseModel):
     name: str
+    sku: Optional[str] = None
     description: str
     price: float
     category: str
@@ -26,6 +27,31 @@ class ProductCreate(ProductBase):
 class Product(ProductBase):
     id: int
     created_at: datetime
+    review_count: int = 0
+    
+    class Config:
+        from_attributes = True
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class ProductImportReport(BaseModel):
+    """Resultado de una carga masiva de productos"""
+    rows: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[ImportRowError]
+    seconds: float
+    rows_per_second: Optional[float] = None
+
+class ProductAvailability(BaseModel):
+    """Stock disponible = stock - unidades reservadas en carritos"""
+    product_id: int
+    stock: int
+    reserved: int
+    available: int
     
     class Config:
         from_attributes = True
@@ -39,20 +65,39 @@ class CartItemCreate(BaseModel):
 class CartItemUpdate(BaseModel):
     quantity: int
 
+class CartOperation(BaseModel):
+    op: Literal["add", "update", "remove"]  # add: sumar, update: fijar cantidad, remove: quitar
+    product_id: int
+    quantity: int = 1
+
+class CartPatch(BaseModel):
+    version: Optional[int] = None  # Versión del carrito que conoce el cliente (None = sin verificar)
+    operations: List[CartOperation]
+
+class CartProduct(BaseModel):
+    """Datos del producto que necesita el carrito (respuesta liviana)"""
+    id: int
+    name: str
+    price: float
+    image: str
+    stock: int
+
 class CartItemResponse(BaseModel):
     id: int
     product_id: int
     quantity: int
-    product: Product
+    product: CartProduct
     
     class Config:
         from_attributes = True
 
 class CartResponse(BaseModel):
-    id: int
+    id: Optional[int] = None  # None mientras el carrito es virtual (sin fila en la BD)
     user_id: str
     items: List[CartItemResponse]
     total_price: float
+    item_count: int = 0
+    version: int = 0
     
     class Config:
         from_attributes = True
@@ -83,6 +128,26 @@ class OrderResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class OrderStatusUpdate(BaseModel):
+    status: Literal["pending", "completed", "cancelled"]
+
+# ============ VENTAS ============
+
+class SalesRollupResponse(BaseModel):
+    dimension: str  # product, category, day
+    key: str  # id de producto, categoría o fecha (YYYY-MM-DD)
+    units: int
+    revenue: float
+    order_count: int
+    
+    class Config:
+        from_attributes = True
+
+class SalesTotals(BaseModel):
+    units: int
+    revenue: float
+    order_count: int
+
 # ============ RESPUESTAS GENERALES ============
 
 class Message(BaseModel):
@@ -110,6 +175,12 @@ class ReviewResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ReviewSummary(BaseModel):
+    product_id: int
+    review_count: int
+    average: Optional[float] = None
+    distribution: Dict[str, int]  # calificación (1-5) -> cantidad de reseñas
+
 # ============ CONTACTO ============
 
 class ContactMessageCreate(BaseModel):
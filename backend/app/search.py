@@ -0,0 +1,176 @@
+"""
+Product Search
+Búsqueda de texto completo sobre nombre y descripción de productos
+
+- SQLite: tabla virtual FTS5 (tokenizer unicode61 sin diacríticos) sincronizada por triggers
+- PostgreSQL: columna tsvector generada (configuración spanish + unaccent) con índice GIN
+
+En ambos casos el índice se mantiene en la misma transacción que la escritura del
+producto, sin importar qué ruta lo modifique.
+
+Si el SQLite del sistema no tiene FTS5, la búsqueda usa LIKE sobre fold(nombre) y
+fold(descripción): fold se registra como función SQL en cada conexión SQLite, así
+la consulta y el texto se normalizan igual ("labial rosa" encuentra "Labial Rosá").
+"""
+
+import logging
+import re
+import unicodedata
+
+from sqlalchemy import event, func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# Se desactiva si el SQLite del sistema no fue compilado con FTS5
+FTS_AVAILABLE = True
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+POSTGRES_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() no es IMMUTABLE; el envoltorio permite usarla en una columna generada
+    """
+    CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent', $1) $$
+    """,
+    """
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', f_unaccent(coalesce(name, ''))), 'A') ||
+        setweight(to_tsvector('spanish', f_unaccent(coalesce(description, ''))), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+def create_search_index(conn):
+    """Crear (si no existe) el índice de búsqueda con una conexión abierta (migración 0002)"""
+    global FTS_AVAILABLE
+
+    if conn.dialect.name == "postgresql":
+        for statement in POSTGRES_SETUP:
+            conn.execute(text(statement))
+        return
+
+    exists = _fts_table_exists(conn)
+    try:
+        for statement in SQLITE_SETUP:
+            conn.execute(text(statement))
+    except OperationalError as e:
+        FTS_AVAILABLE = False
+        logger.warning("FTS5 no disponible, la búsqueda usará LIKE: %s", e)
+        return
+    if not exists:
+        # Indexar los productos que ya existían antes de crear la tabla virtual
+        conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+def setup_search_index(engine):
+    """Crear (si no existe) el índice de búsqueda para el motor configurado"""
+    with engine.begin() as conn:
+        create_search_index(conn)
+
+def _fts_table_exists(conn) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+    )).first() is not None
+
+def detect_search_index(conn):
+    """Al arrancar: usar FTS5 solo si la migración pudo crear la tabla virtual (una lectura)"""
+    global FTS_AVAILABLE
+
+    if conn.dialect.name == "sqlite":
+        FTS_AVAILABLE = _fts_table_exists(conn)
+
+def fold(value: str) -> str:
+    """Pasar a minúsculas y quitar acentos ("Hidratánte" -> "hidratante")"""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+@event.listens_for(Engine, "connect")
+def register_fold(dbapi_connection, connection_record):
+    """Registrar fold() como función SQL en las conexiones SQLite (búsqueda con LIKE)"""
+    if hasattr(dbapi_connection, "create_function"):
+        dbapi_connection.create_function("fold", 1, lambda value: value if value is None else fold(value),
+                                         deterministic=True)
+
+def tokenize(q: str) -> list[str]:
+    """Palabras de la consulta, sin acentos ni operadores del motor de búsqueda"""
+    return re.findall(r"\w+", fold(q))
+
+def search_products(db: Session, q: str, category: str = None, limit: int = 20) -> list[Product]:
+    """
+    Buscar productos ordenados por relevancia
+    Cada palabra se busca como prefijo (para autocompletar) y todas deben aparecer
+    """
+    tokens = tokenize(q)
+    if not tokens:
+        return []
+
+    params = {"limit": limit}
+    category_filter = ""
+    if category:
+        category_filter = "AND p.category = :category"
+        params["category"] = category
+
+    if db.get_bind().dialect.name == "postgresql":
+        params["q"] = " & ".join(f"{t}:*" for t in tokens)
+        statement = f"""
+            SELECT p.* FROM products p, to_tsquery('spanish', f_unaccent(:q)) query
+            WHERE p.search_vector @@ query {category_filter}
+            ORDER BY ts_rank_cd(p.search_vector, query) DESC, p.id
+            LIMIT :limit
+        """
+    elif FTS_AVAILABLE:
+        params["q"] = " ".join(f'"{t}"*' for t in tokens)
+        # bm25 es menor cuanto más relevante; el nombre pesa más que la descripción
+        statement = f"""
+            SELECT p.* FROM products_fts
+            JOIN products p ON p.id = products_fts.rowid
+            WHERE products_fts MATCH :q {category_filter}
+            ORDER BY bm25(products_fts, 10.0, 1.0), p.id
+            LIMIT :limit
+        """
+    else:
+        query = db.query(Product)
+        for token in tokens:
+            pattern = f"%{token}%"
+            query = query.filter(func.fold(Product.name).like(pattern) | func.fold(Product.description).like(pattern))
+        if category:
+            query = query.filter(Product.category == category)
+        return query.order_by(Product.id).limit(limit).all()
+
+    return db.query(Product).from_statement(text(statement)).params(**params).all()
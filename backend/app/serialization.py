@@ -0,0 +1,49 @@
+"""
+Fast Serialization
+Codificación JSON rápida para los listados del catálogo
+
+Los listados seleccionan solo las columnas de la respuesta (filas de SQLAlchemy
+Core, no objetos ORM), las convierten en dicts y los codifican con orjson. La
+ruta devuelve el cuerpo ya codificado, así FastAPI no vuelve a validar cada
+elemento con el response_model (que se mantiene para la documentación).
+
+Si orjson no está instalado se usa el módulo json con la misma salida.
+"""
+
+import json
+from datetime import date, datetime
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson está en requirements.txt
+    orjson = None
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def dumps(value) -> bytes:
+    """Codificar a JSON (bytes UTF-8); las fechas en ISO 8601, como Pydantic"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def rows_to_dicts(rows) -> list[dict]:
+    """Filas de un SELECT de columnas a dicts (nombre de columna -> valor)"""
+    return [row._asdict() for row in rows]
+
+def json_response(body: bytes, response: Response = None) -> Response:
+    """
+    Respuesta JSON con un cuerpo ya codificado
+    Copia los headers que la ruta puso en `response` (ETag, X-Next-Cursor, ...),
+    que FastAPI no agrega cuando la ruta devuelve su propia Response
+    """
+    fast = Response(content=body, media_type="application/json")
+    if response is not None:
+        for key, value in response.headers.items():
+            if key != "content-length":
+                fast.headers[key] = value
+    return fast
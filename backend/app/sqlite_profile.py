@@ -0,0 +1,137 @@
+"""
+SQLite Profile
+Configuración de SQLite para producción (varios hilos escribiendo a la vez)
+
+Cada conexión nueva aplica:
+- journal_mode=WAL: los lectores no bloquean al escritor ni el escritor a los lectores
+- synchronous=NORMAL: seguro con WAL (un corte de luz puede perder la última
+  transacción, nunca corromper la base) y sin un fsync por commit
+- busy_timeout: un escritor espera su turno en lugar de fallar con "database is locked"
+- cache_size / mmap_size: páginas en memoria por conexión y lectura mapeada del archivo
+- foreign_keys=ON: las claves foráneas se respetan como en PostgreSQL
+
+SQLite admite un solo escritor a la vez. Con SQLITE_WRITE_QUEUE=1 las escrituras
+de este proceso esperan en una cola (un lock) desde su primera sentencia de
+escritura hasta el commit o rollback, en lugar de competir por el lock del
+archivo con reintentos; las lecturas no pasan por la cola y siguen en paralelo.
+La cola solo aplica en DB_MODE=sync (en async bloquearía el event loop).
+"""
+
+import os
+import sqlite3
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+# Configuración desde variables de entorno
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))  # Por conexión
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_FOREIGN_KEYS = os.getenv("SQLITE_FOREIGN_KEYS", "1") == "1"
+# Conexiones del pool: una por hilo del threadpool (40 por defecto en Starlette) más margen
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "40"))
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "20"))
+SQLITE_WRITE_QUEUE = os.getenv("SQLITE_WRITE_QUEUE", "0") == "1"
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+
+def is_file_database(url: str) -> bool:
+    """True si la URL es una base SQLite en archivo (no en memoria)"""
+    database = make_url(url).database
+    return bool(database) and database != ":memory:" and not database.startswith("file::memory:")
+
+def pool_options(url: str) -> dict:
+    """Parámetros de create_engine para el pool de una base SQLite"""
+    if not is_file_database(url):
+        return {}
+    return {"pool_size": SQLITE_POOL_SIZE, "max_overflow": SQLITE_MAX_OVERFLOW}
+
+def pragmas() -> list[str]:
+    statements = [
+        f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store = MEMORY",
+        f"PRAGMA foreign_keys = {'ON' if SQLITE_FOREIGN_KEYS else 'OFF'}",
+    ]
+    if SQLITE_WAL:
+        statements.insert(0, "PRAGMA journal_mode = WAL")
+    return statements
+
+class WriteQueue:
+    """
+    Un escritor a la vez por proceso
+    El turno se toma en la primera sentencia de escritura de una transacción y se
+    libera después del commit o rollback (o al devolver la conexión al pool)
+    """
+
+    def __init__(self, timeout: float):
+        self.lock = threading.Lock()
+        self.timeout = timeout
+        self.owner = None  # Conexión DBAPI que tiene el turno
+        self.waits = 0
+
+    def acquire(self, dbapi_connection):
+        if self.owner is dbapi_connection:
+            return
+        if not self.lock.acquire(blocking=False):
+            self.waits += 1
+            if not self.lock.acquire(timeout=self.timeout):
+                raise sqlite3.OperationalError("database is locked (cola de escritura)")
+        self.owner = dbapi_connection
+
+    def release(self, dbapi_connection):
+        if self.owner is dbapi_connection and dbapi_connection is not None:
+            self.owner = None
+            self.lock.release()
+
+def configure(engine: Engine, write_queue: bool = False):
+    """Aplicar los pragmas a cada conexión nueva y, opcionalmente, la cola de escritura"""
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in pragmas():
+            cursor.execute(statement)
+        cursor.close()
+
+    if not write_queue:
+        return None
+
+    queue = WriteQueue(timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    dialect = engine.dialect
+    do_commit, do_rollback = dialect.do_commit, dialect.do_rollback
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_write(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            queue.acquire(conn.connection.dbapi_connection)
+
+    # El turno se libera después del COMMIT real (el evento "commit" ocurre antes),
+    # así el siguiente escritor no encuentra el archivo bloqueado
+    # El dialecto recibe la conexión del pool (proxy); el turno se guarda con la conexión DBAPI
+    def commit(connection):
+        try:
+            do_commit(connection)
+        finally:
+            queue.release(getattr(connection, "dbapi_connection", connection))
+
+    def rollback(connection):
+        try:
+            do_rollback(connection)
+        finally:
+            queue.release(getattr(connection, "dbapi_connection", connection))
+
+    dialect.do_commit = commit
+    dialect.do_rollback = rollback
+
+    @event.listens_for(engine.pool, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        # Red de seguridad: una conexión devuelta al pool nunca conserva el turno
+        queue.release(dbapi_connection)
+
+    return queue
@@ -0,0 +1,112 @@
+"""
+Worker Startup
+Preparación de cada worker al arrancar (lifespan), sin trabajo pesado
+
+- migrations: por defecto (MIGRATE_ON_STARTUP=0) solo verifica la versión y el
+  worker no arranca si faltan migraciones; la base se migra en el despliegue con
+  `python -m app.cli migrate`. Con MIGRATE_ON_STARTUP=1 (para desarrollo local)
+  aplica las pendientes con el lock de app/migrations; si la base está al día es
+  una sola lectura
+- search_index: detecta si existe la tabla FTS5 (una lectura)
+- cache_warmup: con CACHE_WARMUP=1 pide por ASGI, sin red, las rutas de
+  CACHE_WARMUP_PATHS para llenar la caché del catálogo de este worker
+
+La duración de cada paso queda en `report` (GET /metrics: app_startup_seconds)
+y en el log del worker.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from starlette.concurrency import run_in_threadpool
+
+from . import migrations
+from .database import engine
+from .search import detect_search_index
+
+logger = logging.getLogger(__name__)
+
+# Configuración desde variables de entorno
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "0") == "1"
+CACHE_WARMUP = os.getenv("CACHE_WARMUP", "0") == "1"
+CACHE_WARMUP_PATHS = [path for path in os.getenv(
+    "CACHE_WARMUP_PATHS",
+    "/api/products,/api/products/featured/by-criteria,/api/products/featured/by-criteria?criteria=rating"
+).split(",") if path]
+
+# Pasos del arranque de este worker (segundos)
+report = {"pid": os.getpid(), "steps": {}}
+
+@contextmanager
+def _step(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        report["steps"][name] = round(time.perf_counter() - start, 4)
+
+def ensure_schema():
+    """Migrar (MIGRATE_ON_STARTUP=1) o verificar que la base esté al día"""
+    if MIGRATE_ON_STARTUP:
+        applied = migrations.migrate(engine)
+        if applied:
+            logger.info("Migraciones aplicadas al arrancar: %s", ", ".join(applied))
+        return
+
+    missing = migrations.pending(engine)
+    if missing:
+        raise RuntimeError(
+            f"La base no está al día (migraciones pendientes: {', '.join(missing)}); "
+            "ejecuta `python -m app.cli migrate` antes de iniciar el servidor"
+        )
+
+def detect_search():
+    with engine.connect() as conn:
+        detect_search_index(conn)
+
+async def _get(app, path: str) -> int:
+    """GET interno por ASGI; devuelve el código de estado"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"startup")], "client": None, "server": None,
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+async def warm_up(app, paths: list = CACHE_WARMUP_PATHS):
+    """Pedir las rutas más visitadas para que la primera petición real sea un acierto de caché"""
+    for path in paths:
+        try:
+            status = await _get(app, path)
+        except Exception:
+            logger.exception("Calentamiento de caché: %s falló", path)
+            continue
+        if status != 200:
+            logger.warning("Calentamiento de caché: %s respondió %s", path, status)
+
+async def prepare(app):
+    """Preparar el worker antes de aceptar peticiones (llamar desde el lifespan)"""
+    start = time.perf_counter()
+    with _step("migrations"):
+        await run_in_threadpool(ensure_schema)
+    with _step("search_index"):
+        await run_in_threadpool(detect_search)
+    if CACHE_WARMUP:
+        with _step("cache_warmup"):
+            await warm_up(app)
+    report["steps"]["total"] = round(time.perf_counter() - start, 4)
+    logger.info("Worker %s listo en %.0f ms: %s", report["pid"], report["steps"]["total"] * 1000, report["steps"])
@@ -0,0 +1,38 @@
+"""
+Background Tasks
+Tareas periódicas que corren en un hilo del proceso del servidor
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """Ejecutar `func` cada `interval` segundos en un hilo (interval <= 0 la desactiva)"""
+
+    def __init__(self, name: str, func, interval: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.func()
+            except Exception:
+                logger.exception("Error en la tarea %s", self.name)
+
+    def start(self):
+        if self.interval > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,135 @@
+"""
+Catalog Versions
+Contadores de versión del catálogo para respuestas condicionales (ETag / Last-Modified)
+
+Cada escritura incrementa, en la misma transacción, las versiones que afecta:
+- catalog: cualquier cambio en productos (listados y destacados)
+- product:{id}: cambios en un producto
+- reviews:{id}: reseñas de un producto
+
+Leer una versión es una búsqueda por clave primaria, memorizada unos instantes
+en el proceso, así que un 304 no ejecuta la consulta ni serializa la respuesta.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import NamedTuple, Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from .database import dialect_insert
+from .models import CatalogVersion
+
+# Segundos que se reutiliza una versión leída antes de volver a consultarla
+VERSION_TTL = float(os.getenv("CATALOG_VERSION_TTL", "1"))
+
+CATALOG = "catalog"
+
+def product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+def reviews_key(product_id: int) -> str:
+    return f"reviews:{product_id}"
+
+class Version(NamedTuple):
+    key: str
+    number: int
+    updated_at: Optional[datetime]
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.key.replace(":", "-")}-{self.number}"'
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+def get_version(db: Session, key: str) -> Version:
+    """Obtener la versión actual de una clave (0 si nunca se modificó)"""
+    now = time.monotonic()
+    with _memo_lock:
+        entry = _memo.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    row = db.query(CatalogVersion.version, CatalogVersion.updated_at).filter(
+        CatalogVersion.key == key
+    ).first()
+    version = Version(key, row.version, row.updated_at) if row else Version(key, 0, None)
+
+    with _memo_lock:
+        _memo[key] = (now + VERSION_TTL, version)
+    return version
+
+def bump(db: Session, *keys: str):
+    """
+    Incrementar las versiones indicadas dentro de la transacción actual
+    El llamador es responsable del commit
+    """
+    if not keys:
+        return
+    now = datetime.utcnow()
+    insert = dialect_insert(db)
+    stmt = insert(CatalogVersion).on_conflict_do_update(
+        index_elements=[CatalogVersion.key],
+        set_={"version": CatalogVersion.version + 1, "updated_at": now},
+    )
+    # Una sola sentencia (executemany) sin importar cuántas claves cambien
+    db.execute(stmt, [{"key": key, "version": 1, "updated_at": now} for key in dict.fromkeys(keys)])
+
+    with _memo_lock:
+        for key in keys:
+            _memo.pop(key, None)
+
+def bump_product(db: Session, product_id: int):
+    """Versiones afectadas por un cambio en un producto"""
+    bump(db, CATALOG, product_key(product_id))
+
+def bump_review(db: Session, product_id: int):
+    """Versiones afectadas por una reseña: las del producto (su rating) y sus reseñas"""
+    bump(db, CATALOG, product_key(product_id), reviews_key(product_id))
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Comparación débil, como indica RFC 9110 para If-None-Match
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+def _not_modified_since(header: str, updated_at: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return updated_at.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+def conditional(request: Request, response: Response, version: Version) -> Optional[Response]:
+    """
+    Agregar ETag y Last-Modified a la respuesta
+    Devuelve una respuesta 304 si el cliente ya tiene esta versión, o None para continuar
+    """
+    headers = {"ETag": version.etag, "Cache-Control": "no-cache"}
+    if version.updated_at is not None:
+        headers["Last-Modified"] = format_datetime(
+            version.updated_at.replace(tzinfo=timezone.utc), usegmt=True
+        )
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, version.etag)
+    elif if_modified_since is not None and version.updated_at is not None:
+        fresh = _not_modified_since(if_modified_since, version.updated_at)
+    else:
+        fresh = False
+
+    if fresh:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,15 @@
+"""
+Benchmarks
+Datos sintéticos y escenarios de carga para medir la API
+
+- dataset: genera un catálogo grande (productos, reseñas, carritos y órdenes) en la
+  BD de DATABASE_URL (SQLite o PostgreSQL), con los agregados ya calculados
+- scenarios: recorridos de usuarios contra cada router de app/routes
+- runner: ejecuta los escenarios en el proceso (ASGI) o por HTTP y escribe un
+  reporte JSON con latencia p50/p95/p99, throughput y consultas por petición
+
+Uso (desde la carpeta backend):
+    python -m benchmarks generate --scale small
+    python -m benchmarks run --users 16 --operations 1000
+    python -m benchmarks compare benchmarks/results/a.json benchmarks/results/b.json
+"""
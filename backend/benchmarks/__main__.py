@@ -0,0 +1,99 @@
+"""
+Benchmarks CLI
+Generar el dataset, correr los escenarios y comparar reportes
+
+Uso (desde la carpeta backend; la BD es la de DATABASE_URL):
+    python -m benchmarks generate --scale small [--reset] [--products 50000]
+    python -m benchmarks run [--scenarios browse search] [--users 16] [--operations 1000]
+    python -m benchmarks run --serve 4            # HTTP contra 4 workers de uvicorn
+    python -m benchmarks run --url http://localhost:8000
+    python -m benchmarks compare antes.json despues.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+def generate(args):
+    from .dataset import SCALES, generate
+
+    sizes = {key: getattr(args, key) or value for key, value in SCALES[args.scale].items()}
+    print(f"🧪 Generando dataset {args.scale}: {sizes}")
+    try:
+        report = generate(**sizes, seed=args.seed, reset=args.reset)
+    except ValueError as error:
+        print(f"❌ {error}")
+        return 1
+    print(f"✅ Dataset listo en {sum(report['seconds'].values()):.1f}s")
+    return 0
+
+def run(args):
+    from .runner import run
+
+    try:
+        report = run(args.scenarios, args.users, args.operations, args.warmup, args.seed, url=args.url, serve=args.serve)
+    except ValueError as error:
+        print(f"❌ {error}")
+        return 1
+
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['transport']}-{report['meta']['database']}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+    print(f"📄 Reporte: {output}")
+    return 1 if any(scenario["errors"] for scenario in report["scenarios"].values()) else 0
+
+def compare(args):
+    from .runner import compare
+
+    reports = []
+    for path in (args.before, args.after):
+        with open(path, encoding="utf-8") as file:
+            reports.append(json.load(file))
+    print("\n".join(compare(*reports)))
+    return 0
+
+def main(argv=None):
+    from .scenarios import SCENARIOS
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks de Krisly Beauty API")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    from .dataset import SCALES
+    data = subparsers.add_parser("generate", help="Generar el dataset sintético")
+    data.add_argument("--scale", choices=SCALES, default="small", help="Tamaño predefinido (full: 100k productos, 2M reseñas)")
+    for key in ("products", "reviews", "carts", "orders"):
+        data.add_argument(f"--{key}", type=int, help=f"Cantidad de {key} (reemplaza la de --scale)")
+    data.add_argument("--seed", type=int, default=42)
+    data.add_argument("--reset", action="store_true", help="Borrar todas las tablas antes de generar")
+    data.set_defaults(func=generate)
+
+    load = subparsers.add_parser("run", help="Correr los escenarios de carga")
+    load.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    load.add_argument("--users", type=int, default=8, help="Usuarios virtuales concurrentes")
+    load.add_argument("--operations", type=int, default=500, help="Operaciones medidas por escenario")
+    load.add_argument("--warmup", type=int, default=50, help="Operaciones previas sin medir")
+    load.add_argument("--seed", type=int, default=1)
+    target = load.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Servidor ya iniciado (por defecto, la app en este proceso)")
+    target.add_argument("--serve", type=int, default=0, metavar="WORKERS", help="Lanzar uvicorn con N workers")
+    load.add_argument("--output", help="Archivo JSON del reporte (por defecto, en benchmarks/results/)")
+    load.set_defaults(func=run)
+
+    diff = subparsers.add_parser("compare", help="Comparar dos reportes")
+    diff.add_argument("before")
+    diff.add_argument("after")
+    diff.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
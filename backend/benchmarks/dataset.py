@@ -0,0 +1,265 @@
+"""
+Synthetic Dataset
+Genera un catálogo sintético grande en la BD configurada (DATABASE_URL)
+
+Los datos son deterministas para una misma semilla. La popularidad sigue una ley
+de potencia (pocos productos concentran la mayoría de reseñas y ventas), como en
+una tienda real, para que los rankings y las páginas de reseñas tengan la forma
+que tendrían en producción.
+
+Las filas se insertan por lotes con SQLAlchemy Core; al final se calculan los
+mismos agregados que mantienen las rutas (calificaciones, ventas y rankings).
+"""
+
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, text
+
+from app import leaderboards, migrations, ratings, sales
+from app.database import Base, SessionLocal, engine
+from app.models import Cart, CartItem, ContactMessage, Order, OrderItem, Product, Review
+from app.search import setup_search_index
+
+# Filas por sentencia de inserción
+BATCH_SIZE = 10_000
+
+# Tamaños predefinidos (--scale); cada cantidad se puede cambiar por separado
+SCALES = {
+    "tiny": {"products": 1_000, "reviews": 20_000, "carts": 2_000, "orders": 2_000},
+    "small": {"products": 10_000, "reviews": 200_000, "carts": 20_000, "orders": 20_000},
+    "full": {"products": 100_000, "reviews": 2_000_000, "carts": 300_000, "orders": 200_000},
+}
+
+CATEGORIES = (
+    "Maquillaje", "Cuidado Personal", "Cuidado Facial", "Cabello", "Fragancias", "Uñas",
+    "Cuerpo", "Protección Solar", "Hombre", "Accesorios", "Bebés", "Bienestar",
+)
+PRODUCT_TYPES = (
+    "Labial", "Base", "Corrector", "Rubor", "Sombras", "Máscara de pestañas", "Delineador",
+    "Crema hidratante", "Sérum", "Tónico", "Limpiador", "Mascarilla", "Champú", "Acondicionador",
+    "Aceite", "Perfume", "Esmalte", "Loción corporal", "Exfoliante", "Protector solar", "Bálsamo",
+)
+ADJECTIVES = (
+    "Hidratante", "Mate", "Luminoso", "Nutritivo", "Reparador", "Suave", "Intenso", "Natural",
+    "Vegano", "Orgánico", "Matificante", "Calmante", "Revitalizante", "Purificante", "Sedoso",
+)
+BRANDS = ("Krisly", "Aurora", "Bella Vita", "Lumière", "Selva", "Pura", "Rosé", "Nácar", "Miel", "Alba")
+COMMENTS = (
+    "Me encantó, lo vuelvo a comprar", "Buena relación calidad precio", "Llegó rápido y bien empacado",
+    "No era lo que esperaba", "El aroma es increíble", "Dura todo el día", "Mi piel lo nota",
+    "Un poco caro pero vale la pena", "Regular, esperaba más", "Excelente, lo recomiendo",
+)
+# Distribución de calificaciones (1 a 5 estrellas)
+RATING_WEIGHTS = (4, 5, 11, 30, 50)
+ORDER_STATUSES = (("completed", 70), ("pending", 20), ("cancelled", 10))
+
+def popularity_weights(count: int, exponent: float = 1.1) -> list[float]:
+    """Pesos acumulados de una ley de potencia: el producto 1 es el más popular"""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+def pick(rng: random.Random, cumulative: list[float]) -> int:
+    """Índice (desde 1) elegido según los pesos acumulados"""
+    return bisect.bisect_left(cumulative, rng.random() * cumulative[-1]) + 1
+
+def _batches(rows, size: int = BATCH_SIZE):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+def _insert(db, table, rows) -> int:
+    """Insertar filas por lotes; devuelve cuántas se insertaron"""
+    total = 0
+    for batch in _batches(rows):
+        db.execute(insert(table), batch)
+        total += len(batch)
+    db.commit()
+    return total
+
+def product_name(rng: random.Random) -> str:
+    return f"{rng.choice(PRODUCT_TYPES)} {rng.choice(ADJECTIVES)} {rng.choice(BRANDS)}"
+
+def _products(rng: random.Random, count: int, now: datetime):
+    for product_id in range(1, count + 1):
+        yield {
+            "id": product_id,
+            "sku": f"SYN-{product_id:07d}",
+            "name": f"{product_name(rng)} {product_id}",
+            "description": f"{rng.choice(ADJECTIVES)} y {rng.choice(ADJECTIVES).lower()}. " * rng.randint(2, 6),
+            "price": round(rng.lognormvariate(3.0, 0.6), 2),
+            "category": rng.choice(CATEGORIES),
+            "image": f"https://example.com/products/{product_id}.jpg",
+            "stock": rng.randint(1_000, 100_000),
+            "rating": ratings.DEFAULT_RATING,
+            "sales_count": 0,
+            "is_featured": rng.random() < 0.02,
+            "created_at": now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60)),
+        }
+
+def _reviews(rng: random.Random, count: int, popularity: list, now: datetime):
+    for review_id in range(1, count + 1):
+        yield {
+            "id": review_id,
+            "product_id": pick(rng, popularity),
+            "user_id": f"user-{rng.randint(1, max(count // 5, 1))}",
+            "rating": rng.choices((1, 2, 3, 4, 5), RATING_WEIGHTS)[0],
+            "comment": rng.choice(COMMENTS),
+            "created_at": now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+        }
+
+def _carts(rng: random.Random, count: int, popularity: list, now: datetime):
+    """Carritos (de usuarios cart-user-N) y sus items, sin reservas de stock"""
+    carts, items = [], []
+    item_id = 0
+    for cart_id in range(1, count + 1):
+        # Algunos carritos son viejos: la purga de abandonados tiene trabajo real
+        updated_at = now - timedelta(hours=rng.expovariate(1 / 72))
+        carts.append({"id": cart_id, "user_id": f"cart-user-{cart_id}", "created_at": updated_at,
+                      "updated_at": updated_at, "version": rng.randint(1, 10)})
+        for product_id in {pick(rng, popularity) for _ in range(rng.randint(1, 6))}:
+            item_id += 1
+            items.append({"id": item_id, "cart_id": cart_id, "product_id": product_id, "quantity": rng.randint(1, 3)})
+        if len(carts) >= BATCH_SIZE:
+            yield carts, items
+            carts, items = [], []
+    if carts:
+        yield carts, items
+
+def _orders(rng: random.Random, count: int, popularity: list, prices: list, now: datetime):
+    """Órdenes (de usuarios user-N) y sus líneas, con el precio del producto"""
+    statuses, weights = zip(*ORDER_STATUSES)
+    orders, items = [], []
+    item_id = 0
+    for order_id in range(1, count + 1):
+        lines = {pick(rng, popularity): rng.randint(1, 3) for _ in range(rng.randint(1, 5))}
+        total = 0.0
+        for product_id, quantity in lines.items():
+            item_id += 1
+            price = prices[product_id - 1]
+            total += price * quantity
+            items.append({"id": item_id, "order_id": order_id, "product_id": product_id, "quantity": quantity, "price": price})
+        orders.append({
+            "id": order_id,
+            "user_id": f"user-{rng.randint(1, max(count // 3, 1))}",
+            "total_price": round(total, 2),
+            "status": rng.choices(statuses, weights)[0],
+            "created_at": now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+        })
+        if len(orders) >= BATCH_SIZE:
+            yield orders, items
+            orders, items = [], []
+    if orders:
+        yield orders, items
+
+def _contact_messages(rng: random.Random, count: int, now: datetime):
+    for message_id in range(1, count + 1):
+        yield {
+            "id": message_id, "name": f"Cliente {message_id}", "email": f"cliente{message_id}@example.com",
+            "subject": "Consulta", "message": rng.choice(COMMENTS), "created_at": now - timedelta(days=rng.randint(0, 365)),
+        }
+
+def reset_schema():
+    """Borrar y volver a crear todas las tablas (y el índice de búsqueda)"""
+    Base.metadata.drop_all(bind=engine)
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS products_fts"))
+    Base.metadata.create_all(bind=engine)
+    setup_search_index(engine)
+
+def _sync_sequences(db):
+    """PostgreSQL: avanzar las secuencias de id después de insertar ids explícitos"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in ("products", "reviews", "carts", "cart_items", "orders", "order_items", "contact_messages"):
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+    db.commit()
+
+def generate(products: int, reviews: int, carts: int, orders: int, seed: int = 42, reset: bool = False,
+             log=print) -> dict:
+    """
+    Generar el dataset completo y devolver cantidades y tiempos
+    La BD debe estar vacía (o usar reset=True, que borra todas las tablas)
+    """
+    if reset:
+        reset_schema()
+    else:
+        Base.metadata.create_all(bind=engine)
+        setup_search_index(engine)
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    popularity = popularity_weights(products)
+    report = {"seed": seed, "seconds": {}}
+    db = SessionLocal()
+    try:
+        if db.query(Product.id).first() is not None:
+            raise ValueError("La base ya tiene productos; usa --reset para borrarla y generar de nuevo")
+
+        def step(name: str, work):
+            start = time.perf_counter()
+            report[name] = work()
+            report["seconds"][name] = round(time.perf_counter() - start, 1)
+            log(f"  {name}: {report[name]} en {report['seconds'][name]}s")
+
+        step("products", lambda: _insert(db, Product.__table__, _products(rng, products, now)))
+        prices = [price for (price,) in db.query(Product.price).order_by(Product.id)]
+        step("reviews", lambda: _insert(db, Review.__table__, _reviews(rng, reviews, popularity, now)))
+
+        def insert_pairs(parent, child, batches):
+            count = 0
+            for parents, children in batches:
+                db.execute(insert(parent), parents)
+                db.execute(insert(child), children)
+                count += len(parents)
+            db.commit()
+            return count
+
+        step("carts", lambda: insert_pairs(Cart.__table__, CartItem.__table__, _carts(rng, carts, popularity, now)))
+        step("orders", lambda: insert_pairs(
+            Order.__table__, OrderItem.__table__, _orders(rng, orders, popularity, prices, now)
+        ))
+        step("contact_messages", lambda: _insert(db, ContactMessage.__table__, _contact_messages(rng, max(orders // 100, 10), now)))
+        _sync_sequences(db)
+
+        # Los mismos agregados que mantienen las rutas, calculados de una vez
+        def aggregates():
+            rated = ratings.backfill(db)
+            sales.backfill(db)
+            leaderboards.rebuild_all(db)
+            db.commit()
+            return rated
+
+        step("aggregates", aggregates)
+
+        # Estadísticas del planificador con la distribución real de los datos
+        def analyze():
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text("ANALYZE"))
+            return "ok"
+
+        step("analyze", analyze)
+
+        # Registrar el esquema como migrado: los servidores arrancan sin trabajo pendiente
+        # (0003 no carga el catálogo de prueba porque la base ya tiene productos)
+        migrations.migrate(engine)
+    finally:
+        db.close()
+    return report
+
+def describe(db) -> dict:
+    """Cantidades del dataset cargado (para los escenarios y el reporte)"""
+    return {
+        "products": db.query(func.count(Product.id)).scalar(),
+        "max_product_id": db.query(func.max(Product.id)).scalar() or 0,
+        "reviews": db.query(func.count(Review.id)).scalar(),
+        "carts": db.query(func.count(Cart.id)).scalar(),
+        "orders": db.query(func.count(Order.id)).scalar(),
+        "max_order_id": db.query(func.max(Order.id)).scalar() or 0,
+        "categories": [row.category for row in db.query(Product.category).distinct().order_by(Product.category)],
+    }
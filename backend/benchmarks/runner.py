@@ -0,0 +1,302 @@
+"""
+Benchmark Runner
+Ejecuta los escenarios con usuarios virtuales concurrentes y arma el reporte
+
+Dos transportes:
+- asgi: la app en este mismo proceso (httpx.ASGITransport), sin red; mide la app y la BD
+- http: un servidor real (--url, o uno que se lanza con --serve y N workers de uvicorn)
+
+Cada escenario corre `operations` operaciones repartidas entre `users` usuarios,
+después de `warmup` operaciones que no se miden. Cada usuario tiene su propio
+generador aleatorio (semilla + número de usuario), así dos corridas con la misma
+semilla hacen las mismas peticiones.
+
+Las consultas SQL por petición salen del header X-DB-Query-Count
+(app/query_profiler.py): el transporte asgi y --serve activan QUERY_PROFILER=1; con
+--url el servidor debe tenerlo activo para que el reporte las incluya.
+"""
+
+import asyncio
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from .dataset import describe, pick, popularity_weights
+from .scenarios import SCENARIOS
+
+def percentile(values: list, fraction: float):
+    """Percentil por rango más cercano (None si no hay valores)"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+def latency_summary(seconds: list) -> dict:
+    milliseconds = [value * 1000 for value in seconds]
+    return {
+        "p50": round(percentile(milliseconds, 0.50), 2),
+        "p95": round(percentile(milliseconds, 0.95), 2),
+        "p99": round(percentile(milliseconds, 0.99), 2),
+        "max": round(max(milliseconds), 2),
+        "mean": round(sum(milliseconds) / len(milliseconds), 2),
+    }
+
+def queries_summary(counts: list):
+    if not counts:
+        return None
+    return {"mean": round(sum(counts) / len(counts), 2), "p95": percentile(counts, 0.95), "max": max(counts)}
+
+class Recorder:
+    """Latencias, estados y consultas de cada tipo de petición de un escenario"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def record(self, name: str, seconds: float, status: int, queries: str = None):
+        self.latencies[name].append(seconds)
+        self.statuses[name][status] += 1
+        if status >= 500 or status == 0:
+            self.errors[name] += 1
+        if queries is not None:
+            self.queries[name].append(int(queries))
+
+    def summary(self, operations: int, seconds: float) -> dict:
+        everything = [value for values in self.latencies.values() for value in values]
+        requests = len(everything)
+        return {
+            "operations": operations,
+            "requests": requests,
+            "errors": sum(self.errors.values()),
+            "seconds": round(seconds, 2),
+            "operations_per_second": round(operations / seconds, 1),
+            "throughput_rps": round(requests / seconds, 1),
+            "latency_ms": latency_summary(everything) if everything else None,
+            "queries_per_request": queries_summary([value for values in self.queries.values() for value in values]),
+            "requests_by_name": {
+                name: {
+                    "count": len(values),
+                    "errors": self.errors[name],
+                    "status": {str(status): count for status, count in sorted(self.statuses[name].items())},
+                    "latency_ms": latency_summary(values),
+                    "queries": queries_summary(self.queries[name]),
+                }
+                for name, values in sorted(self.latencies.items())
+            },
+        }
+
+class VirtualUser:
+    """Un cliente simulado: su generador aleatorio, ids propios y el registro de peticiones"""
+
+    def __init__(self, number: int, client: httpx.AsyncClient, dataset: dict, popularity: list, seed: int, run_id: str):
+        self.number = number
+        self.client = client
+        self.dataset = dataset
+        self.popularity = popularity
+        self.rng = random.Random(seed * 1000 + number)
+        self.run_id = run_id
+        self.counter = 0
+        self.recorder = None  # None durante el calentamiento
+
+    def product(self) -> int:
+        """Un producto existente, elegido según su popularidad"""
+        return pick(self.rng, self.popularity)
+
+    def next_id(self, prefix: str) -> str:
+        """Id de usuario nuevo (carritos, compradores, autores de reseñas), único por corrida"""
+        self.counter += 1
+        return f"bench-{prefix}-{self.run_id}-{self.number}-{self.counter}"
+
+    async def request(self, method: str, path: str, name: str, **kwargs) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            if self.recorder is not None:
+                self.recorder.record(name, time.perf_counter() - start, 0)
+            raise
+        if self.recorder is not None:
+            self.recorder.record(name, time.perf_counter() - start, response.status_code,
+                                 response.headers.get("x-db-query-count"))
+        return response
+
+async def _run_operations(users: list, scenario, operations: int, recorder) -> int:
+    """Repartir las operaciones entre los usuarios y ejecutarlas en paralelo"""
+
+    async def run_user(user, count: int):
+        user.recorder = recorder
+        for _ in range(count):
+            try:
+                await scenario(user)
+            except (httpx.HTTPError, KeyError, ValueError):
+                pass  # Ya quedó registrada como error (o la respuesta no era la esperada)
+
+    shares = [operations // len(users) + (1 if i < operations % len(users) else 0) for i in range(len(users))]
+    await asyncio.gather(*(run_user(user, count) for user, count in zip(users, shares)))
+    return operations
+
+async def run_scenarios(client: httpx.AsyncClient, dataset: dict, names: list, users: int, operations: int,
+                        warmup: int, seed: int, log=print) -> dict:
+    popularity = popularity_weights(dataset["max_product_id"])
+    run_id = datetime.now().strftime("%H%M%S")
+    results = {}
+    for name in names:
+        scenario = SCENARIOS[name]
+        virtual_users = [VirtualUser(i, client, dataset, popularity, seed, run_id) for i in range(users)]
+        await _run_operations(virtual_users, scenario, warmup, None)
+
+        recorder = Recorder()
+        start = time.perf_counter()
+        await _run_operations(virtual_users, scenario, operations, recorder)
+        results[name] = recorder.summary(operations, time.perf_counter() - start)
+
+        summary = results[name]
+        latency = summary["latency_ms"] or {}
+        queries = summary["queries_per_request"] or {}
+        log(
+            f"⏱️ {name}: {summary['throughput_rps']} req/s, p50 {latency.get('p50')} ms, p95 {latency.get('p95')} ms, "
+            f"p99 {latency.get('p99')} ms, {queries.get('mean', '?')} consultas/petición, {summary['errors']} errores"
+        )
+    return results
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int, env: dict) -> tuple[subprocess.Popen, str]:
+    """Lanzar uvicorn con `workers` procesos sobre la misma BD y esperar /health"""
+    port = _free_port()
+    # La salida del servidor (errores, avisos de N+1) va a un archivo para no mezclarse con el progreso
+    log_file = tempfile.NamedTemporaryFile(prefix="krisly-bench-server-", suffix=".log", delete=False)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        env={**os.environ, **env},
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    print(f"🚀 Servidor en el puerto {port} con {workers} workers (log: {log_file.name})")
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("El servidor terminó antes de responder /health")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("El servidor no respondió /health a tiempo")
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(names: list, users: int, operations: int, warmup: int, seed: int, url: str = None, serve: int = 0,
+        log=print) -> dict:
+    """Ejecutar los escenarios y devolver el reporte completo"""
+    env = {"QUERY_PROFILER": "1"}
+    os.environ.update(env)  # Antes de importar la app (transporte asgi)
+
+    from app.database import DB_MODE, SessionLocal, engine
+
+    # Las consultas por petición van al reporte; los avisos de N+1 solo ensuciarían la salida
+    logging.getLogger("app.query_profiler").setLevel(logging.ERROR)
+
+    db = SessionLocal()
+    try:
+        dataset = describe(db)
+    finally:
+        db.close()
+    if not dataset["products"]:
+        raise ValueError("La base no tiene productos; genera el dataset con: python -m benchmarks generate")
+
+    transport = "http" if url or serve else "asgi"
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "transport": transport,
+            "url": url,
+            "workers": serve or None,
+            "database": engine.dialect.name,
+            "db_mode": DB_MODE,
+            "catalog_cache": os.getenv("CATALOG_CACHE_ENABLED", "1") == "1",
+            "users": users,
+            "operations": operations,
+            "warmup": warmup,
+            "seed": seed,
+        },
+        "dataset": dataset,
+    }
+
+    async def main(client_options: dict, lifespan=None):
+        async with httpx.AsyncClient(timeout=60, **client_options) as client:
+            if lifespan is None:
+                return await run_scenarios(client, dataset, names, users, operations, warmup, seed, log)
+            async with lifespan:
+                return await run_scenarios(client, dataset, names, users, operations, warmup, seed, log)
+
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    if transport == "asgi":
+        from app.main import app
+        report["scenarios"] = asyncio.run(main(
+            {"transport": httpx.ASGITransport(app=app), "base_url": "http://benchmark"},
+            app.router.lifespan_context(app),
+        ))
+        return report
+
+    process = None
+    if serve:
+        process, url = start_server(serve, env)
+        report["meta"]["url"] = url
+    try:
+        report["scenarios"] = asyncio.run(main({"base_url": url, "limits": limits}))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return report
+
+def compare(before: dict, after: dict) -> list[str]:
+    """Diferencias por escenario entre dos reportes (after respecto de before)"""
+
+    def change(old, new) -> str:
+        if old in (None, 0) or new is None:
+            return f"{old} -> {new}"
+        return f"{old} -> {new} ({(new - old) / old * 100:+.1f}%)"
+
+    lines = []
+    for name, new in after.get("scenarios", {}).items():
+        old = before.get("scenarios", {}).get(name)
+        if old is None:
+            lines.append(f"{name}: solo en el segundo reporte")
+            continue
+        lines.append(f"{name}:")
+        rows = [("throughput req/s", old["throughput_rps"], new["throughput_rps"])]
+        rows += [(f"{key} ms", (old["latency_ms"] or {}).get(key), (new["latency_ms"] or {}).get(key)) for key in ("p50", "p95", "p99")]
+        rows.append(("consultas/petición", (old["queries_per_request"] or {}).get("mean"), (new["queries_per_request"] or {}).get("mean")))
+        rows.append(("errores", old["errors"], new["errors"]))
+        lines += [f"  {label:<20} {change(before_value, after_value)}" for label, before_value, after_value in rows]
+    return lines
@@ -0,0 +1,133 @@
+"""
+Load Scenarios
+Recorridos de usuarios contra cada router de app/routes
+
+Cada escenario es una función async que ejecuta una operación de un usuario
+virtual (una o varias peticiones) con el cliente `user.client`. Las decisiones
+salen de `user.rng`, así una misma semilla repite la misma secuencia de peticiones.
+
+- browse: páginas del catálogo, detalle, destacados, disponibilidad y reseñas (products, reviews)
+- search: búsqueda de texto completo, con y sin categoría (products)
+- cart_churn: agregar, modificar, quitar y leer carritos (cart)
+- review_writes: publicar reseñas y leer las del producto (reviews)
+- checkout: llenar el carrito, comprar y consultar las órdenes (cart, orders)
+- admin: órdenes por estado, reportes de ventas, mensajes de contacto y exportaciones
+  pequeñas (orders, analytics, contact, reviews)
+"""
+
+from .dataset import ADJECTIVES, PRODUCT_TYPES
+
+async def browse(user):
+    data = user.dataset
+    params = {"limit": 20}
+    if user.rng.random() < 0.6:
+        params["category"] = user.rng.choice(data["categories"])
+    if user.rng.random() < 0.3:
+        params["sort"] = "newest"
+    response = await user.request("GET", "/api/products", "products.list", params=params)
+
+    # Seguir el cursor como quien baja por el listado
+    for _ in range(user.rng.randint(0, 2)):
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        response = await user.request("GET", "/api/products", "products.list_next", params={**params, "cursor": cursor})
+
+    product_id = user.product()
+    await user.request("GET", f"/api/products/{product_id}", "products.detail")
+    await user.request("GET", f"/api/reviews/product/{product_id}", "reviews.page",
+                       params={"sort": user.rng.choice(("newest", "rating"))})
+    await user.request("GET", f"/api/reviews/product/{product_id}/summary", "reviews.summary")
+    if user.rng.random() < 0.3:
+        await user.request("GET", f"/api/products/{product_id}/availability", "products.availability")
+    if user.rng.random() < 0.3:
+        await user.request("GET", "/api/products/featured/by-criteria", "products.featured",
+                           params={"criteria": user.rng.choice(("featured", "rating", "sales")), "limit": 8})
+    if user.rng.random() < 0.2:
+        ids = [user.product() for _ in range(12)]
+        await user.request("GET", "/api/reviews/summary", "reviews.summary_many", params={"product_ids": ids})
+
+async def search(user):
+    words = [user.rng.choice(PRODUCT_TYPES).split()[0]]
+    if user.rng.random() < 0.5:
+        words.append(user.rng.choice(ADJECTIVES))
+    query = " ".join(words)
+    # Prefijos cortos, como al autocompletar
+    if user.rng.random() < 0.3:
+        query = query[:user.rng.randint(3, len(query))]
+    params = {"q": query, "limit": 20}
+    if user.rng.random() < 0.3:
+        params["category"] = user.rng.choice(user.dataset["categories"])
+    await user.request("GET", "/api/products/search", "products.search", params=params)
+
+async def cart_churn(user):
+    cart_user = user.next_id("cart")
+    for _ in range(user.rng.randint(1, 4)):
+        await user.request("POST", f"/api/cart/{cart_user}/items", "cart.add",
+                           json={"product_id": user.product(), "quantity": user.rng.randint(1, 2)})
+
+    cart = (await user.request("GET", f"/api/cart/{cart_user}", "cart.get")).json()
+    operations = [{"op": "update", "product_id": item["product_id"], "quantity": user.rng.randint(1, 4)}
+                  for item in cart["items"][:2]]
+    operations.append({"op": "add", "product_id": user.product(), "quantity": 1})
+    await user.request("PATCH", f"/api/cart/{cart_user}", "cart.patch",
+                       json={"version": cart["version"], "operations": operations})
+
+    cart = (await user.request("GET", f"/api/cart/{cart_user}", "cart.get")).json()
+    if cart["items"]:
+        item = user.rng.choice(cart["items"])
+        await user.request("DELETE", f"/api/cart/{cart_user}/items/{item['id']}", "cart.remove")
+    if user.rng.random() < 0.5:
+        await user.request("DELETE", f"/api/cart/{cart_user}/clear", "cart.clear")
+
+    # Carritos existentes del dataset
+    if user.dataset["carts"]:
+        await user.request("GET", f"/api/cart/cart-user-{user.rng.randint(1, user.dataset['carts'])}", "cart.get_existing")
+
+async def review_writes(user):
+    product_id = user.product()
+    created = await user.request("POST", "/api/reviews/", "reviews.create",
+                                 params={"user_id": user.next_id("reviewer")},
+                                 json={"product_id": product_id, "rating": user.rng.randint(1, 5), "comment": "Prueba de carga"})
+    await user.request("GET", f"/api/reviews/product/{product_id}", "reviews.page")
+    if created.status_code == 200 and user.rng.random() < 0.2:
+        await user.request("DELETE", f"/api/reviews/{created.json()['id']}", "reviews.delete")
+
+async def checkout(user):
+    buyer = user.next_id("buyer")
+    for _ in range(user.rng.randint(1, 4)):
+        await user.request("POST", f"/api/cart/{buyer}/items", "cart.add",
+                           json={"product_id": user.product(), "quantity": user.rng.randint(1, 2)})
+    order = await user.request("POST", f"/api/orders/checkout/{buyer}", "orders.checkout")
+    await user.request("GET", f"/api/orders/{buyer}", "orders.by_user")
+    if order.status_code == 201:
+        order_id = order.json()["id"]
+        await user.request("GET", f"/api/orders/{buyer}/{order_id}", "orders.detail")
+        if user.rng.random() < 0.1:
+            await user.request("PATCH", f"/api/orders/{order_id}/status", "orders.cancel", json={"status": "cancelled"})
+
+async def admin(user):
+    await user.request("GET", "/api/orders/", "orders.list",
+                       params={"status": user.rng.choice(("pending", "completed", "cancelled")), "limit": 50})
+    await user.request("GET", "/api/analytics/sales", "analytics.top",
+                       params={"dimension": user.rng.choice(("product", "category"))})
+    await user.request("GET", "/api/analytics/sales/daily", "analytics.daily")
+    await user.request("GET", "/api/analytics/sales/totals", "analytics.totals")
+    if user.rng.random() < 0.3:
+        await user.request("POST", "/api/contact/", "contact.create", json={
+            "name": "Cliente", "email": "cliente@example.com", "subject": "Consulta", "message": "Prueba de carga"
+        })
+    if user.rng.random() < 0.2:
+        await user.request("GET", "/api/contact/", "contact.list")
+    if user.rng.random() < 0.1:
+        await user.request("GET", "/api/reviews/export", "reviews.export",
+                           params={"product_id": user.product(), "format": "ndjson"})
+
+SCENARIOS = {
+    "browse": browse,
+    "search": search,
+    "cart_churn": cart_churn,
+    "review_writes": review_writes,
+    "checkout": checkout,
+    "admin": admin,
+}
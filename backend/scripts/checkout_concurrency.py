@@ -0,0 +1,89 @@
+"""
+Checkout Concurrency Check
+Comprueba que el checkout nunca vende más stock del que hay
+
+Crea un producto con poco stock y lanza N compradores a la vez contra un
+servidor en marcha: cada uno agrega una unidad al carrito (lo que la reserva) y
+hace checkout. Compiten tanto las reservas como los descuentos de stock.
+Al final verifica:
+- checkouts exitosos <= stock inicial
+- stock final == stock inicial - checkouts exitosos, y nunca negativo
+- sales_count aumentó exactamente en los checkouts exitosos
+- no quedan unidades reservadas
+
+Uso (con el servidor corriendo):
+    python scripts/checkout_concurrency.py --url http://localhost:8000 --stock 5 --buyers 300
+"""
+
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+def request(method: str, url: str, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            return response.status, json.loads(response.read() or b"null")
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read() or b"null")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--stock", type=int, default=5)
+    parser.add_argument("--buyers", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=100, help="Hilos que disparan los checkouts")
+    args = parser.parse_args(argv)
+
+    run = uuid.uuid4().hex[:8]
+    status, product = request("POST", f"{args.url}/api/products/", {
+        "name": f"Prueba de concurrencia {run}",
+        "description": "Producto temporal para verificar el checkout",
+        "price": 10.0,
+        "category": "Pruebas",
+        "image": "",
+        "stock": args.stock,
+    })
+    assert status == 200, product
+    product_id = product["id"]
+
+    def buy(user: str):
+        status, body = request("POST", f"{args.url}/api/cart/{user}/items", {"product_id": product_id, "quantity": 1})
+        if status != 200:
+            return f"carrito {status}"
+        return request("POST", f"{args.url}/api/orders/checkout/{user}")[0]
+
+    users = [f"concurrency-{run}-{index}" for index in range(args.buyers)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(buy, users))
+    elapsed = time.perf_counter() - start
+
+    status, after = request("GET", f"{args.url}/api/products/{product_id}")
+    status, availability = request("GET", f"{args.url}/api/products/{product_id}/availability")
+
+    statuses = Counter(results)
+    sold = statuses[201]
+    print(f"Resultados: {dict(statuses)} en {elapsed:.2f}s")
+    print(f"Stock: {args.stock} -> {after['stock']}; ventas: {after['sales_count']}; reservado: {availability['reserved']}")
+
+    ok = (
+        0 <= after["stock"] == args.stock - sold
+        and after["sales_count"] == sold
+        and sold <= args.stock
+        and availability["reserved"] == 0
+    )
+    if ok and sold < min(args.stock, args.buyers):
+        print("⚠️  Quedó stock sin vender: revisa los errores distintos de 400")
+    print("✅ Sin sobreventa" if ok else "❌ Inconsistencia detectada")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
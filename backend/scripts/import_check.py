@@ -0,0 +1,115 @@
+"""
+Import Check
+Verifica cómo la carga masiva identifica los productos existentes
+
+Importa pequeños CSV en una BD SQLite temporal con app/product_import.py y
+termina con código 1 si algún caso no deja el catálogo esperado. Pensado para
+CI, junto a query_budget.py.
+
+Uso (desde la carpeta backend):
+    python scripts/import_check.py
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="krisly-import-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'import.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, select, text  # noqa: E402
+
+from app import migrations  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models import Product  # noqa: E402
+from app.product_import import import_products  # noqa: E402
+
+HEADER = "sku,name,description,price,category,image,stock\n"
+
+def _import(*rows: str, chunk_size: int = 1000) -> dict:
+    with SessionLocal() as db:
+        return import_products(db, io.StringIO(HEADER + "".join(f"{row}\n" for row in rows)), "csv", chunk_size)
+
+def _catalog() -> list:
+    with SessionLocal() as db:
+        return [tuple(row) for row in db.execute(select(Product.sku, Product.name, Product.stock).order_by(Product.id))]
+
+def shared_name_separate_imports():
+    """Dos SKU con el mismo nombre en cargas distintas son dos productos"""
+    _import('LAB-ROJO,Labial,Rojo,10,Maquillaje,labial.jpg,5')
+    _import('LAB-ROSA,Labial,Rosa,10,Maquillaje,labial.jpg,7')
+    return _catalog() == [("LAB-ROJO", "Labial", 5), ("LAB-ROSA", "Labial", 7)]
+
+def shared_name_same_chunk():
+    """Dos SKU con el mismo nombre en el mismo bloque son dos productos"""
+    _import('LAB-ROJO,Labial,Rojo,10,Maquillaje,labial.jpg,5', 'LAB-ROSA,Labial,Rosa,10,Maquillaje,labial.jpg,7')
+    return _catalog() == [("LAB-ROJO", "Labial", 5), ("LAB-ROSA", "Labial", 7)]
+
+def same_sku_updates():
+    """Una fila con un SKU existente actualiza ese producto"""
+    _import('LAB-ROJO,Labial,Rojo,10,Maquillaje,labial.jpg,5')
+    _import('LAB-ROJO,Labial rojo,Rojo,10,Maquillaje,labial.jpg,9')
+    return _catalog() == [("LAB-ROJO", "Labial rojo", 9)]
+
+def name_without_sku_updates():
+    """Una fila sin SKU actualiza el producto con el mismo nombre"""
+    _import('LAB-ROJO,Labial,Rojo,10,Maquillaje,labial.jpg,5')
+    _import(',Labial,Rojo,10,Maquillaje,labial.jpg,9')
+    return _catalog() == [("LAB-ROJO", "Labial", 9)]
+
+def failing_row_in_chunk():
+    """Si una fila falla en la base, el resto del bloque se guarda y solo esa fila se informa"""
+    _import('LAB-ROJO,Labial,Rojo,10,Maquillaje,labial.jpg,5')
+    # Un trigger hace fallar el INSERT de una fila concreta, como lo haría una restricción
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TRIGGER import_check_fail BEFORE INSERT ON products WHEN NEW.name = 'Falla' "
+            "BEGIN SELECT RAISE(ABORT, 'import_check'); END"
+        ))
+    try:
+        report = _import(
+            'LAB-ROSA,Labial,Rosa,10,Maquillaje,labial.jpg,7',
+            'FALLA,Falla,Falla,10,Maquillaje,labial.jpg,1',
+            'LAB-ROJO,Labial,Rojo,10,Maquillaje,labial.jpg,8',
+        )
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TRIGGER import_check_fail"))
+    return (
+        _catalog() == [("LAB-ROJO", "Labial", 8), ("LAB-ROSA", "Labial", 7)]
+        and (report["inserted"], report["updated"], report["failed"]) == (1, 1, 1)
+        and [error["row"] for error in report["errors"]] == [3]
+    )
+
+CASES = (
+    shared_name_separate_imports, shared_name_same_chunk, same_sku_updates, name_without_sku_updates,
+    failing_row_in_chunk,
+)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args(argv)
+
+    migrations.migrate(engine)
+    results, failures = [], 0
+    for case in CASES:
+        # Cada caso parte de un catálogo vacío
+        with SessionLocal() as db:
+            db.execute(delete(Product))
+            db.commit()
+        ok = case()
+        failures += not ok
+        results.append({"case": case.__name__, "ok": ok, "catalog": _catalog()})
+        print(f"{'✅' if ok else '❌'} {case.__doc__}")
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if failures:
+        print(f"❌ {failures} casos de importación fallaron")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Metrics Overhead
+Mide cuánto agrega MetricsMiddleware (app/metrics.py) a cada petición
+
+Llama a la app directamente por ASGI (sin HTTP ni cliente, para que el costo del
+middleware no quede oculto) con y sin el middleware, alternando rondas, y
+reporta microsegundos por petición y la diferencia. Usa una BD SQLite temporal.
+
+Uso (desde la carpeta backend):
+    python scripts/metrics_overhead.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp(prefix="krisly-metrics-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ["METRICS_ENABLED"] = "0"  # La app sin middleware; se envuelve a mano abajo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import migrations  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.metrics import MetricsMiddleware, render  # noqa: E402
+
+PATHS = ("/health", "/api/products/1")
+
+async def call(asgi, path: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 1), "server": ("localhost", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    await asgi(scope, receive, send)
+
+async def per_request(asgi, path: str, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        await call(asgi, path)
+    return (time.perf_counter() - start) / count * 1e6
+
+async def run(args) -> list:
+    # Las peticiones van directo a la app, sin lifespan: crear el esquema y el catálogo de prueba antes
+    migrations.migrate(engine)
+    instrumented = MetricsMiddleware(app)
+    results = []
+    for path in PATHS:
+        for _ in range(200):  # Calentar cachés (catálogo, SQLAlchemy, Pydantic)
+            await call(app, path)
+            await call(instrumented, path)
+        plain, measured = [], []
+        for _ in range(args.rounds):
+            plain.append(await per_request(app, path, args.requests // args.rounds))
+            measured.append(await per_request(instrumented, path, args.requests // args.rounds))
+        base, with_metrics = min(plain), min(measured)
+        results.append({
+            "path": path,
+            "us_per_request": round(base, 2),
+            "us_per_request_with_metrics": round(with_metrics, 2),
+            "overhead_us": round(with_metrics - base, 2),
+            "overhead_percent": round((with_metrics - base) / base * 100, 1),
+        })
+
+    start = time.perf_counter()
+    body = render()
+    results.append({"render_ms": round((time.perf_counter() - start) * 1000, 2), "render_bytes": len(body)})
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Peticiones por ruta y variante")
+    parser.add_argument("--rounds", type=int, default=5, help="Rondas alternadas (se toma la más rápida)")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    for row in results[:-1]:
+        print(
+            f"⏱️ {row['path']}: {row['us_per_request']} µs -> {row['us_per_request_with_metrics']} µs "
+            f"(+{row['overhead_us']} µs, {row['overhead_percent']}%)"
+        )
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Query Budget
+Verifica que cada ruta principal no supere su máximo de consultas SQL
+
+Carga un catálogo, carritos, reseñas y órdenes en una BD SQLite temporal, llama
+a cada ruta con assert_max_queries (app/query_profiler.py) y termina con código 1
+si alguna se pasa de su presupuesto, mostrando las sentencias repetidas. Pensado
+para CI: un N+1 nuevo (una consulta por elemento) rompe el presupuesto de la ruta.
+
+Los presupuestos se miden con listas de ITEMS elementos (carritos, órdenes,
+reseñas), así una consulta por elemento no pasa desapercibida.
+
+Uso (desde la carpeta backend):
+    python scripts/query_budget.py
+    DB_MODE=async python scripts/query_budget.py
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="krisly-queries-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ["CATALOG_CACHE_ENABLED"] = "0"  # Contar las consultas reales, no aciertos de la caché
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import migrations  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.query_profiler import QUERY_PROFILER_REPEAT_THRESHOLD, count_queries  # noqa: E402
+
+# Elementos por lista (productos en los carritos y en la orden, reseñas del producto 1)
+ITEMS = 10
+
+# Consultas del checkout: fijas y por línea de la orden
+CHECKOUT_BASE = 23
+CHECKOUT_PER_LINE = 3
+
+# (método, ruta, cuerpo JSON, máximo de consultas)
+BUDGETS = (
+    ("GET", "/api/products?limit=50", None, 2),
+    ("GET", "/api/products/1", None, 2),
+    ("GET", "/api/products/featured/by-criteria?limit=20", None, 2),
+    ("GET", "/api/products/search?q=Producto", None, 3),
+    ("GET", "/api/products/1/availability", None, 2),
+    ("GET", "/api/cart/buyer-0", None, 1),
+    ("POST", "/api/cart/buyer-0/items", {"product_id": 1, "quantity": 1}, 8),
+    ("GET", "/api/reviews/product/1?limit=50", None, 2),
+    ("GET", "/api/reviews/summary?" + "&".join(f"product_ids={i}" for i in range(1, 21)), None, 1),
+    # Costo fijo: producto, reseña, rating, 2 rankings (lectura, upsert y recorte cada uno),
+    # versiones en un upsert y la respuesta; no depende de cuántas reseñas tenga el producto
+    ("POST", "/api/reviews/?user_id=budget", {"product_id": 1, "rating": 5, "comment": "ok"}, 13),
+    ("GET", "/api/orders/buyer-1", None, 3),
+    ("GET", "/api/orders/", None, 3),
+    # Base fija (carrito, orden, líneas y agregados de ventas en un executemany cada uno,
+    # rankings, versiones, vaciar el carrito y la respuesta) más 3 sentencias por línea:
+    # liberar la reserva, devolverla al producto y el UPDATE condicional del stock
+    # (ver routes/orders.py), intencionales para no vender stock que no hay
+    ("POST", "/api/orders/checkout/buyer-2", None, CHECKOUT_BASE + CHECKOUT_PER_LINE * ITEMS),
+    ("GET", "/api/analytics/sales/totals", None, 2),
+)
+
+def seed(client: TestClient, items: int):
+    """Catálogo, carritos con `items` productos, reseñas y órdenes con `items` líneas"""
+    for i in range(items):
+        response = client.post("/api/products/", json={
+            "name": f"Producto {i}", "description": "Descripción", "price": 10.0 + i,
+            "category": "Maquillaje", "image": "", "stock": 1000,
+        })
+        assert response.status_code == 200, response.text
+        client.post(f"/api/reviews/?user_id=seed-{i}", json={"product_id": 1, "rating": 1 + i % 5, "comment": "ok"})
+
+    for buyer in ("buyer-0", "buyer-1", "buyer-2"):
+        for product_id in range(1, items + 1):
+            client.post(f"/api/cart/{buyer}/items", json={"product_id": product_id, "quantity": 1})
+    response = client.post("/api/orders/checkout/buyer-1")
+    assert response.status_code == 201, response.text
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args(argv)
+
+    # El lifespan solo verifica la versión de la base (MIGRATE_ON_STARTUP=0): migrarla antes
+    migrations.migrate(engine)
+    results, failures = [], 0
+    with TestClient(app) as client:
+        seed(client, ITEMS)
+        for method, path, body, budget in BUDGETS:
+            with count_queries() as log:
+                response = client.request(method, path, json=body)
+            assert response.status_code < 400, f"{method} {path}: {response.status_code} {response.text}"
+
+            over = log.count > budget
+            failures += over
+            results.append({
+                "route": f"{method} {path.split('?')[0]}",
+                "queries": log.count,
+                "budget": budget,
+                "repeated": [{"count": count, "statement": key} for key, count in log.repeated()],
+            })
+            print(f"{'❌' if over else '✅'} {method} {path.split('?')[0]}: {log.count}/{budget} consultas")
+            if over or log.repeated():
+                print(log.report())
+
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    if failures:
+        print(f"❌ {failures} rutas superan su presupuesto (repeticiones desde {QUERY_PROFILER_REPEAT_THRESHOLD})")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+Serialization Benchmark
+Compara la serialización de los listados de productos antes y después de la ruta rápida
+
+- legacy: objetos ORM Product -> ProductSchema (from_attributes) -> revalidación
+  del response_model -> json estándar (lo que hacía GET /api/products)
+- fast: columnas con SQLAlchemy Core -> dicts -> orjson, devolviendo el cuerpo ya
+  codificado (app/serialization.py)
+
+Para cada tamaño de página mide peticiones por segundo a través de la app (TestClient,
+sin caché) y la memoria asignada por petición (tracemalloc: pico y bloques).
+Usa una BD SQLite temporal; no toca la base configurada.
+
+Uso (desde la carpeta backend):
+    python scripts/serialization_benchmark.py --products 2000 --pages 100 1000 --seconds 3
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# BD temporal y sin caché: se mide la consulta y la serialización en cada petición
+_tmp = tempfile.mkdtemp(prefix="krisly-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.db')}"
+os.environ["CATALOG_CACHE_ENABLED"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import APIRouter, Depends  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import migrations  # noqa: E402
+from app.database import SessionLocal, engine, get_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Product  # noqa: E402
+from app.product_import import import_file  # noqa: E402
+from app.routes.products import LIST_COLUMNS, serialize_product  # noqa: E402
+from app.schemas import Product as ProductSchema  # noqa: E402
+from app.serialization import dumps, json_response, rows_to_dicts  # noqa: E402
+
+def legacy_page(db: Session, limit: int) -> list:
+    return [serialize_product(p) for p in db.query(Product).order_by(Product.id).limit(limit)]
+
+def fast_page(db: Session, limit: int) -> bytes:
+    return dumps(rows_to_dicts(db.query(*LIST_COLUMNS).order_by(Product.id).limit(limit)))
+
+bench = APIRouter(prefix="/bench")
+
+@bench.get("/legacy", response_model=list[ProductSchema])
+def legacy(limit: int, db: Session = Depends(get_db)):
+    return legacy_page(db, limit)
+
+@bench.get("/fast", response_model=list[ProductSchema])
+def fast(limit: int, db: Session = Depends(get_db)):
+    return json_response(fast_page(db, limit))
+
+app.include_router(bench)
+
+def seed(count: int):
+    lines = "".join(
+        json.dumps({
+            "name": f"Producto {i}", "sku": f"BENCH-{i}", "description": "Descripción de prueba " * 8,
+            "price": 10 + i % 90 + 0.99, "category": ("Maquillaje", "Cuidado Personal")[i % 2],
+            "image": f"https://example.com/{i}.jpg", "stock": i % 100, "is_featured": i % 10 == 0,
+        }) + "\n"
+        for i in range(count)
+    )
+    import_file(io.BytesIO(lines.encode()), "jsonl")
+
+def requests_per_second(client: TestClient, path: str, seconds: float) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        response = client.get(path)
+        assert response.status_code == 200, response.text
+        count += 1
+    return count / (time.perf_counter() - start)
+
+def allocations(client: TestClient, path: str) -> dict:
+    client.get(path)  # Calentar cachés de SQLAlchemy y Pydantic
+    tracemalloc.start()
+    client.get(path)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return {"peak_kb": round(peak / 1024, 1), "live_blocks": blocks}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000], help="Tamaños de página")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Duración de cada medición")
+    args = parser.parse_args(argv)
+
+    # El lifespan solo verifica la versión de la base (MIGRATE_ON_STARTUP=0): migrarla antes
+    migrations.migrate(engine)
+    with TestClient(app) as client:
+        seed(args.products)
+        db = SessionLocal()
+        try:
+            assert json.loads(fast_page(db, 10)) == legacy_page(db, 10), "Las dos rutas deben producir el mismo JSON"
+        finally:
+            db.close()
+
+        results = []
+        for limit in args.pages:
+            row = {"page": limit}
+            for name in ("legacy", "fast"):
+                path = f"/bench/{name}?limit={limit}"
+                row[name] = {"rps": round(requests_per_second(client, path, args.seconds), 1), **allocations(client, path)}
+            row["speedup"] = round(row["fast"]["rps"] / row["legacy"]["rps"], 2)
+            results.append(row)
+            print(
+                f"📊 página {limit}: legacy {row['legacy']['rps']} req/s (pico {row['legacy']['peak_kb']} KB) | "
+                f"fast {row['fast']['rps']} req/s (pico {row['fast']['peak_kb']} KB) | x{row['speedup']}"
+            )
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())
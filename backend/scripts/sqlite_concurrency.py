@@ -0,0 +1,188 @@
+"""
+SQLite Concurrency Benchmark
+Compara la configuración anterior de SQLite con el perfil de producción
+
+Perfiles (cada uno sobre un archivo SQLite temporal nuevo):
+- default: lo que hacía database.py antes (journal por rollback, solo check_same_thread)
+- wal: perfil de app/sqlite_profile.py (WAL, synchronous=NORMAL, busy_timeout, pool)
+- wal+queue: el perfil anterior más la cola de un escritor (SQLITE_WRITE_QUEUE=1)
+
+Carga: hilos escritores que reservan stock y publican reseñas (las mismas funciones
+que usan las rutas, una transacción por operación), hilos lectores que leen páginas
+del catálogo y exportaciones lentas que recorren la tabla completa por lotes
+(como un cliente descargando /api/products/export). Cada hilo hace una pausa
+entre operaciones (--think-time), como las peticiones de clientes reales.
+
+Informa operaciones por segundo, latencia p95 de las escrituras y cuántas fallaron
+con "database is locked".
+
+Uso (desde la carpeta backend):
+    python scripts/sqlite_concurrency.py --writers 16 --readers 8 --exports 2 --seconds 10
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import reservations, sqlite_profile  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.models import Product, Review  # noqa: E402
+
+PROFILES = ("default", "wal", "wal+queue")
+
+def make_engine(profile: str, url: str):
+    if profile == "default":
+        return create_engine(url, connect_args={"check_same_thread": False})
+    engine = create_engine(url, connect_args={"check_same_thread": False}, **sqlite_profile.pool_options(url))
+    sqlite_profile.configure(engine, write_queue=profile == "wal+queue")
+    return engine
+
+def seed(Session, products: int):
+    db = Session()
+    db.execute(Product.__table__.insert(), [
+        {"name": f"Producto {i}", "description": "Descripción " * 10, "price": 9.99, "category": "Maquillaje",
+         "image": "", "stock": 1_000_000, "rating": 4.5, "sales_count": 0, "is_featured": False}
+        for i in range(products)
+    ])
+    db.commit()
+    db.close()
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_profile(profile: str, args) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="krisly-sqlite-"), "bench.db")
+    url = f"sqlite:///{path}"
+    engine = make_engine(profile, url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    seed(Session, args.products)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"writes": 0, "reads": 0, "exports": 0, "locked": 0, "other_errors": 0}
+    write_latencies = []
+
+    def count(key: str, latency: float = None):
+        with lock:
+            stats[key] += 1
+            if latency is not None:
+                write_latencies.append(latency)
+
+    def failed(error: Exception):
+        count("locked" if "locked" in str(error) else "other_errors")
+
+    def writer(number: int):
+        rng = random.Random(number)
+        while not stop.is_set():
+            db = Session()
+            start = time.perf_counter()
+            try:
+                product_id = rng.randint(1, args.products)
+                if rng.random() < 0.7:
+                    reservations.hold(db, f"bench-{number}", product_id, rng.randint(1, 3))
+                else:
+                    db.add(Review(product_id=product_id, user_id=f"bench-{number}", rating=rng.randint(1, 5), comment="ok"))
+                db.commit()
+                count("writes", time.perf_counter() - start)
+            except OperationalError as error:
+                db.rollback()
+                failed(error)
+            finally:
+                db.close()
+            time.sleep(args.think_time)
+
+    def reader(number: int):
+        rng = random.Random(1000 + number)
+        while not stop.is_set():
+            db = Session()
+            try:
+                last_id = rng.randint(0, max(args.products - 100, 0))
+                db.execute(select(Product.id, Product.name, Product.price).where(Product.id > last_id).order_by(Product.id).limit(100)).all()
+                count("reads")
+            except OperationalError as error:
+                failed(error)
+            finally:
+                db.close()
+            time.sleep(args.think_time)
+
+    def exporter(number: int):
+        while not stop.is_set():
+            db = Session()
+            try:
+                result = db.execute(select(Product.id, Product.name, Product.description).execution_options(yield_per=500))
+                for _ in result.partitions():
+                    time.sleep(args.export_delay)  # Cliente lento recibiendo cada lote
+                    if stop.is_set():
+                        break
+                count("exports")
+            except OperationalError as error:
+                failed(error)
+            finally:
+                db.close()
+
+    threads = (
+        [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+        + [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+        + [threading.Thread(target=exporter, args=(i,)) for i in range(args.exports)]
+    )
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+
+    return {
+        "profile": profile,
+        "writes_per_second": round(stats["writes"] / elapsed, 1),
+        "reads_per_second": round(stats["reads"] / elapsed, 1),
+        "exports": stats["exports"],
+        "write_p95_ms": round(percentile(write_latencies, 0.95) * 1000, 1),
+        "locked_errors": stats["locked"],
+        "other_errors": stats["other_errors"],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--exports", type=int, default=2, help="Exportaciones lentas simultáneas")
+    parser.add_argument("--export-delay", type=float, default=0.05, help="Segundos por lote de exportación")
+    parser.add_argument("--think-time", type=float, default=0.01, help="Pausa entre operaciones de cada hilo (segundos)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    results = []
+    for profile in args.profiles:
+        result = run_profile(profile, args)
+        results.append(result)
+        print(
+            f"🗄️ {profile}: {result['writes_per_second']} escrituras/s (p95 {result['write_p95_ms']} ms), "
+            f"{result['reads_per_second']} lecturas/s, {result['exports']} exportaciones, "
+            f"{result['locked_errors']} 'database is locked'"
+        )
+    print(json.dumps(results, indent=2))
+    return 1 if any(r["locked_errors"] for r in results if r["profile"] != "default") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
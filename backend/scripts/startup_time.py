@@ -0,0 +1,131 @@
+"""
+Startup Time
+Mide el arranque de uvicorn con N workers sobre la misma BD SQLite temporal
+
+Para cada cantidad de workers lanza el servidor, mide el tiempo hasta el primer
+/health y lee de GET /metrics (app_startup_seconds) los pasos del arranque de
+cada worker. Después verifica que cada migración quedó registrada una sola vez
+y que el catálogo de prueba no se cargó dos veces.
+
+- Por defecto la base se migra antes con `python -m app.cli migrate`, como en un
+  despliegue, y los workers arrancan con MIGRATE_ON_STARTUP=0
+- Con --fresh los workers arrancan sobre una base vacía con MIGRATE_ON_STARTUP=1
+  y compiten por migrarla (el lock de app/migrations la migra una vez)
+
+Uso (desde la carpeta backend):
+    python scripts/startup_time.py --workers 1 4 8
+    python scripts/startup_time.py --workers 4 --fresh --warmup
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_LINE = re.compile(r'app_startup_seconds\{pid="(\d+)",step="(\w+)"\} ([\d.]+)')
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _get(url: str) -> str:
+    with urllib.request.urlopen(url, timeout=2) as response:
+        return response.read().decode()
+
+def measure(workers: int, fresh: bool, warmup: bool, timeout: float = 60) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="krisly-startup-"), "startup.db")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{path}",
+        "MIGRATE_ON_STARTUP": "1" if fresh else "0",
+        "CACHE_WARMUP": "1" if warmup else "0",
+    }
+    if not fresh:
+        subprocess.run([sys.executable, "-m", "app.cli", "migrate"], env=env, cwd=BACKEND, check=True,
+                       capture_output=True)
+
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        env=env, cwd=BACKEND, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        ready = None
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"El servidor terminó al arrancar:\n{process.stderr.read().decode()}")
+            try:
+                _get(f"{url}/health")
+                ready = time.perf_counter() - start
+                break
+            except (urllib.error.URLError, OSError):
+                time.sleep(0.02)
+        if ready is None:
+            raise RuntimeError("El servidor no respondió /health a tiempo")
+
+        # Cada conexión nueva la atiende algún worker: muestrear hasta ver a todos
+        steps = {}
+        for _ in range(workers * 50):
+            for pid, step, seconds in STARTUP_LINE.findall(_get(f"{url}/metrics")):
+                steps.setdefault(pid, {})[step] = float(seconds)
+            if len(steps) == workers:
+                break
+    finally:
+        process.terminate()
+        process.wait()
+
+    with sqlite3.connect(path) as conn:
+        versions = [version for (version,) in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+        products = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    totals = [worker["total"] for worker in steps.values()]
+    return {
+        "workers": workers,
+        "fresh": fresh,
+        "warmup": warmup,
+        "first_health_seconds": round(ready, 3),
+        "workers_seen": len(steps),
+        "worker_startup_ms": {
+            "max": round(max(totals) * 1000, 1) if totals else None,
+            "mean": round(sum(totals) / len(totals) * 1000, 1) if totals else None,
+        },
+        "steps_by_worker": steps,
+        "migration_versions": versions,
+        "products": products,
+        "race_free": len(versions) == len(set(versions)),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="Cantidades de workers a medir")
+    parser.add_argument("--fresh", action="store_true", help="Base vacía: los workers migran al arrancar")
+    parser.add_argument("--warmup", action="store_true", help="Activar CACHE_WARMUP")
+    args = parser.parse_args(argv)
+
+    results = []
+    for workers in args.workers:
+        result = measure(workers, args.fresh, args.warmup)
+        results.append(result)
+        startup = result["worker_startup_ms"]
+        print(
+            f"{'✅' if result['race_free'] else '❌'} {workers} workers: /health en {result['first_health_seconds']}s, "
+            f"arranque por worker {startup['mean']} ms (máx {startup['max']} ms, {result['workers_seen']} vistos), "
+            f"migraciones {result['migration_versions']}, {result['products']} productos"
+        )
+    print(json.dumps(results, indent=2))
+    return 0 if all(result["race_free"] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
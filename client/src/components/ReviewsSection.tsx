@@ -17,6 +17,13 @@ export interface Review {
   created_at: string;
 }
 
+interface ReviewSummary {
+  product_id: number;
+  review_count: number;
+  average: number | null;
+  distribution: Record<string, number>;
+}
+
 interface ReviewsSectionProps {
   productId: number;
   onReviewAdded?: () => void;
@@ -24,7 +31,10 @@ interface ReviewsSectionProps {
 
 export default function ReviewsSection({ productId, onReviewAdded }: ReviewsSectionProps) {
   const [reviews, setReviews] = useState<Review[]>([]);
+  const [summary, setSummary] = useState<ReviewSummary | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [newReview, setNewReview] = useState({
     rating: 5,
     comment: '',
@@ -38,10 +48,17 @@ export default function ReviewsSection({ productId, onReviewAdded }: ReviewsSect
   const loadReviews = async () => {
     try {
       setLoading(true);
-      const response = await fetch(`/api/reviews/product/${productId}`);
-      if (response.ok) {
-        const data = await response.json();
+      const [listResponse, summaryResponse] = await Promise.all([
+        fetch(`/api/reviews/product/${productId}`),
+        fetch(`/api/reviews/product/${productId}/summary`),
+      ]);
+      if (listResponse.ok) {
+        const data = await listResponse.json();
         setReviews(data);
+        setNextCursor(listResponse.headers.get('X-Next-Cursor'));
+      }
+      if (summaryResponse.ok) {
+        setSummary(await summaryResponse.json());
       }
     } catch (error) {
       console.error('Error loading reviews:', error);
@@ -50,6 +67,26 @@ export default function ReviewsSection({ productId, onReviewAdded }: ReviewsSect
     }
   };
 
+  const loadMoreReviews = async () => {
+    if (!nextCursor) return;
+
+    try {
+      setLoadingMore(true);
+      const response = await fetch(
+        `/api/reviews/product/${productId}?cursor=${encodeURIComponent(nextCursor)}`
+      );
+      if (response.ok) {
+        const data = await response.json();
+        setReviews(prev => [...prev, ...data]);
+        setNextCursor(response.headers.get('X-Next-Cursor'));
+      }
+    } catch (error) {
+      console.error('Error loading more reviews:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleSubmitReview = async (e: React.FormEvent) => {
     e.preventDefault();
 
@@ -102,8 +139,9 @@ export default function ReviewsSection({ productId, onReviewAdded }: ReviewsSect
     );
   };
 
-  const averageRating = reviews.length > 0
-    ? (reviews.reduce((sum, r) => sum + r.rating, 0) / reviews.length).toFixed(1)
+  const reviewCount = summary?.review_count ?? reviews.length;
+  const averageRating = summary?.average != null
+    ? summary.average.toFixed(1)
     : 0;
 
   return (
@@ -115,7 +153,7 @@ export default function ReviewsSection({ productId, onReviewAdded }: ReviewsSect
         <div className="flex items-center gap-4 mb-8">
           <div>
             <div className="text-4xl font-bold text-gray-900">{averageRating}</div>
-            <div className="text-sm text-gray-600">{reviews.length} reseñas</div>
+            <div className="text-sm text-gray-600">{reviewCount} reseñas</div>
           </div>
           <div>
             {renderStars(Math.round(Number(averageRating)))}
@@ -195,6 +233,17 @@ export default function ReviewsSection({ productId, onReviewAdded }: ReviewsSect
               <p className="text-gray-700">{review.comment}</p>
             </div>
           ))}
+
+          {nextCursor && (
+            <button
+              type="button"
+              onClick={loadMoreReviews}
+              disabled={loadingMore}
+              className="w-full border border-pink-300 text-pink-600 hover:bg-pink-50 font-semibold py-2 rounded-lg transition-colors disabled:opacity-50"
+            >
+              {loadingMore ? 'Cargando...' : 'Ver más reseñas'}
+            </button>
+          )}
         </div>
       ) : (
         <div className="text-center py-8 text-gray-500">
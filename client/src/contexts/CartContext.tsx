@@ -1,12 +1,16 @@
 /**
  * Cart Context
- * 
+ *
  * Gestiona el estado global del carrito de compras
  * Con fallback a localStorage si el backend no está disponible
+ *
+ * Los cambios se aplican al instante en la interfaz y se sincronizan con el
+ * backend en lote: las operaciones de una ráfaga de clics se envían juntas en
+ * un solo PATCH, con la versión del carrito para detectar conflictos (409)
  */
 
-import React, { createContext, useContext, useState, useEffect } from 'react';
-import { API_ENDPOINTS, apiGet, apiPost, apiPut, apiDelete, getUserId } from '@/lib/api';
+import React, { createContext, useContext, useState, useEffect, useRef } from 'react';
+import { API_ENDPOINTS, ApiError, apiGet, apiPatch, apiDelete, getUserId } from '@/lib/api';
 
 export interface CartItem {
   id: string;
@@ -17,6 +21,12 @@ export interface CartItem {
   product_id?: number;
 }
 
+interface CartOperation {
+  op: 'add' | 'update' | 'remove';
+  product_id: number;
+  quantity?: number;
+}
+
 interface CartContextType {
   items: CartItem[];
   addItem: (item: Omit<CartItem, 'quantity' | 'id'> & { product_id: number }) => Promise<void>;
@@ -32,6 +42,21 @@ interface CartContextType {
 
 const CartContext = createContext<CartContextType | undefined>(undefined);
 
+// Tiempo que se agrupan las operaciones antes de enviarlas al backend
+const SYNC_DELAY_MS = 300;
+
+// Transformar datos del backend al formato del frontend
+function transformCart(response: any): CartItem[] {
+  return response.items.map((item: any) => ({
+    id: item.id.toString(),
+    name: item.product.name,
+    price: item.product.price,
+    quantity: item.quantity,
+    image: item.product.image,
+    product_id: item.product_id,
+  }));
+}
+
 export function CartProvider({ children }: { children: React.ReactNode }) {
   const [items, setItems] = useState<CartItem[]>([]);
   const [loading, setLoading] = useState(false);
@@ -39,31 +64,33 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
   const [backendAvailable, setBackendAvailable] = useState(false);
   const userId = getUserId();
 
+  const pendingOps = useRef<CartOperation[]>([]);
+  const syncTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const cartVersion = useRef<number | null>(null);
+
   // Cargar carrito del backend al montar el componente
   useEffect(() => {
     loadCartFromBackend();
+    return () => {
+      if (syncTimer.current) clearTimeout(syncTimer.current);
+    };
   }, []);
 
+  const saveItems = (newItems: CartItem[]) => {
+    setItems(newItems);
+    localStorage.setItem('cart', JSON.stringify(newItems));
+  };
+
   const loadCartFromBackend = async () => {
     try {
       setLoading(true);
       setError(null);
-      
+
       const response = await apiGet<any>(API_ENDPOINTS.CART(userId));
-      
-      // Transformar datos del backend al formato del frontend
-      const transformedItems = response.items.map((item: any) => ({
-        id: item.id.toString(),
-        name: item.product.name,
-        price: item.product.price,
-        quantity: item.quantity,
-        image: item.product.image,
-        product_id: item.product_id,
-      }));
-      
-      setItems(transformedItems);
+
+      cartVersion.current = response.version ?? null;
+      saveItems(transformCart(response));
       setBackendAvailable(true);
-      localStorage.setItem('cart', JSON.stringify(transformedItems));
     } catch (err) {
       console.error('Error loading cart from backend:', err);
       setBackendAvailable(false);
@@ -85,162 +112,110 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
     }
   };
 
-  const addItem = async (item: Omit<CartItem, 'quantity' | 'id'> & { product_id: number }) => {
-    try {
-      setLoading(true);
-      setError(null);
-      
-      let transformedItems: CartItem[];
+  /**
+   * Enviar las operaciones pendientes en un solo PATCH
+   * Ante un 409 se adopta el carrito del servidor y solo se reenvían los 'add'
+   * (son relativos); 'update' y 'remove' se descartan porque se decidieron sobre
+   * un carrito que ya cambió, y se avisa del conflicto
+   */
+  const syncPendingOps = async () => {
+    syncTimer.current = null;
+    const operations = pendingOps.current;
+    pendingOps.current = [];
+    if (operations.length === 0) return;
 
-      if (backendAvailable) {
-        try {
-          const response = await apiPost<any>(
-            API_ENDPOINTS.CART_ADD_ITEM(userId),
-            {
-              product_id: item.product_id,
-              quantity: 1,
-            }
-          );
-          
-          transformedItems = response.items.map((i: any) => ({
-            id: i.id.toString(),
-            name: i.product.name,
-            price: i.product.price,
-            quantity: i.quantity,
-            image: i.product.image,
-            product_id: i.product_id,
-          }));
-        } catch (backendErr) {
-          console.warn('Backend failed, using localStorage:', backendErr);
-          setBackendAvailable(false);
-          // Fallback a localStorage
-          transformedItems = [...items];
-          const existingItem = transformedItems.find(i => i.product_id === item.product_id);
-          if (existingItem) {
-            existingItem.quantity += 1;
-          } else {
-            transformedItems.push({
-              id: `local_${Date.now()}`,
-              ...item,
-              quantity: 1,
-            });
-          }
-        }
-      } else {
-        // Usar localStorage directamente
-        transformedItems = [...items];
-        const existingItem = transformedItems.find(i => i.product_id === item.product_id);
-        if (existingItem) {
-          existingItem.quantity += 1;
-        } else {
-          transformedItems.push({
-            id: `local_${Date.now()}`,
-            ...item,
-            quantity: 1,
-          });
+    const send = (version: number | null, ops: CartOperation[]) =>
+      apiPatch<any>(API_ENDPOINTS.CART(userId), { version, operations: ops });
+
+    try {
+      let response;
+      try {
+        response = await send(cartVersion.current, operations);
+      } catch (err) {
+        if (!(err instanceof ApiError) || err.status !== 409) throw err;
+        const adds = operations.filter(operation => operation.op === 'add');
+        if (adds.length < operations.length) {
+          setError('El carrito se actualizó desde otra sesión');
         }
+        if (adds.length === 0) throw err;
+        response = await send(err.data.cart.version, adds);
+      }
+
+      cartVersion.current = response.version;
+      // Si llegaron más cambios mientras tanto, se mantiene el estado local
+      if (pendingOps.current.length === 0) {
+        saveItems(transformCart(response));
       }
-      
-      setItems(transformedItems);
-      localStorage.setItem('cart', JSON.stringify(transformedItems));
     } catch (err) {
-      console.error('Error adding item to cart:', err);
-      setError('Error al agregar producto al carrito');
-      throw err;
-    } finally {
-      setLoading(false);
+      if (err instanceof ApiError && err.status === 409) {
+        // El carrito cambió en otro lado: adoptar la versión del servidor
+        cartVersion.current = err.data.cart.version;
+        saveItems(transformCart(err.data.cart));
+        setError('El carrito se actualizó desde otra sesión');
+      } else if (err instanceof ApiError && err.status < 500) {
+        console.error('Error syncing cart:', err);
+        setError(err.data?.detail ?? 'Error al sincronizar el carrito');
+        await loadCartFromBackend();
+      } else {
+        console.warn('Backend failed, using localStorage:', err);
+        setBackendAvailable(false);
+      }
     }
   };
 
+  const queueOperation = (operation: CartOperation) => {
+    if (!backendAvailable) return;
+
+    pendingOps.current.push(operation);
+    if (syncTimer.current) clearTimeout(syncTimer.current);
+    syncTimer.current = setTimeout(syncPendingOps, SYNC_DELAY_MS);
+  };
+
+  const addItem = async (item: Omit<CartItem, 'quantity' | 'id'> & { product_id: number }) => {
+    setError(null);
+
+    const newItems = [...items];
+    const index = newItems.findIndex(i => i.product_id === item.product_id);
+    if (index >= 0) {
+      newItems[index] = { ...newItems[index], quantity: newItems[index].quantity + 1 };
+    } else {
+      newItems.push({
+        id: `local_${Date.now()}`,
+        ...item,
+        quantity: 1,
+      });
+    }
+
+    saveItems(newItems);
+    queueOperation({ op: 'add', product_id: item.product_id, quantity: 1 });
+  };
+
   const removeItem = async (id: string) => {
-    try {
-      setLoading(true);
-      setError(null);
-      
-      let transformedItems: CartItem[];
+    setError(null);
 
-      if (backendAvailable) {
-        try {
-          const response = await apiDelete<any>(
-            API_ENDPOINTS.CART_REMOVE_ITEM(userId, parseInt(id))
-          );
-          
-          transformedItems = response.items.map((i: any) => ({
-            id: i.id.toString(),
-            name: i.product.name,
-            price: i.product.price,
-            quantity: i.quantity,
-            image: i.product.image,
-            product_id: i.product_id,
-          }));
-        } catch (backendErr) {
-          console.warn('Backend failed, using localStorage:', backendErr);
-          setBackendAvailable(false);
-          transformedItems = items.filter(item => item.id !== id);
-        }
-      } else {
-        transformedItems = items.filter(item => item.id !== id);
-      }
-      
-      setItems(transformedItems);
-      localStorage.setItem('cart', JSON.stringify(transformedItems));
-    } catch (err) {
-      console.error('Error removing item from cart:', err);
-      setError('Error al eliminar producto del carrito');
-      throw err;
-    } finally {
-      setLoading(false);
+    const removed = items.find(item => item.id === id);
+    saveItems(items.filter(item => item.id !== id));
+
+    if (removed?.product_id !== undefined) {
+      queueOperation({ op: 'remove', product_id: removed.product_id });
     }
   };
 
   const updateQuantity = async (id: string, quantity: number) => {
-    try {
-      setLoading(true);
-      setError(null);
-      
-      if (quantity <= 0) {
-        await removeItem(id);
-        return;
-      }
-      
-      let transformedItems: CartItem[];
+    if (quantity <= 0) {
+      await removeItem(id);
+      return;
+    }
 
-      if (backendAvailable) {
-        try {
-          const response = await apiPut<any>(
-            API_ENDPOINTS.CART_UPDATE_ITEM(userId, parseInt(id)),
-            { quantity }
-          );
-          
-          transformedItems = response.items.map((i: any) => ({
-            id: i.id.toString(),
-            name: i.product.name,
-            price: i.product.price,
-            quantity: i.quantity,
-            image: i.product.image,
-            product_id: i.product_id,
-          }));
-        } catch (backendErr) {
-          console.warn('Backend failed, using localStorage:', backendErr);
-          setBackendAvailable(false);
-          transformedItems = items.map(item =>
-            item.id === id ? { ...item, quantity } : item
-          );
-        }
-      } else {
-        transformedItems = items.map(item =>
-          item.id === id ? { ...item, quantity } : item
-        );
-      }
-      
-      setItems(transformedItems);
-      localStorage.setItem('cart', JSON.stringify(transformedItems));
-    } catch (err) {
-      console.error('Error updating quantity:', err);
-      setError('Error al actualizar cantidad');
-      throw err;
-    } finally {
-      setLoading(false);
+    setError(null);
+
+    const updated = items.find(item => item.id === id);
+    saveItems(items.map(item =>
+      item.id === id ? { ...item, quantity } : item
+    ));
+
+    if (updated?.product_id !== undefined) {
+      queueOperation({ op: 'update', product_id: updated.product_id, quantity });
     }
   };
 
@@ -248,16 +223,24 @@ export function CartProvider({ children }: { children: React.ReactNode }) {
     try {
       setLoading(true);
       setError(null);
-      
+
+      // Las operaciones pendientes ya no importan
+      pendingOps.current = [];
+      if (syncTimer.current) {
+        clearTimeout(syncTimer.current);
+        syncTimer.current = null;
+      }
+
       if (backendAvailable) {
         try {
           await apiDelete(API_ENDPOINTS.CART_CLEAR(userId));
+          cartVersion.current = null;
         } catch (backendErr) {
           console.warn('Backend failed, using localStorage:', backendErr);
           setBackendAvailable(false);
         }
       }
-      
+
       setItems([]);
       localStorage.removeItem('cart');
     } catch (err) {
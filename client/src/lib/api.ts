@@ -82,6 +82,34 @@ export async function apiPut<T>(url: string, data: any): Promise<T> {
   return response.json();
 }
 
+/**
+ * Error de la API con el código HTTP y el cuerpo de la respuesta
+ */
+export class ApiError extends Error {
+  constructor(public status: number, public data: any) {
+    super(`API Error: ${status}`);
+  }
+}
+
+/**
+ * Función para hacer peticiones PATCH
+ * Lanza ApiError para poder leer el cuerpo de respuestas como 409
+ */
+export async function apiPatch<T>(url: string, data: any): Promise<T> {
+  const response = await fetch(url, {
+    method: 'PATCH',
+    headers: commonHeaders,
+    body: JSON.stringify(data),
+  });
+
+  if (!response.ok) {
+    const body = await response.json().catch(() => null);
+    throw new ApiError(response.status, body);
+  }
+
+  return response.json();
+}
+
 /**
  * Función para hacer peticiones DELETE
  */
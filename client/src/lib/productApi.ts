@@ -38,7 +38,7 @@ export async function getProducts(): Promise<Product[]> {
       description: item.description,
       stock: item.stock,
       rating: item.rating || 4.9,
-      reviews: 0,
+      reviews: item.review_count ?? 0,
       sales_count: item.sales_count || 0,
       is_featured: item.is_featured || false,
       created_at: item.created_at,
@@ -66,7 +66,7 @@ export async function getProductById(id: number): Promise<Product | null> {
       description: response.description,
       stock: response.stock,
       rating: response.rating || 4.9,
-      reviews: 0,
+      reviews: response.review_count ?? 0,
       sales_count: response.sales_count || 0,
       is_featured: response.is_featured || false,
       created_at: response.created_at,
@@ -114,7 +114,7 @@ export async function getFeaturedProducts(
       description: item.description,
       stock: item.stock,
       rating: item.rating || 4.9,
-      reviews: 0,
+      reviews: item.review_count ?? 0,
       sales_count: item.sales_count || 0,
       is_featured: item.is_featured || false,
       created_at: item.created_at,
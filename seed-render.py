@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Script para agregar productos de prueba a la base de datos en Render
-Usa la API REST en lugar de acceso directo a la BD
+Usa la API REST en lugar de acceso directo a la BD: envía todos los productos
+en una sola petición a la carga masiva (POST /api/products/bulk, formato JSONL)
 """
 
 import requests
@@ -9,7 +10,7 @@ import json
 
 # URL del backend en Render
 BACKEND_URL = "https://krisly-beauty-store.onrender.com"
-API_ENDPOINT = f"{BACKEND_URL}/api/products"
+API_ENDPOINT = f"{BACKEND_URL}/api/products/bulk?format=jsonl"
 
 # Productos de prueba
 products = [
@@ -62,24 +63,28 @@ def seed_products():
             print("No se agregarán nuevos productos.")
             return
         
-        # Agregar cada producto
-        for i, product in enumerate(products, 1):
-            print(f"\n📦 Agregando producto {i}/{len(products)}: {product['name']}")
-            
-            response = requests.post(
-                API_ENDPOINT,
-                json=product,
-                timeout=10,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 200:
-                created = response.json()
-                print(f"   ✅ Producto creado con ID: {created.get('id')}")
-            else:
-                print(f"   ❌ Error: {response.status_code}")
-                print(f"   Respuesta: {response.text}")
-                return False
+        # Agregar todos los productos en una sola petición (una línea JSON por producto)
+        print(f"\n📦 Agregando {len(products)} productos")
+        body = "".join(json.dumps(product, ensure_ascii=False) + "\n" for product in products)
+        
+        response = requests.post(
+            API_ENDPOINT,
+            data=body.encode("utf-8"),
+            timeout=60,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        
+        if response.status_code != 200:
+            print(f"   ❌ Error: {response.status_code}")
+            print(f"   Respuesta: {response.text}")
+            return False
+        
+        report = response.json()
+        for error in report["errors"]:
+            print(f"   ❌ Fila {error['row']}: {error['error']}")
+        print(f"   ✅ Productos creados: {report['inserted']}, actualizados: {report['updated']}")
+        if report["failed"]:
+            return False
         
         # Verificar que se agregaron correctamente
         print("\n✅ Verificando productos...")